@@ -0,0 +1,99 @@
+# FILE: benchmarks/bench_cold_start.py
+#
+# Cold start: legacy pickles vs. serving bundle.
+#
+# Each scenario runs in a fresh interpreter and reports the time to import
+# src.predict, build the PredictionHandler, and serve the first prediction,
+# plus which heavy libraries ended up imported.
+#
+#   python -m benchmarks.bench_cold_start --repeats 5
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import PROJECT_BASE_PATH, build_artifacts, make_payloads
+
+HEAVY_MODULES = ("pandas", "sklearn", "lightgbm", "category_encoders", "joblib")
+
+_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from src.predict import PredictionHandler
+t1 = time.perf_counter()
+args = json.loads(sys.argv[1])
+if args["bundle_dir"]:
+    handler = PredictionHandler.from_bundle(args["bundle_dir"], backend=args["backend"])
+else:
+    handler = PredictionHandler(**args["paths"], backend=args["backend"])
+t2 = time.perf_counter()
+handler.predict_proba(args["record"])
+t3 = time.perf_counter()
+print("RESULT" + json.dumps({
+    "import_ms": (t1 - t0) * 1000, "init_ms": (t2 - t1) * 1000, "first_predict_ms": (t3 - t2) * 1000,
+    "modules": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _run_once(args: dict) -> dict:
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE, json.dumps(args)],
+        cwd=PROJECT_BASE_PATH, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    line = next(l for l in completed.stdout.splitlines() if l.startswith("RESULT"))
+    return {**json.loads(line[len("RESULT"):]), "process_ms": wall_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of legacy artifacts vs. serving bundle.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Write results as JSON.")
+    args = parser.parse_args()
+
+    from src.bundle import export_bundle
+    from src.predict import PredictionHandler
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = build_artifacts(os.path.join(tmp, "models"))
+        legacy = PredictionHandler(**paths)
+        bundle_dir = os.path.join(tmp, "bundle")
+        export_bundle(legacy.model, legacy.target_encoder, legacy.imputation_map,
+                      legacy.final_features, bundle_dir, version="bench")
+
+        record = {k: v for k, v in make_payloads(1)[0].items() if k != "SK_ID_CURR"}
+        scenarios = {
+            "legacy pickles (sklearn)": {"paths": paths, "bundle_dir": None, "backend": "sklearn"},
+            "bundle (booster)": {"paths": None, "bundle_dir": bundle_dir, "backend": "booster"},
+            "bundle (numpy)": {"paths": None, "bundle_dir": bundle_dir, "backend": "numpy"},
+        }
+
+        results = {}
+        for name, scenario in scenarios.items():
+            runs = [_run_once({**scenario, "record": record}) for _ in range(args.repeats)]
+            summary = {
+                key: statistics.median(r[key] for r in runs)
+                for key in ("import_ms", "init_ms", "first_predict_ms", "process_ms")
+            }
+            summary["heavy_modules"] = runs[-1]["modules"]
+            results[name] = summary
+            print(
+                f"{name:<26} import={summary['import_ms']:>7.0f}ms init={summary['init_ms']:>7.0f}ms "
+                f"first_predict={summary['first_predict_ms']:>6.1f}ms process={summary['process_ms']:>7.0f}ms "
+                f"heavy={','.join(summary['heavy_modules']) or '-'}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# FILE: benchmarks/bench_datastore.py
+#
+# Loading processed data: enriched CSV vs. the columnar store (src.datastore).
+#
+# A synthetic train_enriched-like table (payloads from benchmarks/synthetic.py
+# plus TARGET and TIME_INDEX) is written as CSV and imported into the store.
+# Each scenario then runs in a fresh interpreter and reports load time, the
+# resulting DataFrame's memory and the process's peak RSS growth (Linux):
+#   - csv                  pd.read_csv + pd.to_datetime(TIME_INDEX), what the notebooks do
+#   - store                every column, typed
+#   - store (projected)    a handful of columns
+#   - store (one year)     every column, YEAR partitions pruned
+#
+#   python -m benchmarks.bench_datastore --rows 200000 --repeats 3
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks.synthetic import PROJECT_BASE_PATH, make_payloads
+
+PROJECTED_COLUMNS = ["SK_ID_CURR", "TARGET", "AMT_CREDIT", "AMT_INCOME_TOTAL", "ORGANIZATION_TYPE", "TIME_INDEX"]
+
+# Peak RSS comes from VmHWM: ru_maxrss is carried over from the parent across exec.
+_PROBE = r"""
+import json, sys, time
+def peak_rss_kib():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+args = json.loads(sys.argv[1])
+import pandas as pd
+from src.datastore import ProcessedStore
+from src.config import Paths
+base_rss = peak_rss_kib()
+t0 = time.perf_counter()
+if args["mode"] == "csv":
+    df = pd.read_csv(args["csv"])
+    df["TIME_INDEX"] = pd.to_datetime(df["TIME_INDEX"])
+else:
+    store = ProcessedStore(Paths(args["base"]), root=args["store"])
+    df = store.read("train_enriched", **args["read"])
+t1 = time.perf_counter()
+print("RESULT" + json.dumps({
+    "load_ms": (t1 - t0) * 1000, "rows": len(df), "columns": df.shape[1],
+    "frame_mib": df.memory_usage(deep=True).sum() / 2**20,
+    "peak_rss_mib": (peak_rss_kib() - base_rss) / 1024,
+}))
+"""
+
+
+def make_table(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic train_enriched rows: raw payload fields, TARGET and a 2015-2020 TIME_INDEX."""
+    rng = random.Random(seed)
+    df = pd.DataFrame(make_payloads(rows, seed=seed))
+    df["TARGET"] = [int(rng.random() < 0.08) for _ in range(rows)]
+    months = pd.period_range("2015-01", "2020-12", freq="M").astype(str)
+    df["TIME_INDEX"] = [months[rng.randrange(len(months))] for _ in range(rows)]
+    return df
+
+
+def _run_once(args: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE, json.dumps(args)],
+        cwd=PROJECT_BASE_PATH, capture_output=True, text=True, check=True
+    )
+    line = next(l for l in completed.stdout.splitlines() if l.startswith("RESULT"))
+    return json.loads(line[len("RESULT"):])
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load time and memory, enriched CSV vs. columnar store.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Write results as JSON.")
+    args = parser.parse_args()
+
+    from src.config import Paths
+    from src.datastore import ProcessedStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "train_enriched.csv")
+        make_table(args.rows).to_csv(csv_path, index=False)
+        store_dir = os.path.join(tmp, "store")
+        ProcessedStore(Paths(PROJECT_BASE_PATH), root=store_dir).import_csv("train_enriched", csv_path)
+        print(f"on disk: csv={os.path.getsize(csv_path) / 2**20:.1f} MiB "
+              f"store={_dir_size(store_dir) / 2**20:.1f} MiB")
+
+        common = {"base": PROJECT_BASE_PATH, "csv": csv_path, "store": store_dir}
+        scenarios = {
+            "csv": {"mode": "csv", "read": {}},
+            "store": {"mode": "store", "read": {}},
+            "store (projected)": {"mode": "store", "read": {"columns": PROJECTED_COLUMNS}},
+            "store (one year)": {"mode": "store", "read": {"years": [2019]}},
+        }
+
+        results = {}
+        for name, scenario in scenarios.items():
+            runs = [_run_once({**common, **scenario}) for _ in range(args.repeats)]
+            summary = {key: statistics.median(r[key] for r in runs)
+                       for key in ("load_ms", "frame_mib", "peak_rss_mib")}
+            summary.update(rows=runs[-1]["rows"], columns=runs[-1]["columns"])
+            results[name] = summary
+            print(
+                f"{name:<18} rows={summary['rows']:>8,} cols={summary['columns']:>4} "
+                f"load={summary['load_ms']:>8.0f}ms frame={summary['frame_mib']:>7.1f}MiB "
+                f"peak_rss=+{summary['peak_rss_mib']:>7.1f}MiB"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# FILE: benchmarks/bench_metrics.py
+#
+# Overhead of the instrumentation added for /metrics.
+#
+#   - handler:    predict_proba with and without the stage observer
+#   - middleware: a trivial ASGI request with and without MetricsMiddleware
+#                 (driven directly through the ASGI interface, no HTTP client noise)
+#   - profiler:   predict_proba while the sampling profiler runs at 5 ms
+#
+#   python -m benchmarks.bench_metrics --rounds 15
+#
+# Variants are interleaved round by round and compared on their fastest round,
+# which is what the instrumentation adds once host noise is taken out.
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import build_artifacts, make_payloads
+from src.metrics import MetricsMiddleware, ServiceMetrics
+from src.predict import PredictionHandler
+from src.profiler import SamplingProfiler
+from src.schemas import LoanApplicationRawInput
+
+
+def _asgi_caller(app):
+    """Synchronous GET /ping into an ASGI app on a private event loop."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    loop = asyncio.new_event_loop()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def many(n):
+        for _ in range(n):
+            await app(dict(scope), receive, send)
+
+    return lambda n: loop.run_until_complete(many(n))
+
+
+def interleaved(variants, rounds: int, number: int):
+    """
+    Times each variant once per round, alternating between variants so slow
+    periods on a noisy host hit all of them. Per-call microseconds.
+
+    Args:
+        variants (dict): name -> (setup, run(n), teardown); setup/teardown may be None.
+
+    Returns:
+        dict: name -> {"min_us", "median_us"}.
+    """
+    samples = {name: [] for name in variants}
+    for _ in range(rounds):
+        for name, (setup, run, teardown) in variants.items():
+            if setup:
+                setup()
+            start = time.perf_counter()
+            run(number)
+            samples[name].append((time.perf_counter() - start) / number * 1e6)
+            if teardown:
+                teardown()
+    return {
+        name: {"min_us": min(values), "median_us": statistics.median(values)}
+        for name, values in samples.items()
+    }
+
+
+def _ping_app(with_metrics: bool):
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware, metrics=ServiceMetrics())
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of stage timing, metrics middleware and profiler.")
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--backend", default="booster", choices=["sklearn", "booster", "numpy"])
+    parser.add_argument("--calls", type=int, default=2000, help="Calls per sample.")
+    parser.add_argument("--output", default=None, help="Write results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = PredictionHandler(**build_artifacts(os.path.join(tmp, "models")), backend=args.backend)
+
+    record = {
+        k: v for k, v in LoanApplicationRawInput.model_validate(make_payloads(1)[0]).model_dump().items()
+        if k != "SK_ID_CURR"
+    }
+
+    plain_handler = copy.copy(handler)
+    plain_handler.stage_observer = None
+    timed_handler = copy.copy(handler)
+    timed_handler.stage_observer = ServiceMetrics().observe_stage
+    profiler = SamplingProfiler(interval_ms=5.0)
+
+    def calls(h):
+        def run(n):
+            for _ in range(n):
+                h.predict_proba(record)
+        return run
+
+    handler_results = interleaved({
+        "predict_proba (no metrics)": (None, calls(plain_handler), None),
+        "predict_proba (stage metrics)": (None, calls(timed_handler), None),
+        "predict_proba (stage metrics + profiler)": (profiler.start, calls(timed_handler), profiler.stop),
+    }, args.rounds, args.calls)
+
+    asgi_results = interleaved({
+        "asgi request (no middleware)": (None, _asgi_caller(_ping_app(False)), None),
+        "asgi request (metrics middleware)": (None, _asgi_caller(_ping_app(True)), None),
+    }, args.rounds, args.calls)
+
+    results = {}
+    for group in (handler_results, asgi_results):
+        base = next(iter(group.values()))["min_us"]
+        for name, result in group.items():
+            result["overhead_us"] = result["min_us"] - base
+            results[name] = result
+            print(
+                f"{name:<42} min {result['min_us']:>8.2f} us  median {result['median_us']:>8.2f} us  "
+                f"overhead {result['overhead_us']:>+6.2f} us ({result['min_us'] / base - 1:>+6.1%})"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"backend": args.backend, "us": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# FILE: benchmarks/bench_schema.py
+#
+# Per-request deserialization cost: full 130-field schema vs. compact schema.
+#
+# Each variant turns the raw JSON body into the dict handed to
+# PredictionHandler.predict_proba:
+#   - full (json + validate)   what /predict does: json.loads, model_validate, model_dump
+#   - full (validate_json)     the full schema parsed straight from bytes
+#   - compact (validate_json)  what /predict/fast does
+# The feature plan and model call are timed as well for scale.
+#
+#   python -m benchmarks.bench_schema --n 2000 --repeats 5
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import build_artifacts, make_payloads
+from src.predict import PredictionHandler
+from src.schemas import LoanApplicationRawInput, build_compact_input_model
+
+
+def _time_per_call_us(fn, bodies, repeats: int) -> float:
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for body in bodies:
+            fn(body)
+        runs.append((time.perf_counter() - start) / len(bodies) * 1e6)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deserialization cost per request, full vs. compact schema.")
+    parser.add_argument("--n", type=int, default=2000, help="Distinct payloads.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--missing-rate", type=float, default=0.3, help="Share of optional fields left out.")
+    parser.add_argument("--output", default=None, help="Write results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = PredictionHandler(**build_artifacts(os.path.join(tmp, "models")), backend="booster")
+
+    CompactInput = build_compact_input_model(handler.feature_plan.input_fields)
+    payloads = make_payloads(args.n, seed=2, missing_rate=args.missing_rate)
+    bodies = [json.dumps(p).encode() for p in payloads]
+    records = [CompactInput.model_validate_json(b).model_dump() for b in bodies]
+    for record in records:
+        record.pop("SK_ID_CURR")
+
+    variants = {
+        "full (json + validate)": lambda b: LoanApplicationRawInput.model_validate(json.loads(b)).model_dump(),
+        "full (validate_json)": lambda b: LoanApplicationRawInput.model_validate_json(b).model_dump(),
+        "compact (validate_json)": lambda b: CompactInput.model_validate_json(b).model_dump(),
+    }
+    results = {name: _time_per_call_us(fn, bodies, args.repeats) for name, fn in variants.items()}
+
+    results["feature plan"] = _time_per_call_us(lambda r: handler.feature_plan.transform(r), records, args.repeats)
+    results["model (booster)"] = _time_per_call_us(
+        lambda r: handler.predictor.predict_proba(handler.feature_plan.transform(r).reshape(1, -1)),
+        records, args.repeats
+    ) - results["feature plan"]
+
+    baseline = results["full (json + validate)"]
+    print(f"payload: {statistics.mean(len(b) for b in bodies):.0f} bytes avg, "
+          f"{len(LoanApplicationRawInput.model_fields)} -> {len(CompactInput.model_fields)} schema fields")
+    for name, us in results.items():
+        speedup = f"   ({baseline / us:>4.1f}x vs. full)" if name in variants else ""
+        print(f"{name:<26} {us:>8.1f} us/request{speedup}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"us_per_request": results, "compact_fields": list(CompactInput.model_fields)}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# FILE: benchmarks/bench_workers.py
+#
+# Memory and throughput of multi-worker serving (gunicorn_conf.py).
+#
+# For each worker count, starts `gunicorn -c gunicorn_conf.py src.main:app`,
+# waits for /health, reads per-worker memory from /proc/<pid>/smaps_rollup
+# (Linux only) and drives /predict with a closed-loop async client.
+#
+#   python -m benchmarks.bench_workers --workers 1 2 4 8 --duration 15
+#   python -m benchmarks.bench_workers --workers 4 --no-preload   # compare sharing
+#
+# RSS counts shared pages in every process that maps them; PSS splits shared
+# pages between the processes sharing them, so sum(PSS) is the real footprint.
+# USS (private pages) is what each extra worker actually costs.
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import PROJECT_BASE_PATH, build_artifacts, make_payloads
+
+
+def _children(pid: int):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def _memory_kb(pid: int):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss_mb": values.get("Rss", 0) / 1024,
+        "pss_mb": values.get("Pss", 0) / 1024,
+        "uss_mb": (values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)) / 1024,
+    }
+
+
+def _wait_healthy(base_url: str, timeout: float = 120.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Server at {base_url} did not become healthy in {timeout}s.")
+
+
+async def _drive(base_url: str, payloads, duration: float, concurrency: int):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(client, offset):
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=payloads[i % len(payloads)])
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+            i += concurrency
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        await asyncio.gather(*[client_loop(client, k) for k in range(concurrency)])
+
+    lat_ms = np.array(latencies) * 1000.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50_ms": float(np.percentile(lat_ms, 50)) if len(lat_ms) else None,
+        "p99_ms": float(np.percentile(lat_ms, 99)) if len(lat_ms) else None,
+    }
+
+
+def run(worker_counts, duration, concurrency, port, preload, model_dir):
+    payloads = make_payloads(500, seed=1)
+    base_url = f"http://127.0.0.1:{port}"
+    results = []
+
+    for n_workers in worker_counts:
+        env = dict(
+            os.environ, MODEL_DIR=model_dir, PORT=str(port),
+            WEB_CONCURRENCY=str(n_workers), GUNICORN_PRELOAD=str(preload).lower()
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "src.main:app"],
+            cwd=PROJECT_BASE_PATH, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            _wait_healthy(base_url)
+            # Let every worker boot before measuring memory
+            deadline = time.time() + 60
+            while len(_children(server.pid)) < n_workers and time.time() < deadline:
+                time.sleep(0.25)
+
+            load = asyncio.run(_drive(base_url, payloads, duration, concurrency))
+            master = _memory_kb(server.pid)
+            workers = [_memory_kb(pid) for pid in _children(server.pid)]
+
+            result = {
+                "workers": n_workers,
+                "preload": preload,
+                "master": master,
+                "worker_rss_mb": float(np.mean([w["rss_mb"] for w in workers])),
+                "worker_pss_mb": float(np.mean([w["pss_mb"] for w in workers])),
+                "worker_uss_mb": float(np.mean([w["uss_mb"] for w in workers])),
+                "total_pss_mb": master["pss_mb"] + sum(w["pss_mb"] for w in workers),
+                **load,
+            }
+            results.append(result)
+            print(
+                f"workers={n_workers:<3} rps={result['rps']:>8.1f} p99={result['p99_ms']:>7.2f}ms "
+                f"RSS/worker={result['worker_rss_mb']:>6.1f}MB USS/worker={result['worker_uss_mb']:>6.1f}MB "
+                f"total PSS={result['total_pss_mb']:>7.1f}MB errors={result['errors']}"
+            )
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker memory and requests/sec of multi-worker serving.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-preload", action="store_true", help="Load artifacts in every worker.")
+    parser.add_argument("--model-dir", default=None, help="Artifacts to serve (default: synthetic).")
+    parser.add_argument("--output", default=None, help="Write results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = args.model_dir
+        if model_dir is None:
+            model_dir = os.path.join(tmp, "models")
+            build_artifacts(model_dir)
+
+        results = run(args.workers, args.duration, args.concurrency, args.port,
+                      not args.no_preload, model_dir)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpu_count": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+# FILE: benchmarks/loadtest.py
+#
+# Open-loop load test of the prediction API with an SLO report.
+#
+# Requests are sent on a fixed schedule (constant or Poisson arrivals) whether
+# or not earlier ones have returned, the way independent clients behave. Latency
+# is measured from the scheduled send time, so a server (or client) falling
+# behind shows up as latency instead of silently lowering the offered load.
+#
+# The rate is held for one step or ramped over several; each step reports
+# latency percentiles, error / timeout rates and achieved throughput, and is
+# checked against the SLO (p99 and error rate). The highest passing step is the
+# sustainable rate of that configuration.
+#
+# Payloads are LoanApplicationRawInput bodies from benchmarks/synthetic.py with
+# missing optional fields, DAYS_EMPLOYED=365243 anomalies and unseen
+# ORGANIZATION_TYPE values. Everything runs locally:
+#   --target inproc   the FastAPI app in this process (httpx ASGI transport)
+#   --target server   gunicorn -c gunicorn_conf.py src.main:app on 127.0.0.1, as
+#                     in the container, once per --workers x --omp-threads setting
+#   --url             an already running service (e.g. docker compose up)
+#
+#   python -m benchmarks.loadtest --target inproc --rate 50 --duration 20
+#   python -m benchmarks.loadtest --target server --workers 1 2 --omp-threads 1 2 \
+#       --rate 25 --ramp-to 400 --steps 8 --slo-p99-ms 100 --output loadtest.json
+#   python -m benchmarks.loadtest --url http://127.0.0.1:8000 --rate 50 --ramp-to 300 --steps 6
+#
+# Client and server share the machine: on small hosts, watch `lag_p99_ms` (how
+# late the client sent requests); if it grows, the client is the bottleneck.
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_workers import _wait_healthy
+from benchmarks.synthetic import PROJECT_BASE_PATH, build_artifacts, make_payloads
+
+JSON_HEADERS = {"content-type": "application/json"}
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+# ============================================================
+# Workload
+# ============================================================
+def make_bodies(n: int, seed: int = 1, missing_rate: float = 0.3, anomaly_rate: float = 0.05,
+                unseen_category_rate: float = 0.05) -> List[bytes]:
+    """Pre-serialized request bodies, so the client spends no time on JSON while sending."""
+    payloads = make_payloads(n, seed=seed, missing_rate=missing_rate, anomaly_rate=anomaly_rate,
+                             unseen_category_rate=unseen_category_rate)
+    return [json.dumps(payload).encode() for payload in payloads]
+
+
+def arrival_offsets(rate: float, duration: float, poisson: bool, rng: np.random.Generator) -> np.ndarray:
+    """
+    Send times (seconds from the step start) for `rate` requests/sec over `duration`.
+
+    Args:
+        rate (float): Offered load in requests/sec.
+        duration (float): Step length in seconds.
+        poisson (bool): Exponential inter-arrival times instead of a fixed interval.
+        rng (np.random.Generator): Source of randomness for Poisson arrivals.
+    """
+    if not poisson:
+        return np.arange(0.0, duration, 1.0 / rate)
+    gaps = rng.exponential(1.0 / rate, size=int(rate * duration * 1.5) + 10)
+    offsets = np.cumsum(gaps) - gaps[0]
+    return offsets[offsets < duration]
+
+
+def rate_schedule(rate: float, ramp_to: Optional[float], steps: int) -> List[float]:
+    """Offered rate per step: a single fixed rate, or `steps` rates from `rate` to `ramp_to`."""
+    if ramp_to is None or steps <= 1:
+        return [rate]
+    return [float(r) for r in np.linspace(rate, ramp_to, steps)]
+
+
+# ============================================================
+# Open-loop driver
+# ============================================================
+async def _send(client: httpx.AsyncClient, path: str, body: bytes, scheduled: float) -> Tuple[float, float, float, str]:
+    sent = time.perf_counter()
+    try:
+        response = await client.post(path, content=body, headers=JSON_HEADERS)
+        outcome = "ok" if response.status_code < 400 else str(response.status_code)
+    except httpx.TimeoutException:
+        outcome = "timeout"
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    return scheduled, sent, time.perf_counter(), outcome
+
+
+async def run_step(client: httpx.AsyncClient, path: str, bodies: List[bytes], rate: float,
+                   duration: float, poisson: bool, rng: np.random.Generator) -> Dict[str, Any]:
+    """
+    Offers `rate` requests/sec for `duration` seconds, then waits for every
+    request still in flight.
+
+    Returns:
+        dict: Arrays of scheduled / sent / done times (relative to the step start)
+            and the outcome of every request.
+    """
+    offsets = arrival_offsets(rate, duration, poisson, rng)
+    start = rng.integers(len(bodies))
+    tasks = []
+    t0 = time.perf_counter()
+    for i, offset in enumerate(offsets):
+        scheduled = t0 + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        body = bodies[(start + i) % len(bodies)]
+        tasks.append(asyncio.create_task(_send(client, path, body, scheduled)))
+    results = await asyncio.gather(*tasks)
+
+    times = np.array([r[:3] for r in results], dtype=np.float64).reshape(-1, 3) - t0
+    return {
+        "scheduled": times[:, 0], "sent": times[:, 1], "done": times[:, 2],
+        "outcomes": [r[3] for r in results],
+    }
+
+
+def summarize_step(raw: Dict[str, Any], rate: float, duration: float,
+                   slo_p99_ms: float, max_error_rate: float) -> Dict[str, Any]:
+    """
+    Latency percentiles, error rates, throughput and the SLO verdict of one step.
+
+    Latency is `done - scheduled`; `lag` is `sent - scheduled`, the client's own delay.
+    """
+    outcomes = np.array(raw["outcomes"], dtype=object)
+    ok = outcomes == "ok"
+    n = len(outcomes)
+    latency_ms = (raw["done"] - raw["scheduled"]) * 1000.0
+    lag_ms = (raw["sent"] - raw["scheduled"]) * 1000.0
+    ok_latency = latency_ms[ok]
+
+    errors: Dict[str, int] = {}
+    for outcome in outcomes[~ok]:
+        errors[outcome] = errors.get(outcome, 0) + 1
+
+    error_rate = float((~ok).sum() / n) if n else 0.0
+    summary = {
+        "offered_rps": rate,
+        "requests": n,
+        "ok": int(ok.sum()),
+        "error_rate": error_rate,
+        "errors": errors,
+        "achieved_rps": float(ok.sum() / max(duration, float(raw["done"].max()) if n else duration)),
+        "max_ms": float(ok_latency.max()) if ok_latency.size else None,
+        "lag_p99_ms": float(np.percentile(lag_ms, 99)) if n else None,
+        "timeline": throughput_timeline(raw),
+    }
+    for q in PERCENTILES:
+        summary[f"p{q:g}_ms"] = float(np.percentile(ok_latency, q)) if ok_latency.size else None
+    summary["slo_ok"] = bool(
+        summary["p99_ms"] is not None and summary["p99_ms"] <= slo_p99_ms and error_rate <= max_error_rate
+    )
+    return summary
+
+
+def throughput_timeline(raw: Dict[str, Any], bucket: float = 1.0) -> List[Dict[str, float]]:
+    """Per-second completions and p99 latency within a step (the throughput curve)."""
+    if not len(raw["done"]):
+        return []
+    ok = np.array([o == "ok" for o in raw["outcomes"]])
+    buckets = np.floor(raw["done"] / bucket).astype(int)
+    latency_ms = (raw["done"] - raw["scheduled"]) * 1000.0
+    timeline = []
+    for b in range(buckets.max() + 1):
+        in_bucket = buckets == b
+        done_ok = in_bucket & ok
+        timeline.append({
+            "t": b * bucket,
+            "ok_rps": float(done_ok.sum() / bucket),
+            "error_rps": float((in_bucket & ~ok).sum() / bucket),
+            "p99_ms": float(np.percentile(latency_ms[done_ok], 99)) if done_ok.any() else None,
+        })
+    return timeline
+
+
+async def run_ramp(client: httpx.AsyncClient, path: str, bodies: List[bytes], rates: List[float],
+                   duration: float, warmup: float, poisson: bool, seed: int, slo_p99_ms: float,
+                   max_error_rate: float, keep_going: bool = False) -> List[Dict[str, Any]]:
+    """
+    Runs one step per rate. Stops after the first step that breaks the SLO
+    unless `keep_going`; a warm-up step at the first rate is run and discarded.
+    """
+    rng = np.random.default_rng(seed)
+    if warmup > 0:
+        await run_step(client, path, bodies, rates[0], warmup, poisson, rng)
+
+    steps = []
+    for rate in rates:
+        raw = await run_step(client, path, bodies, rate, duration, poisson, rng)
+        step = summarize_step(raw, rate, duration, slo_p99_ms, max_error_rate)
+        steps.append(step)
+        print(
+            f"  offered={rate:>7.1f}/s achieved={step['achieved_rps']:>7.1f}/s "
+            f"p50={_fmt(step['p50_ms'])} p99={_fmt(step['p99_ms'])} max={_fmt(step['max_ms'])} "
+            f"errors={step['error_rate']:>6.2%} lag_p99={_fmt(step['lag_p99_ms'])} "
+            f"{'✅' if step['slo_ok'] else '❌'}"
+        )
+        if not step["slo_ok"] and not keep_going:
+            break
+    return steps
+
+
+def sustainable_rps(steps: List[Dict[str, Any]]) -> Optional[float]:
+    """Highest offered rate whose step met the SLO and kept up with the offered load."""
+    passing = [s["offered_rps"] for s in steps if s["slo_ok"] and s["achieved_rps"] >= 0.95 * s["offered_rps"]]
+    return max(passing) if passing else None
+
+
+def _fmt(ms: Optional[float]) -> str:
+    return f"{ms:>8.1f}ms" if ms is not None else "       -  "
+
+
+# ============================================================
+# Targets
+# ============================================================
+def _client_limits(max_connections: int) -> httpx.Limits:
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+
+@contextlib.asynccontextmanager
+async def inproc_client(timeout: float, max_connections: int):
+    """AsyncClient wired straight into src.main.app (lifespan included), no sockets involved."""
+    from src.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout,
+                                     limits=_client_limits(max_connections)) as client:
+            yield client
+
+
+@contextlib.asynccontextmanager
+async def http_client(base_url: str, timeout: float, max_connections: int):
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                 limits=_client_limits(max_connections)) as client:
+        yield client
+
+
+@contextlib.contextmanager
+def local_server(port: int, workers: int, omp_threads: int, env: Dict[str, str]):
+    """Starts the container's command (gunicorn + uvicorn workers) on 127.0.0.1:`port`."""
+    server_env = dict(os.environ, **env, PORT=str(port), WEB_CONCURRENCY=str(workers),
+                      OMP_NUM_THREADS=str(omp_threads))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "src.main:app"],
+        cwd=PROJECT_BASE_PATH, env=server_env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        _wait_healthy(base_url)
+        yield base_url
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test of the prediction API with an SLO report.")
+    parser.add_argument("--target", choices=("inproc", "server"), default="server")
+    parser.add_argument("--url", default=None, help="Test an already running service instead of starting one.")
+    parser.add_argument("--endpoint", default="/predict", help="/predict or /predict/fast.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Worker counts (--target server).")
+    parser.add_argument("--omp-threads", type=int, nargs="+", default=[1], help="OMP_NUM_THREADS values to compare.")
+    parser.add_argument("--backend", default=None, help="PREDICTOR_BACKEND for the service.")
+    parser.add_argument("--model-dir", default=None, help="Artifacts to serve (default: synthetic model).")
+    parser.add_argument("--port", type=int, default=8766)
+
+    parser.add_argument("--rate", type=float, default=50.0, help="Offered requests/sec (first step when ramping).")
+    parser.add_argument("--ramp-to", type=float, default=None, help="Last step's rate; omit for a fixed rate.")
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step.")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Discarded seconds at the first rate.")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of a fixed interval.")
+    parser.add_argument("--keep-going", action="store_true", help="Keep ramping after the SLO breaks.")
+    parser.add_argument("--slo-p99-ms", type=float, default=100.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.001)
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--max-connections", type=int, default=256)
+
+    parser.add_argument("--payloads", type=int, default=2000, help="Distinct request bodies.")
+    parser.add_argument("--missing-rate", type=float, default=0.3)
+    parser.add_argument("--anomaly-rate", type=float, default=0.05, help="Share with DAYS_EMPLOYED=365243.")
+    parser.add_argument("--unseen-rate", type=float, default=0.05, help="Share with an unseen ORGANIZATION_TYPE.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write results as JSON.")
+    args = parser.parse_args()
+
+    if args.url is None and args.target == "inproc" and (len(args.workers) > 1 or len(args.omp_threads) > 1):
+        parser.error("--target inproc runs a single process; pass one --omp-threads value and no --workers list.")
+
+    bodies = make_bodies(args.payloads, seed=args.seed, missing_rate=args.missing_rate,
+                         anomaly_rate=args.anomaly_rate, unseen_category_rate=args.unseen_rate)
+    rates = rate_schedule(args.rate, args.ramp_to, args.steps)
+    slo = {"p99_ms": args.slo_p99_ms, "max_error_rate": args.max_error_rate}
+    ramp = dict(path=args.endpoint, bodies=bodies, rates=rates, duration=args.duration, warmup=args.warmup,
+                poisson=args.poisson, seed=args.seed, slo_p99_ms=args.slo_p99_ms,
+                max_error_rate=args.max_error_rate, keep_going=args.keep_going)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            configs = [{"target": args.url}]
+        else:
+            model_dir = args.model_dir
+            if model_dir is None:
+                model_dir = os.path.join(tmp, "models")
+                build_artifacts(model_dir)
+            env = {"MODEL_DIR": model_dir, **({"PREDICTOR_BACKEND": args.backend} if args.backend else {})}
+            if args.target == "inproc":
+                # Must be in place before src.main imports lightgbm
+                os.environ.update(env, OMP_NUM_THREADS=str(args.omp_threads[0]))
+                configs = [{"target": "inproc", "workers": 1, "omp_threads": args.omp_threads[0]}]
+            else:
+                configs = [{"target": "server", "workers": w, "omp_threads": t}
+                           for w in args.workers for t in args.omp_threads]
+
+        for config in configs:
+            print(f"[LOADTEST] {config} {args.endpoint} SLO p99<={args.slo_p99_ms:g}ms errors<={args.max_error_rate:.2%}")
+            if args.url:
+                steps = asyncio.run(_run_http(args.url, args, ramp))
+            elif config["target"] == "inproc":
+                steps = asyncio.run(_run_inproc(args, ramp))
+            else:
+                with local_server(args.port, config["workers"], config["omp_threads"], env) as base_url:
+                    steps = asyncio.run(_run_http(base_url, args, ramp))
+            result = {**config, "sustainable_rps": sustainable_rps(steps), "steps": steps}
+            results.append(result)
+            rate = result["sustainable_rps"]
+            print(f"[LOADTEST] sustainable rate: {f'{rate:.1f} req/s' if rate else 'no step met the SLO'}")
+
+    if len(results) > 1:
+        print("\nworkers  omp_threads  sustainable rps  best p99 at that rate")
+        for result in results:
+            best = next((s for s in result["steps"] if s["offered_rps"] == result["sustainable_rps"]), None)
+            print(f"{result['workers']:>7}  {result['omp_threads']:>11}  "
+                  f"{result['sustainable_rps'] or 0:>15.1f}  {_fmt(best['p99_ms'] if best else None)}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpu_count": os.cpu_count(), "endpoint": args.endpoint, "slo": slo,
+                       "rates": rates, "results": results}, f, indent=2)
+
+
+async def _run_inproc(args, ramp: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async with inproc_client(args.timeout, args.max_connections) as client:
+        return await run_ramp(client, **ramp)
+
+
+async def _run_http(base_url: str, args, ramp: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async with http_client(base_url, args.timeout, args.max_connections) as client:
+        return await run_ramp(client, **ramp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# FILE: benchmarks/run_benchmarks.py
+#
+# Benchmark suite for the inference hot path.
+#
+# Trains a small LightGBM model on synthetic LoanApplicationRawInput payloads
+# (benchmarks/synthetic.py), so it runs offline, then times:
+#   - preprocess.*   PredictionHandler.preprocess stage by stage (1 row)
+#   - feature_plan.* compiled fast path (1 row and batch)
+#   - predict.*      predict_proba single row, predict_proba_batch per batch size
+#   - api.*          /predict, /predict/fast and /predict/batch through TestClient
+#
+# Results go to JSON (with git commit and library versions) so runs can be
+# compared across commits:
+#
+#   python -m benchmarks.run_benchmarks --output bench_main.json
+#   python -m benchmarks.run_benchmarks --output bench_pr.json --compare bench_main.json --fail-on-regression 0.2
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.synthetic import PROJECT_BASE_PATH, build_artifacts, make_payloads
+from src.schemas import LoanApplicationRawInput
+
+BATCH_SIZES = (1, 64, 1024)
+
+
+# ============================================================
+# Timing
+# ============================================================
+def measure(fn: Callable[[], Any], rounds: int, min_time: float = 0.05, rows: int = 1) -> Dict[str, float]:
+    """
+    Times `fn` over `rounds` rounds. Each round runs enough calls to last at
+    least `min_time` seconds (calibrated once) and yields one per-call sample.
+
+    Returns:
+        dict: median/min/p95/stdev per call in microseconds, calls per round,
+            and rows/sec at the median for batch benchmarks.
+    """
+    fn()  # warm-up
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+
+    median = statistics.median(samples)
+    return {
+        "median_us": median,
+        "min_us": min(samples),
+        "p95_us": float(np.percentile(samples, 95)),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "calls_per_round": number,
+        "rows": rows,
+        "rows_per_sec": rows / median * 1e6,
+    }
+
+
+def _metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_BASE_PATH,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    versions = {}
+    for name in ("numpy", "pandas", "lightgbm", "sklearn", "category_encoders", "pydantic", "fastapi"):
+        try:
+            versions[name] = importlib.import_module(name).__version__
+        except ImportError:
+            versions[name] = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+# ============================================================
+# Benchmark groups
+# ============================================================
+def bench_preprocess(handler, record: Dict[str, Any], rounds: int) -> Dict[str, Dict]:
+    """Each stage of `_preprocess_frame`, fed the output of the previous stage."""
+    import pandas as pd
+
+    frame = pd.DataFrame([record])
+    cleaned = handler._clean_names(frame)
+    engineered = handler._feature_engineering(cleaned)
+    encoded = handler._apply_target_encoding(engineered)
+    recleaned = handler._clean_names(encoded)
+    aligned = recleaned.reindex(columns=handler.final_features, fill_value=np.nan)
+
+    def impute():
+        df = aligned.copy()
+        for col, mean_val in handler.imputation_map.items():
+            if col in df.columns:
+                df[col] = df[col].fillna(mean_val)
+        return df
+
+    imputed = impute()
+
+    return {
+        "preprocess.build_frame": measure(lambda: pd.DataFrame([record]), rounds),
+        "preprocess.clean_names": measure(lambda: handler._clean_names(frame), rounds),
+        "preprocess.feature_engineering": measure(lambda: handler._feature_engineering(cleaned), rounds),
+        "preprocess.target_encoding": measure(lambda: handler._apply_target_encoding(engineered), rounds),
+        "preprocess.clean_names_after_encoding": measure(lambda: handler._clean_names(encoded), rounds),
+        "preprocess.reindex": measure(
+            lambda: recleaned.reindex(columns=handler.final_features, fill_value=np.nan), rounds
+        ),
+        "preprocess.imputation": measure(impute, rounds),
+        "preprocess.astype_float64": measure(lambda: imputed.astype("float64"), rounds),
+        "preprocess.total": measure(lambda: handler.preprocess(record), rounds),
+    }
+
+
+def bench_feature_plan(handler, records: List[Dict[str, Any]], rounds: int) -> Dict[str, Dict]:
+    plan = handler.feature_plan
+    results = {"feature_plan.transform": measure(lambda: plan.transform(records[0]), rounds)}
+    for size in BATCH_SIZES[1:]:
+        batch = records[:size]
+        results[f"feature_plan.transform_batch.{size}"] = measure(
+            lambda: plan.transform_batch(batch), rounds, rows=size
+        )
+    return results
+
+
+def bench_predict(handler, records: List[Dict[str, Any]], rounds: int) -> Dict[str, Dict]:
+    results = {
+        "predict.predict_proba": measure(lambda: handler.predict_proba(records[0]), rounds),
+        "predict.model_only": measure(
+            lambda: handler.predictor.predict_proba(handler.feature_plan.transform(records[0]).reshape(1, -1)),
+            rounds
+        ),
+    }
+    for size in BATCH_SIZES:
+        batch = records[:size]
+        results[f"predict.predict_proba_batch.{size}"] = measure(
+            lambda: handler.predict_proba_batch(batch), rounds, rows=size
+        )
+    return results
+
+
+def bench_api(payloads: List[Dict[str, Any]], rounds: int) -> Dict[str, Dict]:
+    """End-to-end through FastAPI's TestClient (in-process, no network)."""
+    from fastapi.testclient import TestClient
+
+    import src.main as api
+
+    client = TestClient(api.app)
+    body = json.dumps(payloads[0])
+    batch = payloads[:64]
+
+    def post(path, **kwargs):
+        response = client.post(path, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+
+    with client:
+        return {
+            "api.predict": measure(lambda: post("/predict", json=payloads[0]), rounds),
+            "api.predict_fast": measure(
+                lambda: post("/predict/fast", content=body, headers={"content-type": "application/json"}), rounds
+            ),
+            "api.predict_batch.64": measure(lambda: post("/predict/batch", json=batch), rounds, rows=len(batch)),
+        }
+
+
+# ============================================================
+# Comparison
+# ============================================================
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Prints median deltas vs. a previous run; returns names slower than `threshold`."""
+    regressions = []
+    print(f"\n{'benchmark':<44} {'baseline':>11} {'current':>11} {'delta':>8}")
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median_us"], result["median_us"]
+        delta = after / before - 1.0
+        flag = ""
+        if delta > threshold:
+            regressions.append(name)
+            flag = "  <-- regression"
+        print(f"{name:<44} {before:>9.1f}us {after:>9.1f}us {delta:>+7.1%}{flag}")
+    return regressions
+
+
+# ============================================================
+# Main
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inference hot path and write results as JSON.")
+    parser.add_argument("--rounds", type=int, default=15, help="Samples per benchmark.")
+    parser.add_argument("--backend", default="sklearn", choices=["sklearn", "booster", "numpy"])
+    parser.add_argument("--only", nargs="+", choices=["preprocess", "feature_plan", "predict", "api"],
+                        default=["preprocess", "feature_plan", "predict", "api"])
+    parser.add_argument("--output", default=None, help="Write results as JSON.")
+    parser.add_argument("--compare", default=None, help="Previous JSON output to compare against.")
+    parser.add_argument("--fail-on-regression", type=float, default=None,
+                        help="Exit 1 if any median is slower than baseline by this fraction (e.g. 0.2).")
+    args = parser.parse_args()
+
+    # pandas fillna downcasting notices would otherwise flood the output (and the timings)
+    warnings.simplefilter("ignore", FutureWarning)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = os.path.join(tmp, "models")
+        paths = build_artifacts(model_dir)
+
+        # src.main loads its handler at import time from these settings
+        os.environ.update({
+            "MODEL_DIR": model_dir, "MODEL_BUNDLE_DIR": os.path.join(tmp, "no_bundle"),
+            "PREDICTOR_BACKEND": args.backend, "PREDICTION_CACHE_SIZE": "0", "MICROBATCH_ENABLED": "false",
+        })
+
+        from src.predict import PredictionHandler
+
+        handler = PredictionHandler(**paths, backend=args.backend)
+        payloads = make_payloads(max(BATCH_SIZES), seed=3)
+        records = [
+            {k: v for k, v in LoanApplicationRawInput.model_validate(p).model_dump().items() if k != "SK_ID_CURR"}
+            for p in payloads
+        ]
+
+        groups = {
+            "preprocess": lambda: bench_preprocess(handler, records[0], args.rounds),
+            "feature_plan": lambda: bench_feature_plan(handler, records, args.rounds),
+            "predict": lambda: bench_predict(handler, records, args.rounds),
+            "api": lambda: bench_api(payloads, args.rounds),
+        }
+
+        results = {}
+        for group in args.only:
+            group_results = groups[group]()
+            for name, result in group_results.items():
+                rate = f"  {result['rows_per_sec']:>12,.0f} rows/s" if result["rows"] > 1 else ""
+                print(f"{name:<44} {result['median_us']:>10.1f}us  (p95 {result['p95_us']:>9.1f}us){rate}")
+            results.update(group_results)
+
+    report = {"meta": {**_metadata(), "backend": args.backend, "rounds": args.rounds}, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)["results"]
+        threshold = args.fail_on_regression if args.fail_on_regression is not None else 0.1
+        regressions = compare(results, baseline, threshold)
+        if regressions and args.fail_on_regression is not None:
+            print(f"❌ {len(regressions)} benchmark(s) regressed by more than {threshold:.0%}.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# FILE: benchmarks/synthetic.py
+#
+# Offline stand-ins for the serving artifacts so benchmarks run without the
+# Kaggle data or the trained model: synthetic payloads generated from the
+# LoanApplicationRawInput schema, and a small LightGBM model + TargetEncoder
+# + imputation map trained on them, saved under the file names src/main.py loads.
+
+import datetime
+import json
+import os
+import random
+import typing
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.feature_plan import FeaturePlan
+from src.schemas import LoanApplicationRawInput
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FEATURES_PATH = os.path.join(PROJECT_BASE_PATH, "models", "FINAL_MODEL_FEATURES.json")
+
+# Realistic ranges for the fields the model actually uses
+_NUMERIC_RANGES = {
+    "EXT_SOURCE_1": (0.0, 1.0),
+    "EXT_SOURCE_2": (0.0, 1.0),
+    "EXT_SOURCE_3": (0.0, 1.0),
+    "DAYS_BIRTH": (-25000, -7500),
+    "DAYS_ID_PUBLISH": (-7000, 0),
+    "DAYS_REGISTRATION": (-24000.0, 0.0),
+    "DAYS_EMPLOYED": (-17000, 0),
+    "DAYS_LAST_PHONE_CHANGE": (-4300.0, 0.0),
+    "AMT_CREDIT": (45000.0, 4000000.0),
+    "AMT_ANNUITY": (1600.0, 250000.0),
+    "AMT_INCOME_TOTAL": (25000.0, 1000000.0),
+    "PAYMENT_RATE": (0.02, 0.12),
+    "ANNUITY_INCOME_RATIO": (0.0, 1.0),
+}
+
+_CATEGORIES = {
+    "ORGANIZATION_TYPE": [
+        "Business Entity Type 3", "XNA", "Self-employed", "Other", "Medicine",
+        "Government", "School", "Trade: type 7", "Kindergarten", "Construction",
+    ],
+    "NAME_CONTRACT_TYPE": ["Cash loans", "Revolving loans"],
+    "CODE_GENDER": ["F", "M"],
+    "FLAG_OWN_CAR": ["Y", "N"],
+    "FLAG_OWN_REALTY": ["Y", "N"],
+}
+
+DAYS_EMPLOYED_ANOMALY = 365243
+
+
+def _base_type(annotation):
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    return args[0] if args else annotation
+
+
+def make_payload(rng: random.Random, sk_id: int = 100000, missing_rate: float = 0.3,
+                 anomaly_rate: float = 0.0, unseen_category_rate: float = 0.0) -> Dict[str, Any]:
+    """
+    Builds one valid `LoanApplicationRawInput` JSON payload.
+
+    Args:
+        rng (random.Random): Source of randomness (seed it for reproducibility).
+        sk_id (int): Value for SK_ID_CURR.
+        missing_rate (float): Probability that each optional field is omitted.
+        anomaly_rate (float): Probability of the DAYS_EMPLOYED=365243 sentinel.
+        unseen_category_rate (float): Probability of an ORGANIZATION_TYPE never seen in training.
+    """
+    payload = {}
+    for name, field in LoanApplicationRawInput.model_fields.items():
+        if not field.is_required() and rng.random() < missing_rate:
+            continue
+
+        kind = _base_type(field.annotation)
+        if name in _CATEGORIES:
+            value = rng.choice(_CATEGORIES[name])
+        elif kind is str:
+            value = rng.choice(["A", "B", "C", "Missing"])
+        elif kind is datetime.date:
+            value = (datetime.date(2014, 1, 1) + datetime.timedelta(days=rng.randint(0, 4000))).isoformat()
+        elif name in _NUMERIC_RANGES:
+            low, high = _NUMERIC_RANGES[name]
+            value = rng.randint(low, high) if kind is int else rng.uniform(low, high)
+        elif kind is int:
+            value = rng.randint(0, 1)
+        else:
+            value = rng.random()
+        payload[name] = value
+
+    payload["SK_ID_CURR"] = sk_id
+    if rng.random() < anomaly_rate:
+        payload["DAYS_EMPLOYED"] = DAYS_EMPLOYED_ANOMALY
+    if rng.random() < unseen_category_rate:
+        payload["ORGANIZATION_TYPE"] = f"Unseen Org {rng.randint(0, 999)}"
+    return payload
+
+
+def make_payloads(n: int, seed: int = 0, **kwargs) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [make_payload(rng, sk_id=100000 + i, **kwargs) for i in range(n)]
+
+
+def build_artifacts(out_dir: str, n_rows: int = 5000, seed: int = 0,
+                    n_estimators: int = 100) -> Dict[str, str]:
+    """
+    Trains a small model on synthetic payloads and writes the serving artifacts
+    with the file names used by `src/main.py` (point MODEL_DIR at `out_dir`).
+
+    Returns:
+        dict: Artifact paths keyed by PredictionHandler argument name.
+    """
+    import category_encoders as ce
+    import joblib
+    import lightgbm as lgb
+    import pandas as pd
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(FEATURES_PATH, "r") as f:
+        final_features = json.load(f)
+
+    payloads = make_payloads(n_rows, seed=seed, missing_rate=0.1)
+    records = [
+        {k: v for k, v in LoanApplicationRawInput.model_validate(p).model_dump().items() if k != "SK_ID_CURR"}
+        for p in payloads
+    ]
+    df = pd.DataFrame.from_records(records)
+
+    rng = np.random.default_rng(seed)
+    logit = -2.5 + 3.0 * (0.5 - df["EXT_SOURCE_2"]) + 2.0 * (0.5 - df["EXT_SOURCE_3"])
+    y = (rng.random(n_rows) < 1.0 / (1.0 + np.exp(-logit))).astype(int)
+
+    # Target encoder over every string field, as in Notebook 03
+    cat_cols = [
+        name for name, field in LoanApplicationRawInput.model_fields.items()
+        if _base_type(field.annotation) is str
+    ]
+    encoder = ce.TargetEncoder(cols=cat_cols, smoothing=0.3)
+    encoder.fit(df[cat_cols].fillna("Missing"), y)
+
+    # Imputation means over numeric inputs and engineered ratios
+    date_cols = [
+        name for name, field in LoanApplicationRawInput.model_fields.items()
+        if _base_type(field.annotation) is datetime.date
+    ]
+    numeric = df.drop(columns=cat_cols + date_cols, errors="ignore").astype("float64")
+    numeric["CREDIT_INCOME_RATIO"] = numeric["AMT_CREDIT"] / numeric["AMT_INCOME_TOTAL"]
+    numeric["ANNUITY_INCOME_RATIO"] = numeric["AMT_ANNUITY"] / numeric["AMT_INCOME_TOTAL"]
+    numeric["PAYMENT_RATE"] = numeric["AMT_ANNUITY"] / numeric["AMT_CREDIT"]
+    imputation_map = {col: float(val) for col, val in numeric.mean().items() if not np.isnan(val)}
+
+    plan = FeaturePlan(final_features, imputation_map, FeaturePlan.lookups_from_encoder(encoder))
+    X = pd.DataFrame(plan.transform_batch(records), columns=final_features)
+
+    model = lgb.LGBMClassifier(
+        n_estimators=n_estimators, num_leaves=31, learning_rate=0.05,
+        random_state=seed, verbose=-1
+    )
+    model.fit(X, y)
+
+    paths = {
+        "model_path": os.path.join(out_dir, "final_lgbm_model.pkl"),
+        "imputation_path": os.path.join(out_dir, "final_imputation_map.json"),
+        "encoder_path": os.path.join(out_dir, "final_target_encoder.pkl"),
+        "features_path": os.path.join(out_dir, "FINAL_MODEL_FEATURES.json"),
+    }
+    joblib.dump(model, paths["model_path"])
+    joblib.dump(encoder, paths["encoder_path"])
+    with open(paths["imputation_path"], "w") as f:
+        json.dump(imputation_map, f)
+    with open(paths["features_path"], "w") as f:
+        json.dump(final_features, f, indent=4)
+
+    return paths
@@ -0,0 +1,33 @@
+# FILE: gunicorn_conf.py
+#
+# Multi-process serving: gunicorn master + uvicorn workers.
+#   gunicorn -c gunicorn_conf.py src.main:app
+#
+# With preload_app the master imports src.main (and therefore loads the model,
+# target encoder, imputation map and feature list) ONCE, then forks the workers.
+# Workers share those pages copy-on-write instead of each one re-running
+# joblib.load, so RSS grows far less than linearly with the worker count.
+
+import gc
+import os
+
+# One OpenMP thread per worker: N workers on N cores instead of N x cores
+# threads fighting each other. It must be set before LightGBM is imported,
+# which also keeps libgomp from starting a thread pool in the master before
+# fork (libgomp is not fork-safe once its pool exists).
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far into the permanent GC generation: the
+    # collector in the workers then never writes to (and un-shares) the pages
+    # holding the preloaded artifacts.
+    gc.freeze()
@@ -0,0 +1,171 @@
+# FILE: src/batching.py
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-record requests into vectorized model calls.
+
+    Callers `await submit(record)`; a background task collects queued records
+    until `max_batch_size` is reached or `max_wait_ms` has elapsed since the
+    first record of the batch arrived, scores them with one `predict_batch`
+    call in a worker thread, and resolves each caller's future.
+
+    Only one batch is scored at a time, so concurrent traffic turns into
+    fewer, larger LightGBM calls instead of many small ones competing for
+    the GIL and OpenMP threads. Records arriving during a flush simply make
+    the next batch larger.
+    """
+
+    # Upper bounds of the batch-size histogram buckets
+    BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+    def __init__(self, predict_batch: Callable[[List[Dict[str, Any]]], Sequence[float]],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        """
+        Args:
+            predict_batch (callable): Scores a list of raw records, e.g.
+                `PredictionHandler.predict_proba_batch`.
+            max_batch_size (int): Flush as soon as this many records are queued.
+            max_wait_ms (float): Maximum time the first record of a batch waits.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1.")
+
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.requests_total = 0
+        self.batches_total = 0
+        self.records_scored_total = 0
+        self.errors_total = 0
+        self.max_queue_depth = 0
+        self.last_flush_ms = 0.0
+        self._batch_size_counts = [0] * (len(self.BATCH_SIZE_BUCKETS) + 1)
+
+    # ============================================================
+    # Lifecycle
+    # ============================================================
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the worker after flushing everything already queued."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    # ============================================================
+    # Public API
+    # ============================================================
+    async def submit(self, record: Dict[str, Any]) -> float:
+        """Queues one record and waits for its probability of default."""
+        if self._task is None:
+            raise RuntimeError("MicroBatcher is not running; call start() first.")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((record, future))
+        self.requests_total += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        labels = [f"le_{b}" for b in self.BATCH_SIZE_BUCKETS] + ["le_inf"]
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "requests_total": self.requests_total,
+            "batches_total": self.batches_total,
+            "errors_total": self.errors_total,
+            "mean_batch_size": (
+                self.records_scored_total / self.batches_total if self.batches_total else 0.0
+            ),
+            "last_flush_ms": self.last_flush_ms,
+            "batch_size_histogram": dict(zip(labels, self._batch_size_counts)),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ============================================================
+    # Worker
+    # ============================================================
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _score(self, records: List[Dict[str, Any]]) -> List[Any]:
+        """Scores a batch; on failure, isolates the bad records one by one."""
+        try:
+            return list(self.predict_batch(records))
+        except Exception:
+            results = []
+            for record in records:
+                try:
+                    results.append(self.predict_batch([record])[0])
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    def _record_batch_size(self, size: int):
+        for i, bound in enumerate(self.BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self._batch_size_counts[i] += 1
+                return
+        self._batch_size_counts[-1] += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            records = [record for record, _ in batch]
+
+            start = time.perf_counter()
+            results = await loop.run_in_executor(None, self._score, records)
+            self.last_flush_ms = (time.perf_counter() - start) * 1000.0
+
+            self.batches_total += 1
+            self.records_scored_total += len(batch)
+            self._record_batch_size(len(batch))
+
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    self.errors_total += 1
+                    if not future.done():
+                        future.set_exception(result)
+                elif not future.done():
+                    future.set_result(float(result))
+                self._queue.task_done()
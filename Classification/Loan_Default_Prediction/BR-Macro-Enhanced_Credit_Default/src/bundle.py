@@ -0,0 +1,275 @@
+# FILE: src/bundle.py
+#
+# Versioned serving bundle: one directory that replaces the model pickle,
+# target encoder pickle, imputation map and feature JSON.
+#
+#   <bundle>/
+#   ├── manifest.json        # version, library versions, sha256 of every file
+#   ├── model.txt            # LightGBM text model (Booster.save_model)
+#   ├── trees/*.npy          # flattened trees for the "numpy" backend (mmap-able)
+#   ├── encoder_lookup.json  # category -> target-encoded value, per column
+#   ├── imputation.json      # column -> mean
+#   ├── features.json        # final feature order
+#   ├── macro_table.json     # month -> macro features (optional, src.macro_table)
+#   └── drift_reference.json # training-time feature/score buckets (optional, src.drift)
+#
+# Export from the legacy artifacts:
+#   python -m src.bundle export --model-dir models --out models/bundle --version 2024-06-01
+# Verify checksums:
+#   python -m src.bundle verify models/bundle
+#
+# Loading a bundle needs neither pickle nor category_encoders, and with the
+# "numpy" backend not even lightgbm (which itself imports pandas and sklearn).
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.drift import DRIFT_REFERENCE_FILE, DriftReference
+from src.macro_table import MACRO_TABLE_FILE, MacroTable
+from src.predictors import NumpyTreePredictor
+
+BUNDLE_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+MODEL_FILE = "model.txt"
+TREES_DIR = "trees"
+ENCODER_FILE = "encoder_lookup.json"
+IMPUTATION_FILE = "imputation.json"
+FEATURES_FILE = "features.json"
+
+
+class BundleIntegrityError(Exception):
+    """Raised when a bundle file is missing or does not match its manifest checksum."""
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: str, obj: Any):
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2, sort_keys=isinstance(obj, dict))
+
+
+def _read_json(path: str) -> Any:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class ArtifactBundle:
+    """
+    Loaded contents of a serving bundle.
+
+    Attributes:
+        directory (str): Bundle location.
+        manifest (dict): Parsed manifest.json.
+        version (str): Human-readable model version.
+        fingerprint (str): Hash over all file checksums; changes with any artifact.
+        final_features (list[str]): Model feature order.
+        imputation_map (dict): Column -> mean.
+        encoder_lookups (dict): Column -> {"mapping", "unknown", "missing"}.
+        macro_table (MacroTable or None): Month-indexed macro features, if exported.
+        drift_reference (DriftReference or None): Training distribution for drift monitoring, if exported.
+    """
+
+    def __init__(self, directory: str, verify: bool = True):
+        self.directory = directory
+        self.manifest = _read_json(os.path.join(directory, MANIFEST_FILE))
+
+        if self.manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise BundleIntegrityError(
+                f"Unsupported bundle format {self.manifest.get('format_version')!r} "
+                f"(expected {BUNDLE_FORMAT_VERSION})."
+            )
+        if verify:
+            self.verify()
+
+        self.version = self.manifest["version"]
+        self.fingerprint = self.manifest["fingerprint"]
+        self.final_features = _read_json(os.path.join(directory, FEATURES_FILE))
+        self.imputation_map = _read_json(os.path.join(directory, IMPUTATION_FILE))
+        self.encoder_lookups = _read_json(os.path.join(directory, ENCODER_FILE))
+        self.macro_table = None
+        if MACRO_TABLE_FILE in self.manifest["files"]:
+            self.macro_table = MacroTable.load(os.path.join(directory, MACRO_TABLE_FILE))
+        self.drift_reference = None
+        if DRIFT_REFERENCE_FILE in self.manifest["files"]:
+            self.drift_reference = DriftReference.load(os.path.join(directory, DRIFT_REFERENCE_FILE))
+
+    def verify(self):
+        """Checks every file listed in the manifest against its sha256."""
+        for relative_path, expected in self.manifest["files"].items():
+            path = os.path.join(self.directory, relative_path)
+            if not os.path.exists(path):
+                raise BundleIntegrityError(f"Missing bundle file: {relative_path}")
+            if file_sha256(path) != expected:
+                raise BundleIntegrityError(f"Checksum mismatch: {relative_path}")
+
+    def load_booster(self):
+        """LightGBM Booster for the 'booster' backend (imports lightgbm)."""
+        import lightgbm as lgb
+        return lgb.Booster(model_file=os.path.join(self.directory, MODEL_FILE))
+
+    def load_tree_predictor(self, mmap_mode: Optional[str] = "r") -> NumpyTreePredictor:
+        """Pure-NumPy predictor for the 'numpy' backend (no lightgbm import)."""
+        return NumpyTreePredictor.load(os.path.join(self.directory, TREES_DIR), mmap_mode=mmap_mode)
+
+
+def load_bundle(directory: str, verify: bool = True) -> ArtifactBundle:
+    return ArtifactBundle(directory, verify=verify)
+
+
+def is_bundle(directory: Optional[str]) -> bool:
+    return bool(directory) and os.path.exists(os.path.join(directory, MANIFEST_FILE))
+
+
+def export_bundle(model, target_encoder, imputation_map: Dict[str, float],
+                  final_features: List[str], out_dir: str,
+                  version: Optional[str] = None, macro_table: Optional[MacroTable] = None,
+                  encoder_lookups: Optional[Dict[str, Dict[str, Any]]] = None,
+                  drift_reference: Optional[DriftReference] = None) -> Dict[str, Any]:
+    """
+    Writes a serving bundle from fitted training artifacts.
+
+    Before anything is written, the flattened trees are checked against the
+    original model on probe inputs covering every split, so a bundle that loads
+    also scores like the model it came from.
+
+    Args:
+        model: Fitted `LGBMClassifier` or `lightgbm.Booster`.
+        target_encoder: Fitted `category_encoders.TargetEncoder` (None when `encoder_lookups` is given).
+        imputation_map (dict): Column -> mean.
+        final_features (list[str]): Model feature order.
+        out_dir (str): Destination directory (created if needed).
+        version (str, optional): Model version label; defaults to a UTC timestamp.
+        macro_table (MacroTable, optional): Month-indexed macro features to ship with the model.
+        encoder_lookups (dict, optional): Already-flattened encoder, e.g. `OOFTargetEncoder.lookups()`
+            from `src.features`.
+        drift_reference (DriftReference, optional): Training-time distributions for `src.drift`.
+
+    Returns:
+        dict: The written manifest.
+    """
+    import lightgbm as lgb
+
+    from src.feature_plan import FeaturePlan
+    from src.predictors import BoosterPredictor, create_predictor, probe_matrix, verify_parity
+
+    booster = model.booster_ if hasattr(model, "booster_") else model
+    tree_predictor = NumpyTreePredictor.from_booster(booster)
+    verify_parity(create_predictor(model, "booster"), tree_predictor, probe_matrix(model))
+
+    lookups = encoder_lookups if encoder_lookups is not None else FeaturePlan.lookups_from_encoder(target_encoder)
+    for col, lookup in lookups.items():
+        if not all(isinstance(category, str) for category in lookup["mapping"]):
+            raise ValueError(f"Encoder column {col!r} has non-string categories; cannot store as JSON.")
+
+    os.makedirs(out_dir, exist_ok=True)
+    booster.save_model(os.path.join(out_dir, MODEL_FILE))
+    tree_predictor.save(os.path.join(out_dir, TREES_DIR))
+    _write_json(os.path.join(out_dir, ENCODER_FILE), lookups)
+    _write_json(os.path.join(out_dir, IMPUTATION_FILE), {k: float(v) for k, v in imputation_map.items()})
+    _write_json(os.path.join(out_dir, FEATURES_FILE), list(final_features))
+
+    files = [MODEL_FILE, ENCODER_FILE, IMPUTATION_FILE, FEATURES_FILE] + [
+        f"{TREES_DIR}/{name}.npy" for name in NumpyTreePredictor.ARRAY_NAMES
+    ]
+    if macro_table is not None:
+        macro_table.save(os.path.join(out_dir, MACRO_TABLE_FILE))
+        files.append(MACRO_TABLE_FILE)
+    if drift_reference is not None:
+        drift_reference.save(os.path.join(out_dir, DRIFT_REFERENCE_FILE))
+        files.append(DRIFT_REFERENCE_FILE)
+    checksums = {f: file_sha256(os.path.join(out_dir, f)) for f in files}
+    created_at = datetime.now(timezone.utc)
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "version": version or created_at.strftime("%Y%m%dT%H%M%SZ"),
+        "created_at": created_at.isoformat(),
+        "lightgbm_version": lgb.__version__,
+        "numpy_version": np.__version__,
+        "n_features": len(final_features),
+        "files": checksums,
+        "fingerprint": hashlib.sha256(json.dumps(checksums, sort_keys=True).encode()).hexdigest(),
+    }
+    _write_json(os.path.join(out_dir, MANIFEST_FILE), manifest)
+
+    # Round trip: the bundle as loaded must score like the source model
+    bundle = load_bundle(out_dir)
+    verify_parity(
+        create_predictor(model, "booster"), BoosterPredictor(bundle.load_booster()), probe_matrix(model)
+    )
+    verify_parity(create_predictor(model, "booster"), bundle.load_tree_predictor(), probe_matrix(model))
+
+    return manifest
+
+
+# ============================================================
+# CLI
+# ============================================================
+def _existing(path: str) -> Optional[str]:
+    return path if os.path.exists(path) else None
+
+
+def _export_command(args):
+    from src.predict import PredictionHandler
+
+    handler = PredictionHandler(
+        model_path=args.model or os.path.join(args.model_dir, "final_lgbm_model.pkl"),
+        imputation_path=args.imputation or os.path.join(args.model_dir, "final_imputation_map.json"),
+        encoder_path=args.encoder or os.path.join(args.model_dir, "final_target_encoder.pkl"),
+        features_path=args.features or os.path.join(args.model_dir, "FINAL_MODEL_FEATURES.json"),
+        macro_table_path=args.macro_table or _existing(os.path.join(args.model_dir, MACRO_TABLE_FILE)),
+        drift_reference_path=args.drift_reference or _existing(os.path.join(args.model_dir, DRIFT_REFERENCE_FILE)),
+    )
+    manifest = export_bundle(
+        handler.model, handler.target_encoder, handler.imputation_map,
+        handler.final_features, args.out, version=args.version, macro_table=handler.macro_table,
+        drift_reference=handler.drift_reference
+    )
+    print(f"✅ Bundle {manifest['version']} written to {args.out} (fingerprint {manifest['fingerprint'][:12]}).")
+
+
+def _verify_command(args):
+    bundle = load_bundle(args.bundle_dir, verify=True)
+    print(f"✅ Bundle {bundle.version} OK ({len(bundle.manifest['files'])} files verified).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or verify a serving bundle.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Convert legacy pickle/JSON artifacts into a bundle.")
+    export.add_argument("--model-dir", default="models", help="Directory with the legacy artifacts.")
+    export.add_argument("--model", help="Model pickle (default: <model-dir>/final_lgbm_model.pkl).")
+    export.add_argument("--imputation", help="Imputation map (.json or .pkl).")
+    export.add_argument("--encoder", help="Target encoder pickle.")
+    export.add_argument("--features", help="Final feature list JSON.")
+    export.add_argument("--macro-table", help="Macro lookup table (default: <model-dir>/macro_table.json if present).")
+    export.add_argument("--drift-reference",
+                        help="Drift reference from python -m src.drift (default: <model-dir>/drift_reference.json if present).")
+    export.add_argument("--out", required=True, help="Bundle output directory.")
+    export.add_argument("--version", default=None, help="Model version label.")
+    export.set_defaults(func=_export_command)
+
+    verify = commands.add_parser("verify", help="Check bundle checksums.")
+    verify.add_argument("bundle_dir")
+    verify.set_defaults(func=_verify_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
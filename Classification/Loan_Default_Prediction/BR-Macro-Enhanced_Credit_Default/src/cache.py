@@ -0,0 +1,103 @@
+# FILE: src/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Thread-safe, bounded LRU cache of probabilities with a TTL.
+
+    Keys are the bytes of the final aligned + imputed float64 feature vector,
+    so payloads that differ only in fields the model ignores share an entry.
+    Other per-vector results (e.g. the /explain contributions) live in the same
+    cache under a key namespace, sharing its size budget and invalidation.
+    Entries belong to one model fingerprint: binding the cache to a different
+    fingerprint (a new model or bundle) clears it.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300.0):
+        """
+        Args:
+            max_size (int): Maximum number of entries; least recently used go first.
+            ttl_seconds (float): Entry lifetime; <= 0 disables expiry.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1.")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.fingerprint: Optional[str] = None
+
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(features: np.ndarray, namespace: bytes = b"") -> bytes:
+        return namespace + np.ascontiguousarray(features, dtype=np.float64).tobytes()
+
+    def bind(self, fingerprint: str):
+        """Attaches the cache to a model; a different fingerprint drops all entries."""
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.fingerprint = fingerprint
+
+    def get(self, key: bytes) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: Any):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_fingerprint": self.fingerprint,
+            }
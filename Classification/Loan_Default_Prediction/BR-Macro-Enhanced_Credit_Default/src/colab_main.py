@@ -1,6 +1,9 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import os
 
+from src.batching import MicroBatcher
 from src.predict import PredictionHandler
 from src.schemas import LoanApplicationRawInput, PredictionResponse
 
@@ -19,6 +22,11 @@ MODEL_PATH = os.path.join(MODEL_DIR, "final_lgbm_optimized_model.pkl")
 MEANS_MAP_PATH = os.path.join(MODEL_DIR, "imputation_means_map.pkl")
 ENCODER_PATH = os.path.join(MODEL_DIR, "final_target_encoder.pkl")
 
+# Micro-batching: coalesce concurrent /predict calls into one model call
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+
 # =====================================================
 # MODEL INITIALIZATION (LOAD ONCE)
 # =====================================================
@@ -36,6 +44,24 @@ except Exception as e:
     # Keep the API up, but mark the service as unavailable via /health
     print(f"❌ CRITICAL ERROR while loading artifacts: {e}")
 
+micro_batcher = None
+if prediction_handler and MICROBATCH_ENABLED:
+    micro_batcher = MicroBatcher(
+        prediction_handler.predict_proba_batch,
+        max_batch_size=MICROBATCH_MAX_SIZE,
+        max_wait_ms=MICROBATCH_MAX_WAIT_MS
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start/stop the micro-batcher worker with the event loop
+    if micro_batcher:
+        await micro_batcher.start()
+    yield
+    if micro_batcher:
+        await micro_batcher.stop()
+
 # =====================================================
 # FASTAPI APP
 # =====================================================
@@ -43,7 +69,8 @@ except Exception as e:
 app = FastAPI(
     title="Home Credit Default Risk API",
     description="Predicts the probability of loan default using LightGBM.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # =====================================================
@@ -64,8 +91,18 @@ def health_check():
     )
 
 
+@app.get("/batcher/stats")
+def batcher_stats():
+    """
+    Queue depth, batch-size distribution and flush latency of the micro-batcher.
+    """
+    if not micro_batcher:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+
 @app.post("/predict", response_model=PredictionResponse)
-def predict_loan_default(payload: LoanApplicationRawInput):
+async def predict_loan_default(payload: LoanApplicationRawInput):
     """
     Receives raw customer data and returns the probability of default.
     """
@@ -82,8 +119,11 @@ def predict_loan_default(payload: LoanApplicationRawInput):
     sk_id = data.pop("SK_ID_CURR")
 
     try:
-        # Run preprocessing + model inference
-        probability = prediction_handler.predict_proba(data)
+        # Run preprocessing + model inference (coalesced when micro-batching)
+        if micro_batcher:
+            probability = await micro_batcher.submit(data)
+        else:
+            probability = await run_in_threadpool(prediction_handler.predict_proba, data)
     except Exception as e:
         # Log the root cause server-side, return a safe API error to the client
         print(f"❌ Prediction error for SK_ID_CURR={sk_id}: {e}")
@@ -33,9 +33,28 @@ class Paths:
         self.TEST_RAW_FILE = os.path.join(self.DATA_RAW_DIR, 'application_test.csv')
         self.MACRO_RAW_FILE = os.path.join(self.DATA_RAW_DIR, 'brasil_macro_data.csv') # Assuming you save the BCB data here
 
+        # Incremental BCB store (src.macro): raw series + monthly macro features
+        self.MACRO_STORE_DIR = os.path.join(self.DATA_DIR, 'macro')
+        self.MACRO_FEATURES_FILE = os.path.join(self.MACRO_STORE_DIR, 'macro_features.parquet')
+
         # Processed Data (Output of Block 9)
         self.TRAIN_PROCESSED_FILE = os.path.join(self.DATA_PROCESSED_DIR, 'train_enriched.csv')
         self.TEST_PROCESSED_FILE = os.path.join(self.DATA_PROCESSED_DIR, 'test_enriched.csv')
+        self.PROCESSED_STORE_DIR = os.path.join(self.DATA_PROCESSED_DIR, 'store') # Typed, partitioned Parquet copies (src.datastore)
+
+        # Model Artifacts (served by src.main, used by src.score)
+        self.FINAL_MODEL_FILE = os.path.join(self.MODEL_DIR, 'final_lgbm_model.pkl')
+        self.IMPUTATION_MAP_FILE = os.path.join(self.MODEL_DIR, 'final_imputation_map.json')
+        self.TARGET_ENCODER_FILE = os.path.join(self.MODEL_DIR, 'final_target_encoder.pkl')
+        self.FINAL_FEATURES_FILE = os.path.join(self.MODEL_DIR, 'FINAL_MODEL_FEATURES.json')
+        self.MODEL_BUNDLE_DIR = os.path.join(self.MODEL_DIR, 'bundle')
+        self.MACRO_TABLE_FILE = os.path.join(self.MODEL_DIR, 'macro_table.json') # Month -> macro features (src.macro)
+
+        # Cached training pipeline stages (src.train)
+        self.PIPELINE_DIR = os.path.join(self.DATA_DIR, 'pipeline')
+
+        # Scored Data (Output of src.score)
+        self.TEST_SCORES_FILE = os.path.join(self.SUBMISSION_DIR, 'test_scores.parquet')
 
 
     def create_dirs(self):
@@ -0,0 +1,551 @@
+# FILE: src/drift.py
+#
+# Online input-drift monitoring: live model inputs vs. the training distribution.
+#
+# At training time each model feature and the predicted probability are binned
+# into quantile buckets plus one "missing" bucket (NaN or the imputation mean,
+# i.e. what the model actually sees for a missing field). The bucket edges and
+# counts are written as drift_reference.json and shipped in the bundle.
+#
+# In serving, PredictionHandler hands every scored vector to a DriftMonitor:
+#   - hot path: the row is copied into a preallocated ring buffer, no binning
+#   - background: the ring is drained every `flush_interval_s` and all rows are
+#     binned at once (searchsorted + bincount) into per-bucket counters, kept
+#     for a sliding window (rotating time slices) and since start
+# Memory is fixed per feature (ring capacity + slices x buckets), whatever the
+# traffic. GET /drift compares the live counts with the reference: PSI, binned
+# KS, missing share and approximate quantiles in the same bucket layout.
+#
+# The bundle written by `python -m src.train` includes the reference. For the
+# legacy artifacts in models/, export one from training rows *before* imputation
+# (imputed gaps would hide the training missing rate). A TIME_INDEX column is
+# used as the application month when the model reads macro features:
+#   python -m src.drift --data data/raw/application_train.csv
+#   python -m src.drift --data data/raw/application_train.csv --model-dir models --buckets 20 --sample 0
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DRIFT_REFERENCE_FILE = "drift_reference.json"
+REFERENCE_FORMAT_VERSION = 1
+
+# Monitored next to the model features
+SCORE_COLUMN = "probability_of_default"
+
+DEFAULT_BUCKETS = 10
+
+# Usual PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 significant shift
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+
+# Floor for empty buckets in PSI (log of zero)
+PSI_EPSILON = 1e-4
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+# Month column of the processed tables, used when rows carry no APPLICATION_DATE
+TIME_INDEX = "TIME_INDEX"
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ============================================================
+# Bucketing
+# ============================================================
+def quantile_edges(values: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Inner bucket edges at the quantiles of the finite values; duplicate edges
+    (point masses, e.g. flags) are merged, so a column may get fewer buckets.
+    """
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0 or n_buckets < 2:
+        return np.empty(0, dtype=np.float64)
+    return np.unique(np.quantile(finite, np.linspace(0.0, 1.0, n_buckets + 1)[1:-1]))
+
+
+def bucket_indices(values: np.ndarray, edges: np.ndarray, missing_value: float = np.nan) -> np.ndarray:
+    """
+    Bucket of each value: 0 = missing (NaN or `missing_value`), then
+    1..len(edges)+1 for (-inf, e0], (e0, e1], ..., (e_last, inf).
+    """
+    missing = np.isnan(values) | (values == missing_value)
+    indices = np.searchsorted(edges, values, side="left") + 1
+    indices[missing] = 0
+    return indices
+
+
+def compare_counts(live: np.ndarray, reference: np.ndarray) -> Dict[str, Optional[float]]:
+    """
+    PSI over all buckets (missing included) and the binned Kolmogorov-Smirnov
+    distance over the value buckets (missing excluded), for two count vectors
+    in the same bucket layout.
+    """
+    n_live, n_reference = live.sum(), reference.sum()
+    if n_live == 0 or n_reference == 0:
+        return {"psi": None, "ks": None}
+
+    p = np.maximum(live / n_live, PSI_EPSILON)
+    q = np.maximum(reference / n_reference, PSI_EPSILON)
+    psi = float(np.sum((p - q) * np.log(p / q)))
+
+    ks = None
+    live_values, reference_values = live[1:], reference[1:]
+    if live_values.sum() > 0 and reference_values.sum() > 0:
+        ks = float(np.max(np.abs(
+            np.cumsum(live_values) / live_values.sum() - np.cumsum(reference_values) / reference_values.sum()
+        )))
+    return {"psi": psi, "ks": ks}
+
+
+def approximate_quantiles(counts: np.ndarray, edges: np.ndarray,
+                          quantiles: Sequence[float] = QUANTILES) -> Dict[str, Optional[float]]:
+    """
+    Quantiles of the non-missing values, interpolated linearly inside the
+    bucket that contains them. The open outer buckets report their inner edge.
+    """
+    values = counts[1:]
+    total = values.sum()
+    result = {}
+    for q in quantiles:
+        label = f"p{int(round(q * 100)):02d}"
+        if total == 0 or len(edges) == 0:
+            result[label] = None
+            continue
+        cumulative = np.cumsum(values)
+        b = int(np.searchsorted(cumulative, q * total, side="left"))
+        if b == 0:
+            result[label] = float(edges[0])
+        elif b >= len(edges):
+            result[label] = float(edges[-1])
+        else:
+            below = cumulative[b - 1]
+            share = (q * total - below) / values[b] if values[b] else 0.0
+            result[label] = float(edges[b - 1] + share * (edges[b] - edges[b - 1]))
+    return result
+
+
+# ============================================================
+# Reference distribution (exported at training time)
+# ============================================================
+class DriftReference:
+    """
+    Training-time bucket layout and counts for each monitored column.
+
+    Attributes:
+        names (list[str]): Model features in model order, then SCORE_COLUMN.
+        edges (list[np.ndarray]): Inner bucket edges per column.
+        missing_values (np.ndarray): Value counted as missing per column (NaN = only NaN).
+        counts (list[np.ndarray]): Reference count per bucket (missing bucket first).
+        n_rows (int): Rows the reference was built from.
+    """
+
+    def __init__(self, columns: List[Dict[str, Any]], n_rows: int, created_at: Optional[str] = None):
+        self.names = [c["name"] for c in columns]
+        self.edges = [np.asarray(c["edges"], dtype=np.float64) for c in columns]
+        self.missing_values = np.array(
+            [np.nan if c.get("missing_value") is None else c["missing_value"] for c in columns], dtype=np.float64
+        )
+        self.counts = [np.asarray(c["counts"], dtype=np.int64) for c in columns]
+        self.n_rows = n_rows
+        self.created_at = created_at
+
+        for name, edges, counts in zip(self.names, self.edges, self.counts):
+            if len(counts) != len(edges) + 2:
+                raise ValueError(f"Drift reference column {name!r}: {len(counts)} counts for {len(edges)} edges.")
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.names[:-1]
+
+    @classmethod
+    def build(cls, features: np.ndarray, feature_names: List[str], probabilities: np.ndarray,
+              missing_values: Optional[Dict[str, float]] = None, n_buckets: int = DEFAULT_BUCKETS) -> "DriftReference":
+        """
+        Bins a training matrix and its scores.
+
+        Args:
+            features (np.ndarray): (n, k) model inputs exactly as served, i.e. after imputation.
+            feature_names (list[str]): Model feature order.
+            probabilities (np.ndarray): Model scores for the same rows.
+            missing_values (dict, optional): Feature -> imputation value (counted as missing).
+            n_buckets (int): Quantile buckets per column (before merging duplicate edges).
+        """
+        features = np.asarray(features, dtype=np.float64)
+        missing_values = missing_values or {}
+        matrix = np.column_stack([features, np.asarray(probabilities, dtype=np.float64)])
+
+        columns = []
+        for j, name in enumerate(list(feature_names) + [SCORE_COLUMN]):
+            values = matrix[:, j]
+            missing_value = float(missing_values.get(name, np.nan))
+            edges = quantile_edges(values[~(np.isnan(values) | (values == missing_value))], n_buckets)
+            indices = bucket_indices(values, edges, missing_value)
+            columns.append({
+                "name": name,
+                "edges": edges.tolist(),
+                "missing_value": None if np.isnan(missing_value) else missing_value,
+                "counts": np.bincount(indices, minlength=len(edges) + 2).tolist(),
+            })
+        return cls(columns, n_rows=len(matrix), created_at=datetime.now(timezone.utc).isoformat())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format_version": REFERENCE_FORMAT_VERSION,
+            "created_at": self.created_at,
+            "n_rows": self.n_rows,
+            "columns": [
+                {
+                    "name": name,
+                    "edges": edges.tolist(),
+                    "missing_value": None if np.isnan(missing) else float(missing),
+                    "counts": counts.tolist(),
+                }
+                for name, edges, missing, counts in zip(self.names, self.edges, self.missing_values, self.counts)
+            ],
+        }
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "DriftReference":
+        with open(path, "r") as f:
+            payload = json.load(f)
+        if payload.get("format_version") != REFERENCE_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported drift reference format {payload.get('format_version')!r} "
+                f"(expected {REFERENCE_FORMAT_VERSION})."
+            )
+        return cls(payload["columns"], n_rows=payload["n_rows"], created_at=payload.get("created_at"))
+
+
+def reference_from_frame(handler, df: pd.DataFrame, n_buckets: int = DEFAULT_BUCKETS) -> DriftReference:
+    """
+    Builds a reference by running raw training rows through a handler's own
+    serving transform, so the reference sees exactly what the model is served.
+
+    Args:
+        handler (PredictionHandler): Loaded model.
+        df (pd.DataFrame): Raw (processed-data) rows, as scored by `predict_proba_frame`.
+        n_buckets (int): Quantile buckets per column.
+    """
+    processed = np.asarray(handler.transform_frame(df), dtype=np.float64)
+    probabilities = handler.predictor.predict_proba(processed)
+    return DriftReference.build(processed, handler.final_features, probabilities,
+                                missing_values=handler.imputation_map, n_buckets=n_buckets)
+
+
+# ============================================================
+# Live monitor
+# ============================================================
+class DriftMonitor:
+    """
+    Constant-memory streaming histograms of the served inputs and scores,
+    in the bucket layout of a DriftReference.
+
+    `observe` only copies rows into a ring buffer (under a lock) and never
+    bins; `flush` drains the ring and bins everything in one vectorized pass.
+    `start()` runs `flush` every `flush_interval_s` in a worker thread; `report()`
+    flushes first, so it is exact even without the background task. Rows
+    arriving while the ring is full are dropped and counted.
+
+    Counts are kept for a sliding window of `window_seconds` (made of
+    `n_slices` rotating slices, so old traffic ages out in steps) and since start.
+    """
+
+    def __init__(self, reference: DriftReference, capacity: int = 16384, window_seconds: float = 3600.0,
+                 n_slices: int = 12, flush_interval_s: float = 1.0, min_records: int = 500):
+        """
+        Args:
+            reference (DriftReference): Training distribution and bucket layout.
+            capacity (int): Ring buffer rows (records that may wait between two flushes).
+            window_seconds (float): Length of the sliding comparison window.
+            n_slices (int): Window granularity.
+            flush_interval_s (float): Background drain period.
+            min_records (int): Window size below which no drift status is given.
+        """
+        if capacity < 1 or n_slices < 1:
+            raise ValueError("capacity and n_slices must be >= 1.")
+
+        self.reference = reference
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.n_slices = n_slices
+        self.flush_interval = flush_interval_s
+        self.min_records = min_records
+
+        self._n_features = len(reference.names) - 1
+        sizes = [len(edges) + 2 for edges in reference.edges]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self._reference_counts = np.concatenate(reference.counts)
+
+        # Ring buffer: features + score per row, written by observe(), drained by flush()
+        self._ring = np.empty((capacity, self._n_features + 1), dtype=np.float64)
+        self._written = 0
+        self._read = 0
+        self._lock = threading.Lock()
+
+        # Bucket counters, one row per time slice
+        self._slice_seconds = window_seconds / n_slices
+        self._slices = np.zeros((n_slices, self._offsets[-1]), dtype=np.int64)
+        self._slice_ids = np.full(n_slices, -1, dtype=np.int64)
+        self._lifetime = np.zeros(self._offsets[-1], dtype=np.int64)
+        self._flush_lock = threading.Lock()
+
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.records_total = 0
+        self.dropped_total = 0
+        self.flushes_total = 0
+        self.last_flush_ms = 0.0
+
+    # ============================================================
+    # Lifecycle
+    # ============================================================
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the background drain after a final flush."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.flush()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await loop.run_in_executor(None, self.flush)
+            except Exception as e:
+                print(f"[DRIFT] Flush failed: {e}")
+
+    # ============================================================
+    # Hot path
+    # ============================================================
+    def observe(self, features, probabilities):
+        """
+        Queues scored rows for binning.
+
+        Args:
+            features: (n, k) or (k,) model input rows, as scored (ndarray or DataFrame).
+            probabilities: n scores (or one float).
+        """
+        rows = np.asarray(features, dtype=np.float64).reshape(-1, self._n_features)
+        scores = np.asarray(probabilities, dtype=np.float64).reshape(-1)
+        n = len(rows)
+        with self._lock:
+            free = self.capacity - (self._written - self._read)
+            if n > free:
+                self.dropped_total += n - free
+                n = free
+            if n == 0:
+                return
+            start = self._written % self.capacity
+            first = min(n, self.capacity - start)
+            self._ring[start:start + first, :-1] = rows[:first]
+            self._ring[start:start + first, -1] = scores[:first]
+            if first < n:
+                self._ring[:n - first, :-1] = rows[first:n]
+                self._ring[:n - first, -1] = scores[first:n]
+            self._written += n
+
+    # ============================================================
+    # Binning
+    # ============================================================
+    def flush(self) -> int:
+        """Drains the ring buffer into the bucket counters; returns the number of rows binned."""
+        with self._flush_lock:
+            start_time = time.perf_counter()
+            with self._lock:
+                n = self._written - self._read
+                if n == 0:
+                    return 0
+                positions = (self._read + np.arange(n)) % self.capacity
+                rows = self._ring[positions]
+                self._read = self._written
+
+            flat = np.empty(rows.shape, dtype=np.int64)
+            for j, edges in enumerate(self.reference.edges):
+                flat[:, j] = bucket_indices(rows[:, j], edges, self.reference.missing_values[j]) + self._offsets[j]
+            counts = np.bincount(flat.ravel(), minlength=len(self._lifetime))
+
+            self._current_slice()[:] += counts
+            self._lifetime += counts
+            self.records_total += n
+            self.flushes_total += 1
+            self.last_flush_ms = (time.perf_counter() - start_time) * 1000.0
+            return n
+
+    def _current_slice(self) -> np.ndarray:
+        slice_id = int(time.monotonic() // self._slice_seconds)
+        slot = slice_id % self.n_slices
+        if self._slice_ids[slot] != slice_id:
+            self._slices[slot] = 0
+            self._slice_ids[slot] = slice_id
+        return self._slices[slot]
+
+    def _window_counts(self) -> np.ndarray:
+        oldest = int(time.monotonic() // self._slice_seconds) - self.n_slices
+        return self._slices[self._slice_ids > oldest].sum(axis=0)
+
+    # ============================================================
+    # Reports
+    # ============================================================
+    def _status(self, records: int, psi: Optional[float]) -> str:
+        if records < self.min_records or psi is None:
+            return "insufficient_data"
+        if psi >= PSI_ALERT:
+            return "alert"
+        if psi >= PSI_WARN:
+            return "warn"
+        return "ok"
+
+    def report(self, lifetime: bool = False) -> Dict[str, Any]:
+        """
+        Compares the live distributions with the reference.
+
+        Args:
+            lifetime (bool): Use everything since start instead of the sliding window.
+
+        Returns:
+            dict: Summary (records, max PSI, drifted columns) and, per column,
+                PSI, KS, missing shares, approximate live vs. reference
+                quantiles and a status (ok | warn | alert | insufficient_data).
+        """
+        self.flush()
+        with self._flush_lock:
+            counts = self._lifetime.copy() if lifetime else self._window_counts()
+
+        columns = {}
+        for j, name in enumerate(self.reference.names):
+            live = counts[self._offsets[j]:self._offsets[j + 1]]
+            reference = self._reference_counts[self._offsets[j]:self._offsets[j + 1]]
+            records = int(live.sum())
+            comparison = compare_counts(live, reference)
+            columns[name] = {
+                "status": self._status(records, comparison["psi"]),
+                **comparison,
+                "missing_share": float(live[0] / records) if records else None,
+                "reference_missing_share": float(reference[0] / reference.sum()),
+                "quantiles": approximate_quantiles(live, self.reference.edges[j]),
+                "reference_quantiles": approximate_quantiles(reference, self.reference.edges[j]),
+            }
+
+        records = int(counts[:self._offsets[1]].sum())
+        scored = [(c["psi"], name) for name, c in columns.items() if c["status"] != "insufficient_data"]
+        return {
+            "scope": "lifetime" if lifetime else "window",
+            "window_seconds": None if lifetime else self.window_seconds,
+            "records": records,
+            "status": self._status(records, max(scored)[0] if scored else None),
+            "max_psi": max(scored)[0] if scored else None,
+            "drifted": sorted(name for name, c in columns.items() if c["status"] in ("warn", "alert")),
+            "reference_rows": self.reference.n_rows,
+            "reference_created_at": self.reference.created_at,
+            "columns": columns,
+            **self.stats(),
+        }
+
+    def psi_by_column(self) -> Dict[str, float]:
+        """Window PSI per column with enough records (for the labelled /metrics gauge)."""
+        columns = self.report()["columns"]
+        return {name: c["psi"] for name, c in columns.items() if c["status"] != "insufficient_data"}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._written - self._read
+        return {
+            "records_total": self.records_total,
+            "dropped_total": self.dropped_total,
+            "pending": pending,
+            "capacity": self.capacity,
+            "flushes_total": self.flushes_total,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+# ============================================================
+# CLI: reference for the legacy artifacts
+# ============================================================
+def _read_training_data(path: str, needed: Optional[set], sample: Optional[int], seed: int) -> pd.DataFrame:
+    """Reads training rows, only the columns whose cleaned name is in `needed` (None = all)."""
+    import pandas as pd
+
+    from src.macro_table import APPLICATION_DATE
+    from src.loading import select_columns
+
+    if os.path.isdir(path):
+        from src.config import Paths
+        from src.datastore import ProcessedStore
+
+        root, table = os.path.split(path.rstrip(os.sep))
+        store = ProcessedStore(Paths(PROJECT_BASE_PATH), root=root)
+        df = store.read(table, columns=select_columns(store.dataset(table).schema.names, needed))
+    elif path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        df = pd.read_parquet(path, columns=select_columns(pq.read_schema(path).names, needed))
+    else:
+        df = pd.read_csv(path, usecols=select_columns(pd.read_csv(path, nrows=0).columns.tolist(), needed))
+    if sample and len(df) > sample:
+        df = df.sample(n=sample, random_state=seed)
+    if APPLICATION_DATE not in df.columns and TIME_INDEX in df.columns:
+        df[APPLICATION_DATE] = df[TIME_INDEX].astype(str)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the training-time drift reference for a model.")
+    parser.add_argument("--data", required=True,
+                        help="Training rows before imputation: CSV, Parquet file or a ProcessedStore table directory.")
+    parser.add_argument("--model-dir", default=None, help="Legacy artifacts (default: models/).")
+    parser.add_argument("--out", default=None, help=f"Output file (default: <model-dir>/{DRIFT_REFERENCE_FILE}).")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS)
+    parser.add_argument("--sample", type=int, default=500_000, help="Rows to sample (0 = all).")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from src.config import Paths
+    from src.loading import handler_spec, load_handler
+
+    # Legacy pickles only: bundles from src.train ship their own reference
+    model_dir = args.model_dir or Paths(PROJECT_BASE_PATH).MODEL_DIR
+    handler = load_handler(handler_spec(model_dir=model_dir, backend="booster", prefer_bundle=False))
+    out = args.out or os.path.join(model_dir, DRIFT_REFERENCE_FILE)
+
+    # Read only the raw fields the model uses when the fast path is compiled
+    needed = set(handler.feature_plan.input_fields) | {TIME_INDEX} if handler.feature_plan is not None else None
+    df = _read_training_data(args.data, needed, args.sample or None, args.seed)
+
+    start = time.perf_counter()
+    reference = reference_from_frame(handler, df, n_buckets=args.buckets)
+    reference.save(out)
+    print(f"✅ Drift reference ({reference.n_rows:,} rows, {len(reference.names)} columns) written to {out} "
+          f"in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
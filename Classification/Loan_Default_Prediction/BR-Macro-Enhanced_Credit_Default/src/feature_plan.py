@@ -0,0 +1,267 @@
+# FILE: src/feature_plan.py
+
+import math
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.macro_table import APPLICATION_DATE, MacroTable, month_ordinal
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Slot kinds
+_RAW = 0
+_RATIO = 1
+_ENCODED = 2
+_MACRO = 3
+
+
+class FeaturePlan:
+    """
+    Compiled, pandas-free version of `PredictionHandler.preprocess`.
+
+    The plan is built once from the loaded artifacts and only touches the
+    inputs the final model actually uses. It reproduces, slot by slot:
+    - DAYS_EMPLOYED anomaly fix (365243 -> NaN, then abs)
+    - Financial ratios (CREDIT_INCOME_RATIO, ANNUITY_INCOME_RATIO, PAYMENT_RATE)
+    - Target encoding through a flat category -> value lookup
+    - Macro / calendar features from the application month (MacroTable), when
+      the caller did not send them
+    - Mean imputation with per-slot constants
+    """
+
+    ANOMALY_VALUES = {"DAYS_EMPLOYED": 365243}
+
+    # feature -> (numerator, denominator), same formulas as Notebook 03
+    RATIO_FEATURES = {
+        "CREDIT_INCOME_RATIO": ("AMT_CREDIT", "AMT_INCOME_TOTAL"),
+        "ANNUITY_INCOME_RATIO": ("AMT_ANNUITY", "AMT_INCOME_TOTAL"),
+        "PAYMENT_RATE": ("AMT_ANNUITY", "AMT_CREDIT"),
+    }
+
+    ENCODED_SUFFIX = "_TARGET_ENC"
+
+    def __init__(self, final_features: List[str], imputation_map: Dict[str, float],
+                 encoder_lookups: Dict[str, Dict[str, Any]], macro_table: Optional[MacroTable] = None):
+        """
+        Args:
+            final_features (list[str]): Model feature order.
+            imputation_map (dict): Column -> mean used to fill missing values.
+            encoder_lookups (dict): Categorical column -> {"mapping": {category: value},
+                "unknown": value, "missing": value}, see `lookups_from_encoder`.
+            macro_table (MacroTable, optional): Month-indexed macro features keyed
+                on APPLICATION_DATE.
+        """
+        self.final_features = list(final_features)
+        self.n_features = len(self.final_features)
+
+        self._impute = np.array(
+            [float(imputation_map.get(f, np.nan)) for f in self.final_features],
+            dtype=np.float64
+        )
+        self._has_impute = ~np.isnan(self._impute)
+        self._impute_values = self._impute.tolist()
+
+        self.macro_table = macro_table
+        macro_features = set(macro_table.feature_names) if macro_table is not None else set()
+        encoded_sources = {f"{col}{self.ENCODED_SUFFIX}": col for col in encoder_lookups}
+
+        # Each slot: (kind, feature name, source columns, lookup)
+        self._slots = []
+        for feature in self.final_features:
+            if feature in encoded_sources:
+                col = encoded_sources[feature]
+                self._slots.append((_ENCODED, feature, (col,), encoder_lookups[col]))
+            elif feature in self.RATIO_FEATURES:
+                self._slots.append((_RATIO, feature, self.RATIO_FEATURES[feature], None))
+            elif feature in macro_features:
+                self._slots.append((_MACRO, feature, (feature, APPLICATION_DATE), None))
+            else:
+                self._slots.append((_RAW, feature, (feature,), None))
+
+    @property
+    def input_fields(self) -> List[str]:
+        """Raw input fields that can affect the model's score."""
+        fields = []
+        for kind, feature, sources, _ in self._slots:
+            # Ratio slots fall back to the raw feature when inputs are absent
+            for name in ((feature,) + sources if kind == _RATIO else sources):
+                if name not in fields:
+                    fields.append(name)
+        return fields
+
+    # ============================================================
+    # Encoder compilation
+    # ============================================================
+    @staticmethod
+    def lookups_from_encoder(target_encoder) -> Dict[str, Dict[str, Any]]:
+        """
+        Flattens a fitted `category_encoders.TargetEncoder` into plain dicts.
+
+        The encoder maps category -> ordinal code -> smoothed target mean;
+        unknown categories use code -1 and missing values the code assigned
+        to NaN (-2 when NaN was not seen during fit).
+        """
+        ordinal_maps = {m["col"]: m["mapping"] for m in target_encoder.ordinal_encoder.mapping}
+
+        lookups = {}
+        for col, values in target_encoder.mapping.items():
+            codes = ordinal_maps[col]
+            mapping = {}
+            missing_code = -2
+            for category, code in codes.items():
+                if isinstance(category, float) and math.isnan(category):
+                    missing_code = code
+                elif code in values.index:
+                    mapping[category] = float(values[code])
+
+            lookups[col] = {
+                "mapping": mapping,
+                "unknown": float(values.get(-1, np.nan)),
+                "missing": float(values.get(missing_code, np.nan)),
+            }
+        return lookups
+
+    # ============================================================
+    # Scalar helpers (single record)
+    # ============================================================
+    def _read(self, raw_input: Dict[str, Any], name: str) -> float:
+        value = raw_input.get(name)
+        value = np.nan if value is None else float(value)
+
+        anomaly = self.ANOMALY_VALUES.get(name)
+        if anomaly is not None:
+            value = np.nan if value == anomaly else abs(value)
+        return value
+
+    @staticmethod
+    def _divide(numerator: float, denominator: float) -> float:
+        # Mirrors float64 division in pandas: x/0 -> +-inf, 0/0 -> NaN
+        if denominator == 0:
+            if numerator == 0 or math.isnan(numerator):
+                return np.nan
+            return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+        return numerator / denominator
+
+    @staticmethod
+    def encode_value(value: Any, lookup: Dict[str, Any]) -> float:
+        """Target-encodes one raw category with a lookup from `lookups_from_encoder`."""
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return lookup["missing"]
+        return lookup["mapping"].get(value, lookup["unknown"])
+
+    # ============================================================
+    # Transform: single record
+    # ============================================================
+    def transform(self, raw_input: Dict[str, Any], out: np.ndarray = None) -> np.ndarray:
+        """
+        Builds the aligned, imputed feature vector for one raw input.
+
+        Args:
+            raw_input (dict): Raw payload (cleaned field names, as in the schema).
+            out (np.ndarray, optional): float64 buffer of length `n_features` to fill.
+
+        Returns:
+            np.ndarray: 1-D float64 vector in `final_features` order.
+        """
+        if out is None:
+            out = np.empty(self.n_features, dtype=np.float64)
+        ordinal = None
+
+        for slot, (kind, feature, sources, lookup) in enumerate(self._slots):
+            if kind == _ENCODED:
+                value = self.encode_value(raw_input.get(sources[0]), lookup)
+            elif kind == _RATIO and sources[0] in raw_input and sources[1] in raw_input:
+                value = self._divide(self._read(raw_input, sources[0]), self._read(raw_input, sources[1]))
+            else:
+                value = self._read(raw_input, feature)
+                if kind == _MACRO and value != value:
+                    if ordinal is None:
+                        ordinal = month_ordinal(raw_input.get(APPLICATION_DATE))
+                    value = self.macro_table.value(feature, ordinal)
+
+            if value != value:
+                value = self._impute_values[slot]
+            out[slot] = value
+
+        return out
+
+    # ============================================================
+    # Transform: batch (columnar)
+    # ============================================================
+    def _transform_columns(self, get_column: Callable[[str], np.ndarray],
+                           get_values: Callable[[str], list],
+                           has_column: Callable[[str], bool], n_rows: int) -> np.ndarray:
+        out = np.empty((n_rows, self.n_features), dtype=np.float64)
+
+        def read(name):
+            if not has_column(name):
+                return np.full(n_rows, np.nan)
+            column = get_column(name)
+            anomaly = self.ANOMALY_VALUES.get(name)
+            if anomaly is not None:
+                column = np.abs(np.where(column == anomaly, np.nan, column))
+            return column
+
+        ordinals = None
+        for slot, (kind, feature, sources, lookup) in enumerate(self._slots):
+            if kind == _ENCODED:
+                values = get_values(sources[0]) if has_column(sources[0]) else [None] * n_rows
+                column = np.fromiter(
+                    (self.encode_value(v, lookup) for v in values), dtype=np.float64, count=n_rows
+                )
+            elif kind == _RATIO and has_column(sources[0]) and has_column(sources[1]):
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    column = read(sources[0]) / read(sources[1])
+            else:
+                column = read(feature)
+                missing = np.isnan(column) if kind == _MACRO else None
+                if missing is not None and missing.any():
+                    if ordinals is None:
+                        ordinals = MacroTable.ordinals(
+                            get_values(APPLICATION_DATE) if has_column(APPLICATION_DATE) else [None] * n_rows
+                        )
+                    column = np.where(missing, self.macro_table.column(feature, ordinals), column)
+
+            if self._has_impute[slot]:
+                column = np.where(np.isnan(column), self._impute[slot], column)
+            out[:, slot] = column
+
+        return out
+
+    def transform_batch(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Builds the feature matrix for many raw inputs.
+
+        A field counts as present when any record carries it, matching the
+        column semantics of `pd.DataFrame.from_records` in the reference path.
+
+        Returns:
+            np.ndarray: 2-D float64 array of shape (len(records), n_features).
+        """
+        return self._transform_columns(
+            get_column=lambda name: np.array([r.get(name) for r in records], dtype=np.float64),
+            get_values=lambda name: [r.get(name) for r in records],
+            has_column=lambda name: any(name in r for r in records),
+            n_rows=len(records)
+        )
+
+    def transform_frame(self, df: "pd.DataFrame") -> np.ndarray:
+        """
+        Builds the feature matrix straight from DataFrame columns (e.g. a chunk
+        of a CSV or Parquet file), without materializing records.
+
+        Args:
+            df (pd.DataFrame): Raw inputs with cleaned column names.
+
+        Returns:
+            np.ndarray: 2-D float64 array of shape (len(df), n_features).
+        """
+        return self._transform_columns(
+            get_column=lambda name: df[name].to_numpy(dtype=np.float64, na_value=np.nan),
+            get_values=lambda name: df[name].tolist(),
+            has_column=lambda name: name in df.columns,
+            n_rows=len(df)
+        )
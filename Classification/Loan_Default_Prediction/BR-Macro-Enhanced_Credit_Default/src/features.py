@@ -0,0 +1,420 @@
+# FILE: src/features.py
+#
+# Out-of-core feature engineering and out-of-fold target encoding for training.
+#
+# Replaces the encoding block of 03_Feature_Eng.ipynb, which loads the whole
+# table into pandas and refits a category_encoders.TargetEncoder per fold.
+# Here the training Parquet file is read in column / row-batch chunks:
+#
+#   1. Statistics pass: for every categorical column, target sum and count per
+#      (category, fold) are accumulated with np.bincount, one batch at a time.
+#      Columns are independent, so they can be spread across processes.
+#   2. Encoding pass: leave-fold-out arithmetic on those tables gives every
+#      row the value a TargetEncoder fitted on the other folds would produce,
+#      looked up by array indexing; the result is streamed to Parquet.
+#
+# Fold assignment reproduces KFold(n_splits=5, shuffle=True, random_state=42)
+# and the smoothing reproduces TargetEncoder(smoothing=0.3, min_samples_leaf=20).
+#
+#   python -m src.features data/processed/train_enriched.parquet \
+#       --out data/processed/train_final_encoded.parquet --workers 4
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+
+from src.config import Paths
+from src.feature_plan import FeaturePlan
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGET_COLUMN = "TARGET"
+ID_COLUMN = "SK_ID_CURR"
+
+# 03_Feature_Eng.ipynb settings
+N_FOLDS = 5
+FOLD_SEED = 42
+SMOOTHING = 0.3
+MIN_SAMPLES_LEAF = 20
+
+
+# ============================================================
+# Readers
+# ============================================================
+def parquet_num_rows(path: str) -> int:
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def categorical_columns(path: str, exclude: tuple = (TARGET_COLUMN, ID_COLUMN)) -> List[str]:
+    """String / dictionary columns of a Parquet file (select_dtypes(['object', 'category']) in the notebook)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = []
+    for field in pq.ParquetFile(path).schema_arrow:
+        kind = field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+        if (pa.types.is_string(kind) or pa.types.is_large_string(kind)) and field.name not in exclude:
+            columns.append(field.name)
+    return columns
+
+
+def iter_batches(path: str, columns: Optional[List[str]] = None, batch_size: int = 250000) -> Iterator[pd.DataFrame]:
+    """Yields consecutive row batches of `columns` (None = all) as DataFrames."""
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+
+def fold_ids(n_rows: int, n_folds: int = N_FOLDS, seed: int = FOLD_SEED) -> np.ndarray:
+    """
+    Fold of every row, identical to `KFold(n_folds, shuffle=True, random_state=seed).split`
+    but stored as one int8 per row instead of index arrays.
+    """
+    from sklearn.model_selection import KFold
+
+    folds = np.empty(n_rows, dtype=np.int8)
+    splitter = KFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for fold, (_, val_idx) in enumerate(splitter.split(np.empty((n_rows, 0)))):
+        folds[val_idx] = fold
+    return folds
+
+
+# ============================================================
+# Feature engineering (same transformations as the serving pipeline)
+# ============================================================
+def clean_names(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [re.sub(r"[^A-Za-z0-9_]+", "", str(c)) for c in df.columns]
+    return df
+
+
+def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    DAYS_EMPLOYED anomaly fix and ratio features, with the formulas
+    PredictionHandler / FeaturePlan apply at serving time.
+    TIME_INDEX (if present) becomes YEAR / MONTH_OF_YEAR.
+    """
+    for col, anomaly in FeaturePlan.ANOMALY_VALUES.items():
+        if col in df.columns:
+            df[col] = df[col].replace(anomaly, np.nan).abs()
+
+    for feature, (numerator, denominator) in FeaturePlan.RATIO_FEATURES.items():
+        if numerator in df.columns and denominator in df.columns:
+            df[feature] = df[numerator] / df[denominator]
+
+    if "TIME_INDEX" in df.columns:
+        period = pd.to_datetime(df["TIME_INDEX"].astype(str))
+        df["YEAR"] = period.dt.year
+        df["MONTH_OF_YEAR"] = period.dt.month
+        df = df.drop(columns=["TIME_INDEX"])
+    return df
+
+
+# ============================================================
+# Target statistics per (category, fold)
+# ============================================================
+class CategoryStats:
+    """
+    Target sum and count per (category, fold) for one column, accumulated batch by batch.
+    Missing values (None / NaN) form their own category, as in category_encoders.
+    """
+
+    def __init__(self, n_folds: int = N_FOLDS):
+        self.n_folds = n_folds
+        self.categories = pd.Index([], dtype=object)
+        self.sums = np.zeros((0, n_folds), dtype=np.float64)
+        self.counts = np.zeros((0, n_folds), dtype=np.int64)
+
+    def codes(self, values, grow: bool = False) -> np.ndarray:
+        """Row -> category position (-1 for categories not seen, unless `grow`)."""
+        batch_codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+        positions = self.categories.get_indexer(uniques)
+
+        new = positions < 0
+        if grow and new.any():
+            start = len(self.categories)
+            self.categories = self.categories.append(pd.Index(uniques[new], dtype=object))
+            positions[new] = np.arange(start, len(self.categories))
+            pad = len(self.categories) - self.sums.shape[0]
+            self.sums = np.vstack([self.sums, np.zeros((pad, self.n_folds))])
+            self.counts = np.vstack([self.counts, np.zeros((pad, self.n_folds), dtype=np.int64)])
+        return positions[batch_codes]
+
+    def add(self, values, target: np.ndarray, folds: np.ndarray):
+        codes = self.codes(values, grow=True)
+        keys = codes * self.n_folds + folds
+        size = len(self.categories) * self.n_folds
+        self.sums += np.bincount(keys, weights=target, minlength=size).reshape(-1, self.n_folds)
+        self.counts += np.bincount(keys, minlength=size).reshape(-1, self.n_folds)
+
+
+def _smooth(sums: np.ndarray, counts: np.ndarray, prior, min_samples_leaf: float, smoothing: float) -> np.ndarray:
+    """category_encoders.TargetEncoder blend; categories without rows get the prior (handle_unknown='value')."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+    weight = expit((counts - min_samples_leaf) / smoothing)
+    encoded = prior * (1 - weight) + means * weight
+    return np.where(counts > 0, encoded, np.broadcast_to(prior, encoded.shape))
+
+
+def _column_stats(path: str, column: str, target: str, n_folds: int, seed: int, batch_size: int) -> CategoryStats:
+    folds = fold_ids(parquet_num_rows(path), n_folds, seed)
+    stats = CategoryStats(n_folds)
+    offset = 0
+    for batch in iter_batches(path, [column, target], batch_size):
+        n = len(batch)
+        stats.add(batch[column].to_numpy(), batch[target].to_numpy(dtype=np.float64), folds[offset:offset + n])
+        offset += n
+    return stats
+
+
+def _column_stats_task(args) -> CategoryStats:
+    return _column_stats(*args)
+
+
+# ============================================================
+# Out-of-fold target encoder
+# ============================================================
+class OOFTargetEncoder:
+    """
+    Out-of-fold target encoding computed from per-fold sufficient statistics.
+
+    Args:
+        cols (list[str], optional): Categorical columns (default: string columns of the file).
+        n_folds (int): KFold splits.
+        random_state (int): KFold shuffle seed.
+        smoothing (float): TargetEncoder smoothing.
+        min_samples_leaf (int): TargetEncoder min_samples_leaf.
+    """
+
+    def __init__(self, cols: Optional[List[str]] = None, n_folds: int = N_FOLDS, random_state: int = FOLD_SEED,
+                 smoothing: float = SMOOTHING, min_samples_leaf: int = MIN_SAMPLES_LEAF):
+        self.cols = cols
+        self.n_folds = n_folds
+        self.random_state = random_state
+        self.smoothing = smoothing
+        self.min_samples_leaf = min_samples_leaf
+        self.stats: Dict[str, CategoryStats] = {}
+
+    # --------------------------------------------------------
+    # Fit: one pass per column, optionally in parallel
+    # --------------------------------------------------------
+    def fit(self, path: str, target: str = TARGET_COLUMN, batch_size: int = 250000,
+            workers: int = 0) -> "OOFTargetEncoder":
+        """
+        Accumulates (category, fold) statistics from a Parquet file.
+
+        Args:
+            path (str): Training Parquet file.
+            target (str): Binary target column.
+            batch_size (int): Rows per read batch.
+            workers (int): Processes to spread columns over (0 = in-process).
+        """
+        if self.cols is None:
+            self.cols = categorical_columns(path, exclude=(target, ID_COLUMN))
+        tasks = [(path, col, target, self.n_folds, self.random_state, batch_size) for col in self.cols]
+
+        if workers > 0 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=get_context("spawn")) as pool:
+                results = list(pool.map(_column_stats_task, tasks))
+        else:
+            results = [_column_stats_task(task) for task in tasks]
+
+        self.stats = dict(zip(self.cols, results))
+
+        # Per-fold priors: target mean of the rows outside each fold
+        any_stats = results[0] if results else _column_stats(path, target, target, self.n_folds,
+                                                              self.random_state, batch_size)
+        self._fold_sums = any_stats.sums.sum(axis=0)
+        self._fold_counts = any_stats.counts.sum(axis=0)
+        return self
+
+    @property
+    def prior(self) -> float:
+        """Target mean of the full training set (prior of the final encoder)."""
+        return float(self._fold_sums.sum() / self._fold_counts.sum())
+
+    def oof_tables(self, col: str) -> np.ndarray:
+        """(n_categories + 1, n_folds) encoded value of each category for rows of each fold; last row = unseen."""
+        stats = self.stats[col]
+        out_sums = stats.sums.sum(axis=1, keepdims=True) - stats.sums
+        out_counts = stats.counts.sum(axis=1, keepdims=True) - stats.counts
+        fold_priors = (self._fold_sums.sum() - self._fold_sums) / (self._fold_counts.sum() - self._fold_counts)
+
+        table = _smooth(out_sums, out_counts, fold_priors, self.min_samples_leaf, self.smoothing)
+        return np.vstack([table, fold_priors])
+
+    def final_values(self, col: str) -> np.ndarray:
+        """Encoded value per category for the encoder fitted on all rows (test set / serving)."""
+        stats = self.stats[col]
+        return _smooth(stats.sums.sum(axis=1), stats.counts.sum(axis=1), self.prior,
+                       self.min_samples_leaf, self.smoothing)
+
+    # --------------------------------------------------------
+    # Transform
+    # --------------------------------------------------------
+    def transform_oof(self, col: str, values, folds: np.ndarray) -> np.ndarray:
+        """Out-of-fold encoding of training rows (`folds` from `fold_ids`)."""
+        table = self.oof_tables(col)
+        codes = self.stats[col].codes(values)
+        codes = np.where(codes < 0, table.shape[0] - 1, codes)
+        return table[codes, folds]
+
+    def transform(self, col: str, values) -> np.ndarray:
+        """Encoding with the full-data statistics (unseen categories -> prior)."""
+        table = np.append(self.final_values(col), self.prior)
+        codes = self.stats[col].codes(values)
+        return table[np.where(codes < 0, len(table) - 1, codes)]
+
+    def lookups(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Full-data encoder in the flat format of `FeaturePlan.lookups_from_encoder`
+        (what serving bundles store).
+        """
+        lookups = {}
+        for col, stats in self.stats.items():
+            values = self.final_values(col)
+            missing = stats.categories.isna()
+            lookups[col] = {
+                "mapping": {category: float(v) for category, v, na in zip(stats.categories, values, missing) if not na},
+                "unknown": self.prior,
+                "missing": float(values[missing][0]) if missing.any() else self.prior,
+            }
+        return lookups
+
+
+# ============================================================
+# Pipeline
+# ============================================================
+def encode_file(input_path: str, output_path: str, encoder: OOFTargetEncoder, oof: bool = True,
+                batch_size: int = 250000) -> Dict[str, Any]:
+    """
+    Streams `input_path` through feature engineering and target encoding
+    (`<col>_TARGET_ENC`, raw categoricals dropped) into `output_path`.
+
+    Args:
+        oof (bool): Out-of-fold values (training file) or full-data values (test file).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    n_rows = parquet_num_rows(input_path)
+    folds = fold_ids(n_rows, encoder.n_folds, encoder.random_state) if oof else None
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    writer, offset = None, 0
+    try:
+        for batch in iter_batches(input_path, batch_size=batch_size):
+            n = len(batch)
+            encoded = {}
+            for col in encoder.cols:
+                if col not in batch.columns:
+                    continue
+                values = batch.pop(col).to_numpy()
+                encoded[f"{col}_TARGET_ENC"] = (
+                    encoder.transform_oof(col, values, folds[offset:offset + n]) if oof
+                    else encoder.transform(col, values)
+                )
+            batch = engineer_features(batch)
+            batch = clean_names(pd.concat([batch, pd.DataFrame(encoded, index=batch.index)], axis=1))
+
+            # Same float64 schema for every batch (a column may be all-integer in one batch only)
+            keep = {ID_COLUMN, TARGET_COLUMN}
+            batch = batch.astype({c: "float64" for c in batch.columns if c not in keep})
+
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            offset += n
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {"rows": offset}
+
+
+def column_means(path: str, exclude: tuple = (TARGET_COLUMN, ID_COLUMN), batch_size: int = 250000) -> Dict[str, float]:
+    """
+    Mean of every numeric column of a Parquet file, ignoring NaN (the serving imputation map).
+    Columns without a single value are left out, so they stay NaN at serving time too.
+    """
+    sums, counts = {}, {}
+    for batch in iter_batches(path, batch_size=batch_size):
+        for col in batch.columns:
+            if col in exclude:
+                continue
+            values = batch[col].to_numpy(dtype=np.float64)
+            present = ~np.isnan(values)
+            sums[col] = sums.get(col, 0.0) + float(values[present].sum())
+            counts[col] = counts.get(col, 0) + int(present.sum())
+    return {col: sums[col] / counts[col] for col in sums if counts[col]}
+
+
+def impute_file(input_path: str, output_path: str, fill_values: Dict[str, float],
+                batch_size: int = 250000) -> Dict[str, Any]:
+    """Streams `input_path` into `output_path` with NaN replaced by `fill_values` (column -> value)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, rows = None, 0
+    try:
+        for batch in iter_batches(input_path, batch_size=batch_size):
+            table = pa.Table.from_pandas(batch.fillna(fill_values), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {"rows": rows}
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    paths = Paths(PROJECT_BASE_PATH)
+
+    parser = argparse.ArgumentParser(description="Out-of-core feature engineering + OOF target encoding.")
+    parser.add_argument("train", help="Training Parquet file (raw categoricals + TARGET).")
+    parser.add_argument("--out", default=os.path.join(paths.DATA_PROCESSED_DIR, "train_final_encoded.parquet"))
+    parser.add_argument("--test", default=None, help="Optional test Parquet file, encoded with the full-data encoder.")
+    parser.add_argument("--test-out", default=os.path.join(paths.DATA_PROCESSED_DIR, "test_final_encoded.parquet"))
+    parser.add_argument("--lookups-out", default=os.path.join(paths.MODEL_DIR, "encoder_lookup.json"),
+                        help="Full-data encoder as FeaturePlan lookups (bundle format).")
+    parser.add_argument("--batch-size", type=int, default=250000)
+    parser.add_argument("--workers", type=int, default=0, help="Processes for the statistics pass.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    encoder = OOFTargetEncoder().fit(args.train, batch_size=args.batch_size, workers=args.workers)
+    print(f"[FEATURES] Target statistics for {len(encoder.cols)} categorical columns "
+          f"in {time.perf_counter() - start:.1f}s.")
+
+    summary = encode_file(args.train, args.out, encoder, oof=True, batch_size=args.batch_size)
+    print(f"✅ Train: {summary['rows']:,} rows -> {args.out}")
+
+    if args.test:
+        summary = encode_file(args.test, args.test_out, encoder, oof=False, batch_size=args.batch_size)
+        print(f"✅ Test: {summary['rows']:,} rows -> {args.test_out}")
+
+    with open(args.lookups_out, "w") as f:
+        json.dump(encoder.lookups(), f, indent=2, sort_keys=True)
+    print(f"✅ Encoder lookups -> {args.lookups_out} ({time.perf_counter() - start:.1f}s total)")
+
+
+if __name__ == "__main__":
+    main()
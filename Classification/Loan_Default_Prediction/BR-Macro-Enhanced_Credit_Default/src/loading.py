@@ -0,0 +1,67 @@
+# FILE: src/loading.py
+#
+# Loading a PredictionHandler from a model directory or a serving bundle, and
+# picking the raw input columns a loaded model reads. Shared by the API
+# (src.main), offline scoring (src.score) and the drift reference CLI (src.drift).
+
+import os
+from typing import Any, Dict, List, Optional
+
+from src.bundle import is_bundle
+from src.config import Paths
+from src.drift import DRIFT_REFERENCE_FILE
+from src.predict import PredictionHandler
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ============================================================
+# Handler loading
+# ============================================================
+def handler_spec(model_dir: Optional[str] = None, bundle_dir: Optional[str] = None,
+                 backend: str = "booster", prefer_bundle: bool = True) -> Dict[str, Any]:
+    """
+    Describes how to load the scoring handler, in a form worker processes can receive.
+    A serving bundle is preferred when one exists, as in src.main.
+
+    Args:
+        prefer_bundle (bool): Use the bundle when there is one; False always loads
+            the artifacts of `model_dir`.
+    """
+    paths = Paths(PROJECT_BASE_PATH)
+    model_dir = model_dir or paths.MODEL_DIR
+    bundle_dir = bundle_dir or os.path.join(model_dir, os.path.basename(paths.MODEL_BUNDLE_DIR))
+
+    if prefer_bundle and is_bundle(bundle_dir):
+        return {"bundle_dir": bundle_dir, "backend": backend}
+
+    macro_table_path = os.path.join(model_dir, os.path.basename(paths.MACRO_TABLE_FILE))
+    drift_reference_path = os.path.join(model_dir, DRIFT_REFERENCE_FILE)
+    return {
+        "backend": backend,
+        "paths": {
+            "model_path": os.path.join(model_dir, os.path.basename(paths.FINAL_MODEL_FILE)),
+            "imputation_path": os.path.join(model_dir, os.path.basename(paths.IMPUTATION_MAP_FILE)),
+            "encoder_path": os.path.join(model_dir, os.path.basename(paths.TARGET_ENCODER_FILE)),
+            "features_path": os.path.join(model_dir, os.path.basename(paths.FINAL_FEATURES_FILE)),
+            "macro_table_path": macro_table_path if os.path.exists(macro_table_path) else None,
+            "drift_reference_path": drift_reference_path if os.path.exists(drift_reference_path) else None,
+        },
+    }
+
+
+def load_handler(spec: Dict[str, Any], verify: bool = True, cache=None) -> PredictionHandler:
+    """Builds the handler described by `handler_spec`."""
+    if spec.get("bundle_dir"):
+        return PredictionHandler.from_bundle(spec["bundle_dir"], backend=spec["backend"], verify=verify, cache=cache)
+    return PredictionHandler(**spec["paths"], backend=spec["backend"], cache=cache)
+
+
+# ============================================================
+# Input columns
+# ============================================================
+def select_columns(available: List[str], needed: Optional[set]) -> Optional[List[str]]:
+    """Raw column names whose cleaned form the model reads (None = all columns)."""
+    if needed is None:
+        return None
+    return [c for c in available if PredictionHandler._clean_single_name(c) in needed]
@@ -0,0 +1,416 @@
+# FILE: src/macro.py
+#
+# Incremental, cached ingestion of Brazilian macro series (BCB SGS API).
+#
+# Replaces the fetch in 01_Data_ETL.ipynb (query_bc / get_series_with_pagination)
+# and the macro block of 03_Feature_Eng.ipynb with a local store:
+#
+#   data/macro/SELIC.parquet            raw observations per series (date, value)
+#   data/macro/IPCA.parquet
+#   data/macro/macro_features.parquet   monthly SELIC/IPCA + LAG1 / CHANGE / ROLLING_MEAN3
+#
+# An update only requests dates after the last stored observation, splits the
+# range into the API's 10-year windows and fetches all windows of all series
+# concurrently. Derived features are recomputed for the months touched by new
+# data (plus the few months of history they look back on), not the full history.
+#
+#   python -m src.macro                      # incremental update of data/macro
+#   python -m src.macro --full --start 01/01/2014
+#   python -m src.macro --export-table models/macro_table.json   # serving lookup table
+
+import argparse
+import json
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.config import Paths
+from src.macro_table import MacroTable
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SGS_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{code}/dados"
+
+# The SGS API refuses queries spanning more than 10 years
+BCB_WINDOW_YEARS = 10
+
+# Feature name -> SGS series code (432: SELIC target rate, 433: IPCA monthly change)
+MACRO_SERIES = {"SELIC": 432, "IPCA": 433}
+
+DEFAULT_START_DATE = "01/01/2014"
+
+# Months of history the derived features read (LAG1 -> 1, ROLLING_MEAN3 shifted by one -> 3)
+DERIVED_LOOKBACK_MONTHS = 3
+
+TIME_INDEX = "TIME_INDEX"
+
+
+# ============================================================
+# HTTP layer
+# ============================================================
+def http_get_json(url: str, timeout: float = 30.0) -> Any:
+    """
+    GETs `url` and decodes the JSON body. The SGS API answers 404 for a
+    window without observations, which is returned as an empty list.
+    """
+    request = urllib.request.Request(url, headers={"Accept": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return []
+        raise
+
+
+class SGSClient:
+    """
+    Fetches BCB SGS series in 10-year windows, concurrently.
+
+    Args:
+        get_json (callable, optional): `url -> decoded JSON`; defaults to urllib.
+            Inject a different callable (or point `base_url` at a stub server) in tests.
+        base_url (str): URL template with a `{code}` placeholder.
+        max_workers (int): Windows fetched in parallel.
+        retries (int): Extra attempts per window on network / server errors.
+        backoff_seconds (float): Base delay between attempts (doubled each retry).
+    """
+
+    def __init__(self, get_json: Optional[Callable[[str], Any]] = None, base_url: str = SGS_URL,
+                 window_years: int = BCB_WINDOW_YEARS, max_workers: int = 8, retries: int = 2,
+                 backoff_seconds: float = 0.5):
+        self.get_json = get_json or http_get_json
+        self.base_url = base_url
+        self.window_years = window_years
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+
+    def windows(self, start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Splits [start, end] into consecutive, non-overlapping windows of at most `window_years`."""
+        windows = []
+        while start <= end:
+            window_end = min(start + pd.DateOffset(years=self.window_years) - pd.Timedelta(days=1), end)
+            windows.append((start, window_end))
+            start = window_end + pd.Timedelta(days=1)
+        return windows
+
+    def url(self, code: int, start: pd.Timestamp, end: pd.Timestamp) -> str:
+        query = urllib.parse.urlencode({
+            "formato": "json",
+            "dataInicial": start.strftime("%d/%m/%Y"),
+            "dataFinal": end.strftime("%d/%m/%Y"),
+        })
+        return f"{self.base_url.format(code=code)}?{query}"
+
+    def fetch_window(self, code: int, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """One API call. Returns a (date, value) frame, possibly empty."""
+        url = self.url(code, start, end)
+        for attempt in range(self.retries + 1):
+            try:
+                rows = self.get_json(url)
+                break
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                if isinstance(e, urllib.error.HTTPError) and e.code < 500:
+                    raise
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff_seconds * 2 ** attempt)
+
+        if not rows:
+            return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "value": pd.Series(dtype="float64")})
+
+        frame = pd.DataFrame(rows)
+        return pd.DataFrame({
+            "date": pd.to_datetime(frame["data"], format="%d/%m/%Y"),
+            "value": pd.to_numeric(frame["valor"], errors="coerce"),
+        })
+
+    def fetch_many(self, requests: Dict[str, Tuple[int, pd.Timestamp, pd.Timestamp]]) -> Dict[str, pd.DataFrame]:
+        """
+        Fetches several series at once: every window of every series goes to one thread pool.
+
+        Args:
+            requests (dict): name -> (code, start, end).
+
+        Returns:
+            dict: name -> (date, value) frame sorted by date, without duplicate dates.
+        """
+        jobs = [
+            (name, (code, start, end))
+            for name, (code, first, last) in requests.items()
+            for start, end in self.windows(first, last)
+        ]
+        if not jobs:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            futures = [(name, executor.submit(self.fetch_window, *args)) for name, args in jobs]
+            chunks: Dict[str, List[pd.DataFrame]] = {name: [] for name in requests}
+            for name, future in futures:
+                chunks[name].append(future.result())
+
+        return {
+            name: (
+                pd.concat(frames, ignore_index=True)
+                .drop_duplicates("date", keep="last")
+                .sort_values("date", ignore_index=True)
+            )
+            for name, frames in chunks.items()
+        }
+
+
+# ============================================================
+# Derived features
+# ============================================================
+def monthly_frame(raw: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Month-end value of each series (SELIC is daily, IPCA monthly), outer-joined
+    and forward-filled as in 01_Data_ETL.ipynb. Indexed by Period('M').
+    """
+    columns = {}
+    for name, frame in raw.items():
+        series = frame.set_index("date")["value"].sort_index()
+        columns[name] = series.groupby(series.index.to_period("M")).last()
+
+    monthly = pd.DataFrame(columns).sort_index().ffill()
+    monthly.index.name = TIME_INDEX
+    return monthly
+
+
+def derive_features(monthly: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds `{col}_LAG1`, `{col}_CHANGE` and `{col}_ROLLING_MEAN3` for each series
+    (03_Feature_Eng.ipynb definitions, applied along the monthly timeline).
+    """
+    out = monthly.copy()
+    for col in monthly.columns:
+        out[f"{col}_LAG1"] = monthly[col].shift(1)
+        out[f"{col}_CHANGE"] = monthly[col] - out[f"{col}_LAG1"]
+        out[f"{col}_ROLLING_MEAN3"] = monthly[col].rolling(window=3, min_periods=1).mean().shift(1)
+    return out
+
+
+def build_macro_table(features: pd.DataFrame) -> MacroTable:
+    """
+    Serving lookup table (src.macro_table) from the monthly feature table.
+    Missing months are inserted as empty rows so the table is contiguous.
+    """
+    months = pd.period_range(features.index.min(), features.index.max(), freq="M")
+    dense = features.reindex(months).astype("float64")
+    values = [[None if pd.isna(v) else float(v) for v in row] for row in dense.itertuples(index=False)]
+    return MacroTable(str(months[0]), list(dense.columns), values)
+
+
+# ============================================================
+# On-disk store
+# ============================================================
+class MacroStore:
+    """
+    Local Parquet store of raw BCB series and the derived monthly feature table.
+
+    Args:
+        store_dir (str): Directory holding `<SERIES>.parquet` and `macro_features.parquet`.
+        client (SGSClient, optional): API client (default: live BCB API).
+        series (dict): Feature name -> SGS code.
+        start_date (str): First date (DD/MM/YYYY) fetched when a series has no stored data.
+    """
+
+    FEATURES_FILE = "macro_features.parquet"
+
+    def __init__(self, store_dir: str, client: Optional[SGSClient] = None,
+                 series: Optional[Dict[str, int]] = None, start_date: str = DEFAULT_START_DATE):
+        self.store_dir = store_dir
+        self.client = client or SGSClient()
+        self.series = dict(series or MACRO_SERIES)
+        self.start_date = pd.to_datetime(start_date, format="%d/%m/%Y")
+
+    # --------------------------------------------------------
+    # Files
+    # --------------------------------------------------------
+    def series_path(self, name: str) -> str:
+        return os.path.join(self.store_dir, f"{name}.parquet")
+
+    @property
+    def features_path(self) -> str:
+        return os.path.join(self.store_dir, self.FEATURES_FILE)
+
+    @staticmethod
+    def _write(frame: pd.DataFrame, path: str):
+        # Write-then-rename so readers never see a half-written file
+        tmp_path = f"{path}.tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def load_series(self, name: str, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Stored (date, value) observations of one series, optionally from `since` on."""
+        path = self.series_path(name)
+        if not os.path.exists(path):
+            return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "value": pd.Series(dtype="float64")})
+        filters = [("date", ">=", since)] if since is not None else None
+        return pd.read_parquet(path, filters=filters)
+
+    def load_features(self) -> Optional[pd.DataFrame]:
+        """Monthly macro feature table indexed by Period('M') TIME_INDEX (None before the first update)."""
+        if not os.path.exists(self.features_path):
+            return None
+        frame = pd.read_parquet(self.features_path)
+        frame[TIME_INDEX] = frame[TIME_INDEX].dt.to_period("M")
+        return frame.set_index(TIME_INDEX)
+
+    def _save_features(self, features: pd.DataFrame):
+        frame = features.reset_index()
+        frame[TIME_INDEX] = frame[TIME_INDEX].dt.to_timestamp()
+        self._write(frame, self.features_path)
+
+    def export_table(self, path: str) -> MacroTable:
+        """Writes the serving lookup table (see `build_macro_table`) to `path`."""
+        features = self.load_features()
+        if features is None or features.empty:
+            raise ValueError(f"No macro features in {self.store_dir}; run an update first.")
+        table = build_macro_table(features)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        table.save(path)
+        return table
+
+    def last_date(self, name: str) -> Optional[pd.Timestamp]:
+        path = self.series_path(name)
+        if not os.path.exists(path):
+            return None
+        dates = pd.read_parquet(path, columns=["date"])["date"]
+        return dates.max() if len(dates) else None
+
+    # --------------------------------------------------------
+    # Update
+    # --------------------------------------------------------
+    def update(self, end_date: Optional[str] = None, full: bool = False) -> Dict[str, Any]:
+        """
+        Fetches observations newer than the store and refreshes the feature table.
+
+        Args:
+            end_date (str, optional): Last date to fetch (DD/MM/YYYY); default today.
+            full (bool): Ignore stored data and re-ingest everything from `start_date`.
+
+        Returns:
+            dict: New observations per series, first affected month, months
+                recomputed and elapsed seconds.
+        """
+        start_time = time.perf_counter()
+        os.makedirs(self.store_dir, exist_ok=True)
+        end = pd.to_datetime(end_date, format="%d/%m/%Y") if end_date else pd.Timestamp.today().normalize()
+
+        requests = {}
+        for name, code in self.series.items():
+            last = None if full else self.last_date(name)
+            start = self.start_date if last is None else last + pd.Timedelta(days=1)
+            if start <= end:
+                requests[name] = (code, start, end)
+
+        fetched = self.client.fetch_many(requests)
+
+        new_rows, affected = {}, []
+        for name in self.series:
+            new = fetched.get(name)
+            if new is None or new.empty:
+                new_rows[name] = 0
+                continue
+
+            stored = None if full else self.load_series(name)
+            combined = new if stored is None or stored.empty else (
+                pd.concat([stored, new], ignore_index=True)
+                .drop_duplicates("date", keep="last")
+                .sort_values("date", ignore_index=True)
+            )
+            self._write(combined, self.series_path(name))
+            new_rows[name] = len(new)
+            affected.append(new["date"].min())
+
+        since = min(affected).to_period("M") if affected else None
+        existing = None if full else self.load_features()
+        recomputed = 0
+        if since is not None or existing is None:
+            features = self._refresh_features(existing, since)
+            if features is not None:
+                self._save_features(features)
+                partial = since is not None and existing is not None
+                recomputed = int((features.index >= since).sum()) if partial else len(features)
+
+        return {
+            "new_rows": new_rows,
+            "since": str(since) if since is not None else None,
+            "months_recomputed": recomputed,
+            "seconds": time.perf_counter() - start_time,
+        }
+
+    def _refresh_features(self, existing: Optional[pd.DataFrame], since: Optional[pd.Period]) -> Optional[pd.DataFrame]:
+        """
+        Rebuilds the feature rows from month `since` on. The stored rows just before
+        `since` supply the forward-fill value and the lookback of the derived
+        columns, so the result equals a full recompute.
+        """
+        if existing is None or since is None:
+            raw = {name: self.load_series(name) for name in self.series}
+            if all(frame.empty for frame in raw.values()):
+                return None
+            return derive_features(monthly_frame(raw))
+
+        month_start = since.to_timestamp()
+        monthly_tail = monthly_frame({name: self.load_series(name, since=month_start) for name in self.series})
+
+        base = existing.loc[existing.index < since, list(self.series)]
+        context = base.tail(DERIVED_LOOKBACK_MONTHS)
+        recomputed = derive_features(pd.concat([context, monthly_tail]).ffill())
+
+        return pd.concat([
+            existing.loc[existing.index < since],
+            recomputed.loc[recomputed.index >= since, existing.columns],
+        ])
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    paths = Paths(PROJECT_BASE_PATH)
+
+    parser = argparse.ArgumentParser(description="Incrementally update the local BCB macro store.")
+    parser.add_argument("--store-dir", default=paths.MACRO_STORE_DIR, help="Store directory (default: data/macro).")
+    parser.add_argument("--start", default=DEFAULT_START_DATE, help="First date for empty series (DD/MM/YYYY).")
+    parser.add_argument("--end", default=None, help="Last date to fetch (DD/MM/YYYY, default: today).")
+    parser.add_argument("--full", action="store_true", help="Re-ingest everything from --start.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent API requests.")
+    parser.add_argument("--base-url", default=SGS_URL, help="SGS URL template with a {code} placeholder.")
+    parser.add_argument("--export-table", nargs="?", const=paths.MACRO_TABLE_FILE, default=None,
+                        help="Also write the serving lookup table (default path: models/macro_table.json).")
+    args = parser.parse_args()
+
+    store = MacroStore(
+        args.store_dir,
+        client=SGSClient(base_url=args.base_url, max_workers=args.workers),
+        start_date=args.start
+    )
+    try:
+        summary = store.update(end_date=args.end, full=args.full)
+    except Exception as e:
+        print(f"❌ Macro update failed: {e}")
+        raise SystemExit(1)
+
+    print(
+        f"✅ Macro store updated in {summary['seconds']:.2f}s: new rows {summary['new_rows']}, "
+        f"{summary['months_recomputed']} month(s) recomputed from {summary['since']} -> {store.features_path}"
+    )
+
+    if args.export_table:
+        table = store.export_table(args.export_table)
+        print(f"✅ Macro table {table.start_month}..{table.end_month} ({len(table.columns)} columns) "
+              f"-> {args.export_table}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# FILE: src/macro_table.py
+#
+# Month-indexed macro feature table shipped with the model artifacts.
+#
+# Callers send an APPLICATION_DATE instead of looking up SELIC / IPCA and their
+# lags themselves; the serving pipeline fills the macro columns from this table.
+# Months are stored contiguously, so a lookup is `values[month - first_month]`
+# and a batch join is one fancy-indexing call. Kept free of pandas so it can be
+# loaded on the bundle / FeaturePlan hot path; `src.macro` builds it.
+
+import json
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+MACRO_TABLE_FILE = "macro_table.json"
+
+# Request field the lookup is keyed on (ISO date; only year and month are used)
+APPLICATION_DATE = "APPLICATION_DATE"
+
+# Derived from the application month itself, no table needed
+CALENDAR_FEATURES = ("MONTH_OF_YEAR", "YEAR")
+
+
+def month_ordinal(value: Any) -> Optional[int]:
+    """
+    `year * 12 + month - 1` for a date, datetime, pandas Timestamp / Period or an
+    ISO string ("2024-05-17", "2024-05"). None / NaN / NaT give None.
+    """
+    if value is None or value != value:
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if len(text) < 7 or text[4] not in "-/":
+            raise ValueError(f"Unrecognized {APPLICATION_DATE}: {value!r} (expected YYYY-MM[-DD]).")
+        year, month = int(text[:4]), int(text[5:7])
+    else:
+        year, month = value.year, value.month
+
+    if not 1 <= month <= 12:
+        raise ValueError(f"Unrecognized {APPLICATION_DATE}: {value!r} (month out of range).")
+    return year * 12 + month - 1
+
+
+class MacroTable:
+    """
+    Dense monthly table of macro features.
+
+    Months after the last stored month use the last row (the most recent macro
+    data known when the artifacts were built); months before the first row and
+    records without a date get NaN, which the imputation step then fills.
+
+    Args:
+        start_month (str): First month as "YYYY-MM".
+        columns (list[str]): Macro feature names (e.g. SELIC, SELIC_LAG1, ...).
+        values (list[list[float]]): One row per consecutive month; None = missing.
+    """
+
+    def __init__(self, start_month: str, columns: List[str], values: List[List[Optional[float]]]):
+        self.start_month = start_month
+        self.start = month_ordinal(start_month)
+        self.columns = list(columns)
+        self.n_months = len(values)
+
+        # Extra all-NaN row at the end, addressed by months before the table starts
+        table = np.full((self.n_months + 1, len(self.columns)), np.nan, dtype=np.float64)
+        if self.n_months:
+            table[:-1] = np.array(values, dtype=np.float64).reshape(self.n_months, len(self.columns))
+        self._values = table
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+
+    @property
+    def feature_names(self) -> List[str]:
+        """Every feature this table can fill: macro columns plus calendar features."""
+        return self.columns + [f for f in CALENDAR_FEATURES if f not in self._column_index]
+
+    @property
+    def end_month(self) -> Optional[str]:
+        if not self.n_months:
+            return None
+        last = self.start + self.n_months - 1
+        return f"{last // 12:04d}-{last % 12 + 1:02d}"
+
+    # ============================================================
+    # Lookup
+    # ============================================================
+    def _row(self, ordinal: int) -> int:
+        offset = ordinal - self.start
+        if offset < 0 or not self.n_months:
+            return self.n_months
+        return min(offset, self.n_months - 1)
+
+    def value(self, feature: str, ordinal: Optional[int]) -> float:
+        """Value of one feature for one month ordinal (NaN when unknown)."""
+        if ordinal is None:
+            return np.nan
+        if feature == "MONTH_OF_YEAR" and feature not in self._column_index:
+            return float(ordinal % 12 + 1)
+        if feature == "YEAR" and feature not in self._column_index:
+            return float(ordinal // 12)
+        return float(self._values[self._row(ordinal), self._column_index[feature]])
+
+    def lookup(self, application_date: Any) -> Dict[str, float]:
+        """All features for one application date."""
+        ordinal = month_ordinal(application_date)
+        return {feature: self.value(feature, ordinal) for feature in self.feature_names}
+
+    @staticmethod
+    def ordinals(values: Any) -> np.ndarray:
+        """Month ordinals for many dates (float64, NaN where the date is missing)."""
+        if isinstance(values, np.ndarray) and values.dtype.kind == "M":
+            months = values.astype("datetime64[M]")
+            ordinals = months.astype(np.int64).astype(np.float64) + 1970 * 12
+            ordinals[np.isnat(months)] = np.nan
+            return ordinals
+
+        def ordinal_or_nan(value):
+            ordinal = month_ordinal(value)
+            return np.nan if ordinal is None else ordinal
+
+        return np.fromiter((ordinal_or_nan(v) for v in values), dtype=np.float64, count=len(values))
+
+    def column(self, feature: str, ordinals: np.ndarray) -> np.ndarray:
+        """Vectorized `value`: one feature for an array of month ordinals."""
+        missing = np.isnan(ordinals)
+        if feature in CALENDAR_FEATURES and feature not in self._column_index:
+            safe = np.where(missing, 0, ordinals).astype(np.int64)
+            column = (safe % 12 + 1 if feature == "MONTH_OF_YEAR" else safe // 12).astype(np.float64)
+            column[missing] = np.nan
+            return column
+
+        if not self.n_months:
+            return np.full(len(ordinals), np.nan)
+        offsets = np.where(missing, -1, ordinals - self.start).astype(np.int64)
+        rows = np.where(offsets < 0, self.n_months, np.minimum(offsets, self.n_months - 1))
+        return self._values[rows, self._column_index[feature]]
+
+    def enrich_frame(self, df, features: Optional[List[str]] = None):
+        """
+        Fills missing macro / calendar columns of a DataFrame from its APPLICATION_DATE
+        column. Values the caller sent are kept.
+
+        Args:
+            df (pd.DataFrame): Raw inputs with cleaned column names.
+            features (list[str], optional): Only fill these (e.g. the model's features).
+
+        Returns:
+            pd.DataFrame: `df` with the columns filled (a copy when anything changed).
+        """
+        if APPLICATION_DATE not in df.columns:
+            return df
+        targets = [f for f in self.feature_names if features is None or f in features]
+        if not targets:
+            return df
+
+        ordinals = self.ordinals(df[APPLICATION_DATE].to_numpy())
+        df = df.copy()
+        for feature in targets:
+            looked_up = self.column(feature, ordinals)
+            if feature in df.columns:
+                current = df[feature].to_numpy(dtype=np.float64, na_value=np.nan)
+                df[feature] = np.where(np.isnan(current), looked_up, current)
+            else:
+                df[feature] = looked_up
+        return df
+
+    # ============================================================
+    # Persistence
+    # ============================================================
+    def to_dict(self) -> Dict[str, Any]:
+        values = [
+            [None if math.isnan(v) else v for v in row]
+            for row in self._values[:-1].tolist()
+        ]
+        return {"start_month": self.start_month, "columns": self.columns, "values": values}
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "MacroTable":
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(data["start_month"], data["columns"], data["values"])
@@ -1,9 +1,16 @@
 # FILE: src/main.py
 
-from fastapi import FastAPI, HTTPException
-import pandas as pd
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
+from pydantic import ValidationError
+from typing import Any, List, Optional
+import hmac
 import os
 import sys
+import time
 
 # -----------------------------------------
 # Resolve project root dynamically
@@ -19,51 +26,298 @@ if SRC_PATH not in sys.path:
 # -----------------------------------------
 # Imports from project modules
 # -----------------------------------------
+from src.batching import MicroBatcher
+from src.bundle import is_bundle
+from src.cache import PredictionCache
+from src.drift import DRIFT_REFERENCE_FILE, DriftMonitor
+from src.metrics import MetricsMiddleware, ServiceMetrics
 from src.predict import PredictionHandler
-from src.schemas import LoanApplicationRawInput, PredictionResponse
+from src.profiler import SamplingProfiler
+from src.registry import ModelRegistry, rebalance
+from src.registry_state import STATE_FILE_NAME, DesiredState, RegistrySync, registry_snapshot
+from src.schemas import (
+    LoanApplicationRawInput,
+    build_compact_input_model,
+    PredictionResponse,
+    BatchPredictionItem,
+    BatchPredictionResponse,
+    ExplanationResponse,
+    BatchExplanationItem,
+    BatchExplanationResponse,
+    ModelLoadRequest,
+    TrafficSplitRequest,
+)
+from src.loading import handler_spec, load_handler
 
 # -----------------------------------------
 # Paths to model artifacts
 # -----------------------------------------
-MODEL_DIR = os.path.join(PROJECT_BASE_PATH, "models")
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(PROJECT_BASE_PATH, "models"))
 
 MODEL_PATH = os.path.join(MODEL_DIR, "final_lgbm_model.pkl")
 IMPUTATION_PATH = os.path.join(MODEL_DIR, "final_imputation_map.json")
 ENCODER_PATH = os.path.join(MODEL_DIR, "final_target_encoder.pkl")
 FEATURES_PATH = os.path.join(MODEL_DIR, "FINAL_MODEL_FEATURES.json")
 
+# Month -> macro features (python -m src.macro --export-table); optional
+MACRO_TABLE_PATH = os.getenv("MACRO_TABLE_PATH", os.path.join(MODEL_DIR, "macro_table.json"))
+
+# Training-time feature/score distribution for the legacy artifacts (python -m src.drift);
+# bundles carry their own
+DRIFT_REFERENCE_PATH = os.getenv("DRIFT_REFERENCE_PATH", os.path.join(MODEL_DIR, DRIFT_REFERENCE_FILE))
+
+# Versioned serving bundle (python -m src.bundle export); preferred when present
+BUNDLE_DIR = os.getenv("MODEL_BUNDLE_DIR", os.path.join(MODEL_DIR, "bundle"))
+USE_BUNDLE = is_bundle(BUNDLE_DIR)
+
+# Scoring engine: "sklearn" (LGBMClassifier), "booster" (raw lightgbm.Booster)
+# or "numpy" (pure-NumPy tree evaluator). Bundles do not store the sklearn wrapper.
+PREDICTOR_BACKEND = os.getenv("PREDICTOR_BACKEND", "booster" if USE_BUNDLE else "sklearn")
+
+# Upper bound on records accepted by /predict/batch in a single request
+BATCH_MAX_RECORDS = int(os.getenv("BATCH_MAX_RECORDS", "100000"))
+
+# In-process prediction cache keyed on the final feature vector (0 = disabled)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "0"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300"))
+
+# Micro-batching: coalesce concurrent /predict calls into one model call
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+
+# Prometheus /metrics with per-stage latency histograms
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Input-drift monitor (/drift) for every version that ships a drift reference
+DRIFT_MONITOR_ENABLED = os.getenv("DRIFT_MONITOR_ENABLED", "true").lower() in ("1", "true", "yes")
+DRIFT_WINDOW_SECONDS = float(os.getenv("DRIFT_WINDOW_SECONDS", "3600"))
+DRIFT_BUFFER_SIZE = int(os.getenv("DRIFT_BUFFER_SIZE", "16384"))
+DRIFT_MIN_RECORDS = int(os.getenv("DRIFT_MIN_RECORDS", "500"))
+
+# Sampling profiler endpoints under /debug/profiler (off by default)
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Model registry: label of the startup model, directory new versions may be
+# loaded from, and token required by the /models admin endpoints (unset = disabled)
+MODEL_VERSION = os.getenv("MODEL_VERSION")
+MODEL_REGISTRY_ROOT = os.path.realpath(os.getenv("MODEL_REGISTRY_ROOT", MODEL_DIR))
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN")
+
+# Desired registry state shared by all workers (written by the admin endpoints,
+# polled by every worker every MODEL_REGISTRY_SYNC_SECONDS)
+MODEL_REGISTRY_STATE_FILE = os.getenv(
+    "MODEL_REGISTRY_STATE_FILE", os.path.join(MODEL_REGISTRY_ROOT, STATE_FILE_NAME)
+)
+MODEL_REGISTRY_SYNC_SECONDS = float(os.getenv("MODEL_REGISTRY_SYNC_SECONDS", "1"))
+
+
+def _new_cache():
+    # One cache per model version: a shared cache would be flushed on every fingerprint change
+    if PREDICTION_CACHE_SIZE > 0:
+        return PredictionCache(max_size=PREDICTION_CACHE_SIZE, ttl_seconds=PREDICTION_CACHE_TTL_SECONDS)
+    return None
+
 # -----------------------------------------
 # Load Prediction Handler ONCE at startup
 # -----------------------------------------
+prediction_cache = _new_cache()
+
 prediction_handler = None
 try:
-    prediction_handler = PredictionHandler(
-        model_path=MODEL_PATH,
-        imputation_path=IMPUTATION_PATH,
-        encoder_path=ENCODER_PATH,
-        features_path=FEATURES_PATH
-    )
+    if USE_BUNDLE:
+        prediction_handler = PredictionHandler.from_bundle(
+            BUNDLE_DIR, backend=PREDICTOR_BACKEND, cache=prediction_cache
+        )
+    else:
+        prediction_handler = PredictionHandler(
+            model_path=MODEL_PATH,
+            imputation_path=IMPUTATION_PATH,
+            encoder_path=ENCODER_PATH,
+            features_path=FEATURES_PATH,
+            backend=PREDICTOR_BACKEND,
+            cache=prediction_cache,
+            macro_table_path=MACRO_TABLE_PATH if os.path.exists(MACRO_TABLE_PATH) else None,
+            drift_reference_path=DRIFT_REFERENCE_PATH if os.path.exists(DRIFT_REFERENCE_PATH) else None
+        )
     print("✅ PredictionHandler initialized successfully.")
 
 except Exception as e:
     print(f"❌ CRITICAL ERROR: Failed to load model artifacts: {e}")
 
+# -----------------------------------------
+# Metrics and model registry
+# -----------------------------------------
+metrics = ServiceMetrics() if METRICS_ENABLED else None
+
+
+def _new_batcher(handler):
+    return MicroBatcher(
+        handler.predict_proba_batch,
+        max_batch_size=MICROBATCH_MAX_SIZE,
+        max_wait_ms=MICROBATCH_MAX_WAIT_MS
+    )
+
+
+def _new_drift_monitor(handler):
+    if handler.drift_reference is None:
+        print(f"⚠️ No drift reference for model {handler.model_version}; /drift will not report it.")
+        return None
+    return DriftMonitor(
+        handler.drift_reference,
+        capacity=DRIFT_BUFFER_SIZE,
+        window_seconds=DRIFT_WINDOW_SECONDS,
+        min_records=DRIFT_MIN_RECORDS
+    )
+
+
+registry = ModelRegistry(
+    batcher_factory=_new_batcher if MICROBATCH_ENABLED else None,
+    monitor_factory=_new_drift_monitor if DRIFT_MONITOR_ENABLED else None,
+    metrics_registry=metrics.registry if metrics else None
+)
+
+if prediction_handler:
+    if metrics:
+        prediction_handler.stage_observer = metrics.observe_stage
+    try:
+        registry.add(
+            MODEL_VERSION or prediction_handler.model_version, prediction_handler,
+            source={"bundle_dir": BUNDLE_DIR} if USE_BUNDLE else {"model_dir": MODEL_DIR}
+        )
+    except Exception as e:
+        print(f"❌ CRITICAL ERROR: Model failed warm-up: {e}")
+        prediction_handler = None
+
+
+def _version_loader(entry: dict):
+    """Loader for one version of the desired state ({"bundle_dir" | "model_dir": ..., "backend": ...})."""
+    backend = entry.get("backend") or PREDICTOR_BACKEND
+    if entry.get("bundle_dir"):
+        spec = {"bundle_dir": entry["bundle_dir"], "backend": backend}
+    else:
+        spec = handler_spec(model_dir=entry["model_dir"], backend=backend, prefer_bundle=False)
+
+    def loader():
+        handler = load_handler(spec, cache=_new_cache())
+        if metrics:
+            handler.stage_observer = metrics.observe_stage
+        return handler
+    return loader
+
+
+# Every worker converges on the state file the admin endpoints write
+desired_state = DesiredState(MODEL_REGISTRY_STATE_FILE)
+registry_sync = RegistrySync(
+    registry, desired_state, _version_loader, interval_seconds=MODEL_REGISTRY_SYNC_SECONDS
+) if MODEL_ADMIN_TOKEN else None
+
+
+def _primary_stats(component: str) -> dict:
+    """stats() of the primary version's cache, micro-batcher or drift monitor ({} if absent)."""
+    primary = registry.primary
+    if primary is None:
+        return {}
+    target = {
+        "cache": primary.handler.cache,
+        "batcher": primary.batcher,
+        "drift": primary.handler.drift_monitor,
+    }[component]
+    return target.stats() if target else {}
+
+
+def _primary_drift_psi() -> dict:
+    primary = registry.primary
+    monitor = primary.handler.drift_monitor if primary else None
+    return {(name,): psi for name, psi in monitor.psi_by_column().items()} if monitor else {}
+
+
+if metrics:
+    if PREDICTION_CACHE_SIZE > 0:
+        metrics.add_gauges(
+            "prediction_cache", lambda: _primary_stats("cache"),
+            ("size", "hits", "misses", "evictions", "expirations", "invalidations"), "Prediction cache"
+        )
+    if MICROBATCH_ENABLED:
+        metrics.add_gauges(
+            "microbatcher", lambda: _primary_stats("batcher"),
+            ("queue_depth", "requests_total", "batches_total", "errors_total", "mean_batch_size", "last_flush_ms"),
+            "Micro-batcher"
+        )
+    if DRIFT_MONITOR_ENABLED:
+        metrics.add_gauges(
+            "drift_monitor", lambda: _primary_stats("drift"),
+            ("records_total", "dropped_total", "pending"), "Drift monitor"
+        )
+        metrics.registry.gauge(
+            "drift_psi", "Population stability index vs. training, per model feature and score (primary version).",
+            ("feature",), fn=_primary_drift_psi
+        )
+
+# Request model for /predict/fast: only the raw fields the loaded versions read
+_compact_models = {}
+
+
+def _compact_input_model():
+    fields = []
+    for entry in registry.versions.values():
+        plan = entry.handler.feature_plan
+        if plan is None:
+            return LoanApplicationRawInput
+        fields.extend(f for f in plan.input_fields if f not in fields)
+
+    key = tuple(fields)
+    if key not in _compact_models:
+        _compact_models[key] = build_compact_input_model(fields) if fields else LoanApplicationRawInput
+    return _compact_models[key]
+
+
+CompactInput = _compact_input_model()
+if CompactInput is not LoanApplicationRawInput:
+    print(f"✅ Compact request schema: {len(CompactInput.model_fields)} of "
+          f"{len(LoanApplicationRawInput.model_fields)} fields.")
+
+profiler = SamplingProfiler() if PROFILER_ENABLED else None
+
+
+def _observe_parse(request: Request, stage: str = "request_parse"):
+    """Records request parsing time (body read + JSON + validation) since middleware arrival."""
+    received_at = getattr(request.state, "received_at", None) if metrics else None
+    if received_at is not None:
+        metrics.observe_stage(stage, time.perf_counter() - received_at)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await registry.start()
+    if registry_sync:
+        await registry_sync.start()
+    if MICROBATCH_ENABLED:
+        print(f"✅ Micro-batching enabled (max_size={MICROBATCH_MAX_SIZE}, max_wait={MICROBATCH_MAX_WAIT_MS}ms).")
+    yield
+    if registry_sync:
+        await registry_sync.stop()
+    await registry.stop()
+
 # -----------------------------------------
 # FastAPI Setup
 # -----------------------------------------
 app = FastAPI(
     title="Home Credit Default Risk Predictor",
     description="Predicts the probability of loan default (TARGET=1) using the final LightGBM model.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+if metrics:
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
 
 # -----------------------------------------
 # Healthcheck Endpoint
 # -----------------------------------------
 @app.get("/health")
 def health_check():
-    if prediction_handler and hasattr(prediction_handler, "model") and prediction_handler.model:
-        return {"status": "ok", "model_ready": True}
+    primary = registry.primary
+    if primary is not None:
+        return {"status": "ok", "model_ready": True, "model_version": primary.version}
     else:
         raise HTTPException(
             status_code=503,
@@ -73,30 +327,424 @@ def health_check():
 # -----------------------------------------
 # Prediction Endpoint
 # -----------------------------------------
+def _resolve_version(requested: Optional[str], routing_key: Any = None):
+    try:
+        return registry.resolve(requested, routing_key=routing_key)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {requested!r} is not loaded.")
+    except LookupError:
+        raise HTTPException(status_code=503, detail="Prediction service not initialized.")
+
+
+async def _score(raw_data: dict, response: Response, requested_version: Optional[str]) -> PredictionResponse:
+    # Extract SK_ID before preprocessing; it also keeps A/B assignment sticky per applicant
+    sk_id = raw_data.pop("SK_ID_CURR")
+    entry = _resolve_version(requested_version, routing_key=sk_id)
+    response.headers["X-Model-Version"] = entry.version
+
+    start = time.perf_counter()
+    try:
+        if entry.batcher:
+            probability = await entry.batcher.submit(raw_data)
+        else:
+            probability = await run_in_threadpool(entry.handler.predict_proba, raw_data)
+
+    except Exception as e:
+        registry.record(entry, time.perf_counter() - start, error=True)
+        print(f"Prediction Error for SK_ID {sk_id} (model {entry.version}): {e}")
+        raise HTTPException(status_code=500, detail="Internal prediction failure.")
+
+    registry.record(entry, time.perf_counter() - start, (probability,))
+    return PredictionResponse(
+        SK_ID_CURR=sk_id,
+        probability_of_default=probability,
+        model_version=entry.version
+    )
+
+
 @app.post("/predict", response_model=PredictionResponse)
-def predict_loan_default(raw_input: LoanApplicationRawInput):
+async def predict_loan_default(raw_input: LoanApplicationRawInput, request: Request, response: Response,
+                               x_model_version: Optional[str] = Header(None)):
     """
     Receives raw loan application data, preprocesses according to model pipeline,
     and returns default probability.
+    The `X-Model-Version` header pins the request to a loaded model version.
     """
+    raw_data = raw_input.model_dump()
+    _observe_parse(request)
+    return await _score(raw_data, response, x_model_version)
 
-    if not prediction_handler or not hasattr(prediction_handler, "model") or not prediction_handler.model:
-        raise HTTPException(status_code=503, detail="Prediction service not initialized.")
 
-    # Convert input to dict
-    raw_data = raw_input.model_dump()
+@app.post(
+    "/predict/fast",
+    response_model=PredictionResponse,
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": CompactInput.model_json_schema()}},
+    }},
+)
+async def predict_loan_default_fast(request: Request, response: Response,
+                                    x_model_version: Optional[str] = Header(None)):
+    """
+    Same contract as /predict, but the raw body is parsed and validated in one
+    pass against the compact schema: only the fields the model reads are
+    validated, all other fields are skipped.
+    """
+    try:
+        raw_input = _compact_input_model().model_validate_json(await request.body())
+        raw_data = raw_input.model_dump()
+    except ValidationError as e:
+        # Same error shape as FastAPI's own body validation
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+    _observe_parse(request)
+
+    return await _score(raw_data, response, x_model_version)
 
-    # Extract SK_ID before preprocessing
+
+# -----------------------------------------
+# Prediction Cache Metrics
+# -----------------------------------------
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss/eviction counters of the in-process prediction cache (primary version, then per version)."""
+    if PREDICTION_CACHE_SIZE <= 0:
+        return {"enabled": False}
+    versions = {v: e.handler.cache.stats() for v, e in registry.versions.items() if e.handler.cache}
+    return {"enabled": True, **_primary_stats("cache"), "versions": versions}
+
+# -----------------------------------------
+# Micro-batching Metrics
+# -----------------------------------------
+@app.get("/batcher/stats")
+def batcher_stats():
+    """Queue depth, batch-size distribution and flush latency of the micro-batcher (primary version, then per version)."""
+    if not MICROBATCH_ENABLED:
+        return {"enabled": False}
+    versions = {v: e.batcher.stats() for v, e in registry.versions.items() if e.batcher}
+    return {"enabled": True, **_primary_stats("batcher"), "versions": versions}
+
+# -----------------------------------------
+# Input Drift
+# -----------------------------------------
+@app.get("/drift")
+def drift_report(lifetime: bool = False, x_model_version: Optional[str] = Header(None)):
+    """
+    Live feature and score distributions vs. the training reference (PSI, KS,
+    missing share, quantiles) for the primary version or `X-Model-Version`,
+    over the sliding window or, with `lifetime=true`, since start.
+    """
+    if not DRIFT_MONITOR_ENABLED:
+        return {"enabled": False}
+    entry = registry.get(x_model_version) if x_model_version else registry.primary
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Model version {x_model_version!r} is not loaded.")
+    if entry.handler.drift_monitor is None:
+        raise HTTPException(status_code=404, detail=f"Model version {entry.version!r} has no drift reference.")
+
+    versions = {}
+    for version, other in registry.versions.items():
+        if other.handler.drift_monitor:
+            report = other.handler.drift_monitor.report()
+            versions[version] = {key: report[key] for key in ("status", "records", "max_psi", "drifted")}
+    return {"enabled": True, "model_version": entry.version,
+            **entry.handler.drift_monitor.report(lifetime=lifetime), "versions": versions}
+
+# -----------------------------------------
+# Batch Prediction Endpoint
+# -----------------------------------------
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'record'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def _check_batch_size(raw_inputs: List[Any]):
+    if len(raw_inputs) > BATCH_MAX_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(raw_inputs)} records (max {BATCH_MAX_RECORDS})."
+        )
+
+
+def _validate_batch(raw_inputs: List[Any], items: List[Any]):
+    """
+    Validates each record on its own so one bad row does not fail the batch.
+    Sets `error` or `SK_ID_CURR` on the matching item and returns the positions
+    and raw dicts (without SK_ID_CURR) of the valid records.
+    """
+    valid_positions, valid_records = [], []
+    for i, record in enumerate(raw_inputs):
+        try:
+            raw_data = LoanApplicationRawInput.model_validate(record).model_dump()
+        except ValidationError as e:
+            items[i].error = _format_validation_error(e)
+            continue
+
+        items[i].SK_ID_CURR = raw_data.pop("SK_ID_CURR")
+        valid_positions.append(i)
+        valid_records.append(raw_data)
+    return valid_positions, valid_records
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_loan_default_batch(raw_inputs: List[Any], request: Request, response: Response,
+                               x_model_version: Optional[str] = Header(None)):
+    """
+    Scores a list of raw loan applications in one vectorized pass.
+    Records that fail schema validation are reported individually and
+    do not prevent the remaining records from being scored.
+    The whole batch is scored by one model version (`X-Model-Version` or the split).
+    """
+    entry = _resolve_version(x_model_version)
+    response.headers["X-Model-Version"] = entry.version
+    _check_batch_size(raw_inputs)
+
+    items = [BatchPredictionItem(index=i) for i in range(len(raw_inputs))]
+    valid_positions, valid_records = _validate_batch(raw_inputs, items)
+    _observe_parse(request, stage="request_parse_batch")
+
+    if valid_records:
+        start = time.perf_counter()
+        try:
+            probabilities = entry.handler.predict_proba_batch(valid_records)
+
+        except Exception as e:
+            registry.record(entry, time.perf_counter() - start, error=True)
+            print(f"Batch Prediction Error ({len(valid_records)} records, model {entry.version}): {e}")
+            raise HTTPException(status_code=500, detail="Internal prediction failure.")
+        registry.record(entry, time.perf_counter() - start, probabilities)
+
+        for i, probability in zip(valid_positions, probabilities):
+            items[i].probability_of_default = float(probability)
+
+    return BatchPredictionResponse(
+        predictions=items,
+        n_success=len(valid_records),
+        n_failed=len(raw_inputs) - len(valid_records),
+        model_version=entry.version
+    )
+
+# -----------------------------------------
+# Explanation Endpoints (TreeSHAP contributions)
+# -----------------------------------------
+@app.post("/explain", response_model=ExplanationResponse)
+async def explain_loan_default(raw_input: LoanApplicationRawInput, request: Request, response: Response,
+                               top_k: Optional[int] = Query(None, ge=1, description="Keep the k largest contributions."),
+                               x_model_version: Optional[str] = Header(None)):
+    """
+    Scores one application and returns the per-feature contributions behind the
+    score (LightGBM TreeSHAP, log-odds), largest first. The probability comes
+    from the same pass and matches /predict.
+    """
+    raw_data = raw_input.model_dump()
+    _observe_parse(request)
     sk_id = raw_data.pop("SK_ID_CURR")
+    entry = _resolve_version(x_model_version, routing_key=sk_id)
+    response.headers["X-Model-Version"] = entry.version
 
+    start = time.perf_counter()
     try:
-        probability = prediction_handler.predict_proba(raw_data)
-
+        explanation = await run_in_threadpool(entry.handler.explain, raw_data, top_k)
     except Exception as e:
-        print(f"Prediction Error for SK_ID {sk_id}: {e}")
-        raise HTTPException(status_code=500, detail="Internal prediction failure.")
+        registry.record(entry, time.perf_counter() - start, error=True)
+        print(f"Explanation Error for SK_ID {sk_id} (model {entry.version}): {e}")
+        raise HTTPException(status_code=500, detail="Internal explanation failure.")
 
-    return PredictionResponse(
-        SK_ID_CURR=sk_id,
-        probability_of_default=probability
+    registry.record(entry, time.perf_counter() - start, (explanation["probability_of_default"],))
+    return ExplanationResponse(SK_ID_CURR=sk_id, model_version=entry.version, **explanation)
+
+
+@app.post("/explain/batch", response_model=BatchExplanationResponse)
+def explain_loan_default_batch(raw_inputs: List[Any], request: Request, response: Response,
+                               top_k: Optional[int] = Query(None, ge=1, description="Keep the k largest contributions."),
+                               x_model_version: Optional[str] = Header(None)):
+    """
+    /explain for a list of applications, in one vectorized TreeSHAP call.
+    Invalid records are reported individually, as in /predict/batch.
+    """
+    entry = _resolve_version(x_model_version)
+    response.headers["X-Model-Version"] = entry.version
+    _check_batch_size(raw_inputs)
+
+    items = [BatchExplanationItem(index=i) for i in range(len(raw_inputs))]
+    valid_positions, valid_records = _validate_batch(raw_inputs, items)
+    _observe_parse(request, stage="request_parse_batch")
+
+    if valid_records:
+        start = time.perf_counter()
+        try:
+            explanations = entry.handler.explain_batch(valid_records, top_k)
+        except Exception as e:
+            registry.record(entry, time.perf_counter() - start, error=True)
+            print(f"Batch Explanation Error ({len(valid_records)} records, model {entry.version}): {e}")
+            raise HTTPException(status_code=500, detail="Internal explanation failure.")
+        registry.record(entry, time.perf_counter() - start, [e["probability_of_default"] for e in explanations])
+
+        for i, explanation in zip(valid_positions, explanations):
+            items[i] = BatchExplanationItem(index=i, SK_ID_CURR=items[i].SK_ID_CURR, **explanation)
+
+    return BatchExplanationResponse(
+        explanations=items,
+        n_success=len(valid_records),
+        n_failed=len(raw_inputs) - len(valid_records),
+        model_version=entry.version
     )
+
+# -----------------------------------------
+# Model Registry (hot reload and A/B traffic)
+# -----------------------------------------
+def _check_admin(token: Optional[str]):
+    # Fail closed: without a configured token the write endpoints do not exist
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Model admin endpoints are disabled (MODEL_ADMIN_TOKEN unset).")
+    if token is None or not hmac.compare_digest(token.encode(), MODEL_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token.")
+
+
+def _registry_path(relative: str) -> str:
+    path = os.path.realpath(os.path.join(MODEL_REGISTRY_ROOT, relative))
+    if os.path.commonpath([path, MODEL_REGISTRY_ROOT]) != MODEL_REGISTRY_ROOT:
+        raise HTTPException(status_code=400, detail="Model path must be inside MODEL_REGISTRY_ROOT.")
+    if not os.path.isdir(path):
+        raise HTTPException(status_code=400, detail=f"Model path not found: {relative}")
+    return path
+
+
+@contextmanager
+def _update_desired_state():
+    """Read-modify-write of the desired state; seeded from this worker's registry on first use."""
+    try:
+        with desired_state.update(seed=lambda: registry_snapshot(registry)) as state:
+            yield state
+    except OSError as e:
+        print(f"❌ Cannot write registry state {desired_state.path}: {e}")
+        raise HTTPException(status_code=500, detail="Cannot write the desired registry state.")
+
+
+@app.get("/models")
+def list_models():
+    """Loaded versions, traffic split, background loads, per-version latency / score distribution and sync state."""
+    stats = registry.stats()
+    if registry_sync:
+        stats["desired_state"] = registry_sync.status()
+    return stats
+
+
+@app.post("/models/load", status_code=202)
+async def load_model(body: ModelLoadRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Declares a new model version; every worker loads it in the background and
+    warms it up before it receives traffic, while serving continues.
+    Poll GET /models for progress.
+    """
+    _check_admin(x_admin_token)
+    if bool(body.bundle_dir) == bool(body.model_dir):
+        raise HTTPException(status_code=400, detail="Provide exactly one of bundle_dir or model_dir.")
+
+    if body.bundle_dir:
+        entry = {"bundle_dir": _registry_path(body.bundle_dir)}
+    else:
+        entry = {"model_dir": _registry_path(body.model_dir)}
+    entry["backend"] = body.backend or PREDICTOR_BACKEND
+
+    with _update_desired_state() as state:
+        if body.version in state["versions"]:
+            raise HTTPException(status_code=409, detail=f"Model version {body.version!r} is already declared.")
+        state["versions"][body.version] = entry
+        if body.traffic_percent:
+            state["traffic"] = rebalance(state["traffic"], body.version, body.traffic_percent)
+
+    await registry_sync.refresh()
+    return {"version": body.version, **(registry.loading_status(body.version) or {"status": "ready"})}
+
+
+@app.put("/models/traffic")
+async def set_model_traffic(body: TrafficSplitRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Replaces the traffic split, e.g. {"weights": {"v1": 90, "v2": 10}}. Each worker
+    swaps it in atomically once all versions in it are loaded there.
+    """
+    _check_admin(x_admin_token)
+    weights = body.weights
+    if any(w < 0 for w in weights.values()) or abs(sum(weights.values()) - 100.0) > 1e-6:
+        raise HTTPException(status_code=400, detail="Traffic percentages must be >= 0 and sum to 100.")
+
+    with _update_desired_state() as state:
+        unknown = [v for v in weights if v not in state["versions"]]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Model version(s) not loaded: {', '.join(unknown)}")
+        state["traffic"] = {v: float(w) for v, w in weights.items() if w > 0}
+
+    await registry_sync.refresh()
+    return state["traffic"]
+
+
+@app.post("/models/{version}/activate")
+async def activate_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Sends 100% of split traffic to `version` (atomic swap; in-flight requests finish on their version)."""
+    _check_admin(x_admin_token)
+    with _update_desired_state() as state:
+        if version not in state["versions"]:
+            raise HTTPException(status_code=404, detail=f"Model version {version!r} is not loaded.")
+        state["traffic"] = {version: 100.0}
+
+    await registry_sync.refresh()
+    return state["traffic"]
+
+
+@app.delete("/models/{version}")
+async def unload_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Unloads a version that no longer receives split traffic, in every worker."""
+    _check_admin(x_admin_token)
+    with _update_desired_state() as state:
+        if version not in state["versions"]:
+            raise HTTPException(status_code=404, detail=f"Model version {version!r} is not loaded.")
+        if state["traffic"].get(version):
+            raise HTTPException(
+                status_code=409, detail=f"Model version {version!r} still receives traffic; shift it away first."
+            )
+        del state["versions"][version]
+
+    await registry_sync.refresh()
+    return {"unloaded": version}
+
+# -----------------------------------------
+# Prometheus Metrics
+# -----------------------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Request counts, errors, in-flight requests and per-stage latency histograms (Prometheus text format)."""
+    if not metrics:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false).")
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.registry.CONTENT_TYPE)
+
+# -----------------------------------------
+# Sampling Profiler (PROFILER_ENABLED=true)
+# -----------------------------------------
+# Stack dumps expose code paths and internals: same X-Admin-Token as /models
+if profiler:
+    @app.post("/debug/profiler/start")
+    def profiler_start(interval_ms: float = Query(5.0, ge=SamplingProfiler.MIN_INTERVAL_MS),
+                       x_admin_token: Optional[str] = Header(None)):
+        """Starts sampling all threads every `interval_ms` (clears previous samples)."""
+        _check_admin(x_admin_token)
+        try:
+            profiler.start(interval_ms=interval_ms)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return profiler.status()
+
+    @app.post("/debug/profiler/stop", response_class=PlainTextResponse)
+    def profiler_stop(x_admin_token: Optional[str] = Header(None)):
+        """Stops sampling and returns folded stacks (flamegraph.pl / speedscope input)."""
+        _check_admin(x_admin_token)
+        profiler.stop()
+        return PlainTextResponse(profiler.folded())
+
+    @app.get("/debug/profiler")
+    def profiler_status(x_admin_token: Optional[str] = Header(None)):
+        _check_admin(x_admin_token)
+        return profiler.status()
@@ -0,0 +1,309 @@
+# FILE: src/metrics.py
+#
+# Minimal in-process metrics with Prometheus text exposition (format 0.0.4):
+# counters, gauges and histograms, a per-stage latency clock for the
+# prediction pipeline, and a pure ASGI middleware for request counts,
+# errors, in-flight requests and latency.
+#
+# Metrics are per process. With several gunicorn workers each worker
+# reports its own series; scrape them per worker or aggregate downstream.
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; spans the ~10 us feature plan up to multi-second outliers
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ============================================================
+# Metric types
+# ============================================================
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}" for labels, v in items
+        ]
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], float]] = None):
+        """
+        Args:
+            fn (callable, optional): Read the value at scrape time instead of `set`/`inc`.
+                With labelnames, it returns {label tuple: value}.
+        """
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._fn = fn
+
+    def set(self, value: float, labels: Tuple = ()):
+        self._values[labels] = value
+
+    def inc(self, amount: float = 1.0, labels: Tuple = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Tuple = ()):
+        self.inc(-amount, labels)
+
+    def value(self, labels: Tuple = ()) -> float:
+        if self._fn is None:
+            return self._values.get(labels, 0.0)
+        return self._fn().get(labels, 0.0) if self.labelnames else self._fn()
+
+    def render(self) -> List[str]:
+        if self._fn is not None:
+            items = list(self._fn().items()) if self.labelnames else [((), self._fn())]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}" for labels, v in items
+        ]
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last = +Inf), sum, count]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, labels: Tuple = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, labels: Tuple = ()) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def snapshot(self, labels: Tuple = ()) -> Tuple[List[int], float, int]:
+        """Per-bucket (non-cumulative, last = +Inf) counts, sum and count of one series."""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                return [0] * (len(self.buckets) + 1), 0.0, 0
+            return list(series[0]), series[1], series[2]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items()]
+
+        lines = self._header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics by name and renders them in Prometheus text format."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Adds a metric created elsewhere (e.g. owned by the model registry)."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+              fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames, fn=fn))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ============================================================
+# Prediction pipeline stages
+# ============================================================
+class StageClock:
+    """
+    Lap timer for pipeline stages: each `lap(stage)` records the time since
+    the previous lap (or construction) and restarts the clock.
+    """
+
+    __slots__ = ("_observe", "_last")
+
+    def __init__(self, observe: Callable[[str, float], None]):
+        self._observe = observe
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self._observe(stage, now - self._last)
+        self._last = now
+
+
+class ServiceMetrics:
+    """
+    The API's metric set.
+
+    Attributes:
+        registry (MetricsRegistry): Everything rendered on /metrics.
+        stage_seconds (Histogram): Per-stage latency (parse, preprocessing steps, model).
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        self.requests_total = self.registry.counter(
+            "http_requests_total", "HTTP requests handled.", ("method", "path", "status")
+        )
+        self.request_errors_total = self.registry.counter(
+            "http_request_errors_total", "HTTP requests that failed with a 5xx or an exception.", ("method", "path")
+        )
+        self.requests_in_flight = self.registry.gauge(
+            "http_requests_in_flight", "HTTP requests currently being handled."
+        )
+        self.request_seconds = self.registry.histogram(
+            "http_request_duration_seconds", "End-to-end HTTP request latency.", ("method", "path")
+        )
+        self.stage_seconds = self.registry.histogram(
+            "prediction_stage_duration_seconds", "Latency of each prediction pipeline stage.", ("stage",)
+        )
+
+    def observe_stage(self, stage: str, seconds: float):
+        self.stage_seconds.observe(seconds, (stage,))
+
+    def stage_clock(self) -> StageClock:
+        return StageClock(self.observe_stage)
+
+    def add_gauges(self, prefix: str, stats: Callable[[], Dict], keys: Iterable[str], help_prefix: str):
+        """Exposes numeric entries of a `stats()` dict (cache, micro-batcher) as scrape-time gauges."""
+        for key in keys:
+            self.registry.gauge(
+                f"{prefix}_{key}", f"{help_prefix}: {key.replace('_', ' ')}.",
+                fn=lambda key=key: float(stats().get(key) or 0.0)
+            )
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task overhead) recording
+    request counts, 5xx/exception counts, in-flight requests and latency.
+
+    Requests are labelled by route template (e.g. `/predict`), not raw path,
+    to keep label cardinality bounded. Stores the arrival time in
+    `request.state.received_at` so endpoints can time request parsing.
+    """
+
+    def __init__(self, app, metrics: ServiceMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        start = time.perf_counter()
+        scope.setdefault("state", {})["received_at"] = start
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            metrics.requests_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            metrics.requests_total.inc((method, path, str(status)))
+            metrics.request_seconds.observe(time.perf_counter() - start, (method, path))
+            if status >= 500:
+                metrics.request_errors_total.inc((method, path))
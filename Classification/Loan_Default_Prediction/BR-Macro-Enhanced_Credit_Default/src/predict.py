@@ -1,12 +1,27 @@
 # FILE: src/predict.py
 
-import pandas as pd
+from __future__ import annotations
+
 import numpy as np
-import joblib
+import hashlib
 import json
 import re
-from typing import Any, Dict
-import category_encoders as ce
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from src.bundle import file_sha256, load_bundle
+from src.cache import PredictionCache
+from src.drift import DriftReference
+from src.feature_plan import FeaturePlan
+from src.macro_table import MacroTable
+from src.metrics import StageClock
+from src.predictors import (
+    ContributionExplainer, NumpyTreePredictor, SklearnPredictor, create_predictor, probe_matrix, verify_parity,
+)
+
+# pandas, joblib and category_encoders are imported lazily: the bundle +
+# FeaturePlan hot path never needs them, and they dominate cold start.
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class PredictionHandler:
@@ -18,10 +33,22 @@ class PredictionHandler:
     - Load imputation map (.json)
     - Load final feature list (12 features)
     - Reproduce feature engineering from training pipeline
+    - Fill macro features from the application month (optional MacroTable)
+    - Compile a pandas-free FeaturePlan for the scoring hot path
+    - Optionally cache probabilities by final feature vector (PredictionCache)
+    - Explain scores with per-feature TreeSHAP contributions (`explain`)
+    - Feed scored vectors to an optional input-drift monitor (`drift_monitor`)
+
+    Build it from the legacy pickle/JSON artifacts with the constructor, or
+    from a versioned serving bundle (src/bundle.py) with `from_bundle`.
     """
 
-    def __init__(self, model_path: str, imputation_path: str, encoder_path: str, features_path: str):
+    def __init__(self, model_path: str, imputation_path: str, encoder_path: str, features_path: str,
+                 backend: str = "sklearn", cache: Optional[PredictionCache] = None,
+                 macro_table_path: Optional[str] = None, drift_reference_path: Optional[str] = None):
         try:
+            import joblib
+
             # ----------------------------
             # Load final model (LightGBM)
             # ----------------------------
@@ -40,6 +67,7 @@ class PredictionHandler:
             # Load target encoder
             # ----------------------------
             self.target_encoder = joblib.load(encoder_path)
+            self.encoder_lookups = None
 
             # ----------------------------
             # Load final feature list (12 features)
@@ -47,14 +75,127 @@ class PredictionHandler:
             with open(features_path, "r") as f:
                 self.final_features = json.load(f)
 
-            self.expected_feature_count = len(self.final_features)
+            # ----------------------------
+            # Load macro lookup table (optional)
+            # ----------------------------
+            self.macro_table = MacroTable.load(macro_table_path) if macro_table_path else None
 
-            print(f"[INIT] Model ready. Using {self.expected_feature_count} final features.")
+            # ----------------------------
+            # Load training-time drift reference (optional, src.drift)
+            # ----------------------------
+            self.drift_reference = DriftReference.load(drift_reference_path) if drift_reference_path else None
+
+            self.bundle = None
+            artifact_paths = [model_path, imputation_path, encoder_path, features_path]
+            if macro_table_path:
+                artifact_paths.append(macro_table_path)
+            self.model_fingerprint = hashlib.sha256("".join(
+                file_sha256(path) for path in artifact_paths
+            ).encode()).hexdigest()
+            self.model_version = self.model_fingerprint[:12]
+            self._initialize(create_predictor(self.model, backend), cache=cache)
 
         except Exception as e:
             print(f"[CRITICAL] Failed to load model artifacts: {e}")
             raise
 
+    @classmethod
+    def from_bundle(cls, bundle_dir: str, backend: str = "booster", verify: bool = True,
+                    cache: Optional[PredictionCache] = None) -> "PredictionHandler":
+        """
+        Loads the handler from a serving bundle written by `src.bundle.export_bundle`.
+
+        Args:
+            bundle_dir (str): Bundle directory.
+            backend (str): "booster" (lightgbm.Booster) or "numpy" (memory-mapped
+                flat trees, no lightgbm import). The sklearn wrapper is not stored.
+            verify (bool): Check file checksums against the manifest.
+            cache (PredictionCache, optional): Probability cache, keyed per bundle fingerprint.
+        """
+        handler = cls.__new__(cls)
+        try:
+            bundle = load_bundle(bundle_dir, verify=verify)
+
+            if backend == "booster":
+                handler.model = bundle.load_booster()
+                predictor = create_predictor(handler.model, backend)
+            elif backend == "numpy":
+                handler.model = predictor = bundle.load_tree_predictor()
+            else:
+                raise ValueError(f"Backend {backend!r} is not available from a bundle; use 'booster' or 'numpy'.")
+
+            handler.imputation_map = bundle.imputation_map
+            handler.target_encoder = None
+            handler.encoder_lookups = bundle.encoder_lookups
+            handler.final_features = bundle.final_features
+            handler.macro_table = bundle.macro_table
+            handler.drift_reference = bundle.drift_reference
+            handler.bundle = bundle
+            handler.model_fingerprint = bundle.fingerprint
+            handler.model_version = bundle.version
+
+            # Parity of the stored trees was verified at export; checksums cover the rest
+            handler._initialize(predictor, check_parity=False, cache=cache)
+            print(f"[INIT] Loaded bundle {bundle.version} from {bundle_dir}.")
+
+        except Exception as e:
+            print(f"[CRITICAL] Failed to load model bundle: {e}")
+            raise
+        return handler
+
+    def _initialize(self, predictor, check_parity: bool = True, cache: Optional[PredictionCache] = None):
+        self.expected_feature_count = len(self.final_features)
+
+        # ----------------------------
+        # Scoring backend (sklearn | booster | numpy)
+        # ----------------------------
+        self.predictor = predictor
+        if check_parity and self.predictor.name != SklearnPredictor.name:
+            max_diff = verify_parity(
+                SklearnPredictor(self.model), self.predictor, probe_matrix(self.model)
+            )
+            print(f"[INIT] Backend '{self.predictor.name}' matches reference model (max |diff| = {max_diff:.1e}).")
+
+        # ----------------------------
+        # Compile fast path (falls back to the DataFrame pipeline)
+        # ----------------------------
+        self.feature_plan = self._compile_feature_plan()
+
+        # ----------------------------
+        # Prediction cache (invalidated when the model fingerprint changes)
+        # ----------------------------
+        self.cache = cache
+        if self.cache is not None:
+            self.cache.bind(self.model_fingerprint)
+
+        # Optional per-stage latency hook: observer(stage, seconds)
+        self.stage_observer = None
+
+        # TreeSHAP explainer, built on the first /explain call
+        self.explainer = None
+
+        # Optional DriftMonitor fed with every scored vector and its probability
+        self.drift_monitor = None
+        if self.drift_reference is not None and self.drift_reference.feature_names != list(self.final_features):
+            print("[INIT] ⚠️ Drift reference does not match the model features; drift monitoring disabled.")
+            self.drift_reference = None
+
+        print(f"[INIT] Model ready. Using {self.expected_feature_count} final features "
+              f"with the '{self.predictor.name}' backend.")
+        if self.macro_table is not None:
+            filled = [f for f in self.macro_table.feature_names if f in self.final_features]
+            span = (f"{self.macro_table.start_month}..{self.macro_table.end_month}"
+                    if self.macro_table.n_months else "(calendar only)")
+            print(f"[INIT] Macro table {span}: fills {len(filled)} model feature(s) from APPLICATION_DATE.")
+
+    def _compile_feature_plan(self):
+        try:
+            lookups = self.encoder_lookups or FeaturePlan.lookups_from_encoder(self.target_encoder)
+            return FeaturePlan(self.final_features, self.imputation_map, lookups, macro_table=self.macro_table)
+        except Exception as e:
+            print(f"[WARN] FeaturePlan unavailable, using DataFrame pipeline: {e}")
+            return None
+
     # ============================================================
     # Helper: clean column names consistently
     # ============================================================
@@ -97,8 +238,18 @@ class PredictionHandler:
     # Target Encoding (same as Notebook 03)
     # ============================================================
     def _apply_target_encoding(self, df: pd.DataFrame) -> pd.DataFrame:
+        import pandas as pd
+
         df = df.copy()
 
+        # Bundle: no fitted encoder, only its flattened lookup tables
+        if self.target_encoder is None:
+            for col, lookup in self.encoder_lookups.items():
+                if col in df.columns:
+                    df[f"{col}_TARGET_ENC"] = [FeaturePlan.encode_value(v, lookup) for v in df[col]]
+                    df = df.drop(columns=[col])
+            return df
+
         # If encoder stores .cols (categorical columns)
         if hasattr(self.target_encoder, "cols"):
             cat_cols = [c for c in self.target_encoder.cols if c in df.columns]
@@ -124,35 +275,285 @@ class PredictionHandler:
     # ============================================================
     # Preprocessing Pipeline (Core)
     # ============================================================
-    def preprocess(self, raw_input: Dict[str, Any]) -> pd.DataFrame:
-        df = pd.DataFrame([raw_input])
+    def _preprocess_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        clock = StageClock(self.stage_observer) if self.stage_observer else None
 
         # 1. Clean names
         df = self._clean_names(df)
+        if clock:
+            clock.lap("clean_names")
+
+        # 1b. Macro enrichment from the application month (only columns the model uses)
+        if self.macro_table is not None:
+            df = self.macro_table.enrich_frame(df, self.final_features)
+            if clock:
+                clock.lap("macro_enrichment")
 
         # 2. Feature Engineering
         df = self._feature_engineering(df)
+        if clock:
+            clock.lap("feature_engineering")
 
         # 3. Target Encoding
         df = self._apply_target_encoding(df)
+        if clock:
+            clock.lap("target_encoding")
 
         # 4. Clean names again (encoders may produce unexpected labels)
         df = self._clean_names(df)
 
         # 5. Align to final model features
         df = df.reindex(columns=self.final_features, fill_value=np.nan)
+        if clock:
+            clock.lap("align")
 
         # 6. Imputation (mean)
         for col, mean_val in self.imputation_map.items():
             if col in df.columns:
                 df[col] = df[col].fillna(mean_val)
+        if clock:
+            clock.lap("imputation")
 
+        # 7. Enforce numeric dtypes (all-missing columns arrive as object)
+        df = df.astype("float64")
+        if clock:
+            clock.lap("dtype_cast")
         return df
 
+    def preprocess(self, raw_input: Dict[str, Any]) -> pd.DataFrame:
+        import pandas as pd
+
+        return self._preprocess_frame(pd.DataFrame([raw_input]))
+
+    def preprocess_batch(self, records: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Vectorized version of `preprocess`: every step runs once over the
+        whole batch instead of once per record. Row order is preserved.
+        """
+        import pandas as pd
+
+        df = pd.DataFrame.from_records(records)
+        df.index = pd.RangeIndex(len(df))
+        return self._preprocess_frame(df)
+
     # ============================================================
     # Predict Probability
     # ============================================================
     def predict_proba(self, raw_input: Dict[str, Any]) -> float:
-        processed = self.preprocess(raw_input)
-        proba = float(self.model.predict_proba(processed)[0][1])
+        if self.feature_plan is not None:
+            clock = StageClock(self.stage_observer) if self.stage_observer else None
+            processed = self.feature_plan.transform(raw_input).reshape(1, -1)
+            if clock:
+                clock.lap("feature_plan")
+        else:
+            processed = self.preprocess(raw_input)
+            clock = StageClock(self.stage_observer) if self.stage_observer else None
+
+        key = None
+        if self.cache is not None:
+            key = PredictionCache.make_key(np.asarray(processed, dtype=np.float64))
+            cached = self.cache.get(key)
+            if clock:
+                clock.lap("cache_lookup")
+            if cached is not None:
+                if self.drift_monitor is not None:
+                    self.drift_monitor.observe(processed, cached)
+                return cached
+
+        proba = float(self.predictor.predict_proba(processed)[0])
+        if clock:
+            clock.lap("model")
+        if key is not None:
+            self.cache.put(key, proba)
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe(processed, proba)
         return proba
+
+    def transform_frame(self, df: pd.DataFrame):
+        """Model inputs for a DataFrame of raw inputs (ndarray on the fast path, else DataFrame)."""
+        if self.feature_plan is not None:
+            renamed = df.rename(columns=self._clean_single_name, copy=False)
+            return self.feature_plan.transform_frame(renamed)
+        return self._preprocess_frame(df.reset_index(drop=True))
+
+    def predict_proba_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Scores a DataFrame of raw inputs (e.g. a chunk of a file) in one model call.
+        Bypasses the prediction cache and the drift monitor (offline scoring).
+
+        Args:
+            df (pd.DataFrame): Raw inputs, one row per application.
+
+        Returns:
+            np.ndarray: Probability of default for each row, in row order.
+        """
+        if len(df) == 0:
+            return np.empty(0, dtype=np.float64)
+        return self.predictor.predict_proba(self.transform_frame(df))
+
+    def predict_proba_batch(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Scores many records with a single model call.
+
+        Args:
+            records (list[dict]): Raw inputs, same format as `predict_proba`.
+
+        Returns:
+            np.ndarray: Probability of default for each record, in input order.
+        """
+        if not records:
+            return np.empty(0, dtype=np.float64)
+
+        if self.feature_plan is not None:
+            clock = StageClock(self.stage_observer) if self.stage_observer else None
+            processed = self.feature_plan.transform_batch(records)
+            if clock:
+                clock.lap("feature_plan_batch")
+        else:
+            processed = self.preprocess_batch(records)
+            clock = StageClock(self.stage_observer) if self.stage_observer else None
+
+        if self.cache is None:
+            probabilities = self.predictor.predict_proba(processed)
+            if clock:
+                clock.lap("model_batch")
+            if self.drift_monitor is not None:
+                self.drift_monitor.observe(processed, probabilities)
+            return probabilities
+
+        # Serve cached rows, score only the misses
+        keys = [PredictionCache.make_key(row) for row in np.asarray(processed, dtype=np.float64)]
+        probabilities = np.empty(len(keys), dtype=np.float64)
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                probabilities[i] = cached
+        if clock:
+            clock.lap("cache_lookup_batch")
+
+        if misses:
+            rows = processed[misses] if isinstance(processed, np.ndarray) else processed.iloc[misses]
+            scored = self.predictor.predict_proba(rows)
+            if clock:
+                clock.lap("model_batch")
+            for i, proba in zip(misses, scored):
+                probabilities[i] = proba
+                self.cache.put(keys[i], float(proba))
+
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe(processed, probabilities)
+        return probabilities
+
+    # ============================================================
+    # Explanations (per-feature contributions)
+    # ============================================================
+    CONTRIB_NAMESPACE = b"contrib:"
+
+    def _get_explainer(self) -> ContributionExplainer:
+        if self.explainer is None:
+            # numpy backend: the flat trees have no TreeSHAP, so load the bundle's booster once
+            model = self.bundle.load_booster() if isinstance(self.model, NumpyTreePredictor) else self.model
+            self.explainer = ContributionExplainer(model)
+        return self.explainer
+
+    def explain(self, raw_input: Dict[str, Any], top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Scores one record and explains the score.
+
+        Args:
+            raw_input (dict): Raw input, same format as `predict_proba`.
+            top_k (int, optional): Keep only the k largest contributions (by absolute value).
+
+        Returns:
+            dict: probability_of_default, base_value (expected log-odds) and
+                contributions sorted by |contribution|, each with the raw input
+                name (`feature`), the model feature, its model-space value and
+                its log-odds contribution.
+        """
+        if self.feature_plan is not None:
+            clock = StageClock(self.stage_observer) if self.stage_observer else None
+            processed = self.feature_plan.transform(raw_input).reshape(1, -1)
+            if clock:
+                clock.lap("feature_plan")
+        else:
+            processed = self.preprocess(raw_input).to_numpy(dtype=np.float64)
+            clock = StageClock(self.stage_observer) if self.stage_observer else None
+        return self._explain_processed(processed, top_k, clock, stage="explain")[0]
+
+    def explain_batch(self, records: List[Dict[str, Any]], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Vectorized `explain`: one TreeSHAP call for all cache misses.
+
+        Returns:
+            list[dict]: One explanation per record, in input order.
+        """
+        if not records:
+            return []
+
+        if self.feature_plan is not None:
+            clock = StageClock(self.stage_observer) if self.stage_observer else None
+            processed = self.feature_plan.transform_batch(records)
+            if clock:
+                clock.lap("feature_plan_batch")
+        else:
+            processed = self.preprocess_batch(records).to_numpy(dtype=np.float64)
+            clock = StageClock(self.stage_observer) if self.stage_observer else None
+        return self._explain_processed(processed, top_k, clock, stage="explain_batch")
+
+    def _explain_processed(self, processed: np.ndarray, top_k: Optional[int], clock: Optional[StageClock],
+                           stage: str) -> List[Dict[str, Any]]:
+        processed = np.asarray(processed, dtype=np.float64)
+        explainer = self._get_explainer()
+        contributions = np.empty((len(processed), self.expected_feature_count + 1), dtype=np.float64)
+
+        # Contributions are cached next to the probabilities, under their own key namespace
+        misses = list(range(len(processed)))
+        if self.cache is not None:
+            misses = []
+            for i, row in enumerate(processed):
+                cached = self.cache.get(PredictionCache.make_key(row, self.CONTRIB_NAMESPACE))
+                if cached is None:
+                    misses.append(i)
+                else:
+                    contributions[i] = cached
+            if clock:
+                clock.lap("cache_lookup" if stage == "explain" else "cache_lookup_batch")
+
+        if misses:
+            contributions[misses] = explainer.contributions(processed[misses])
+        probabilities = explainer.probabilities(contributions)
+        if clock:
+            clock.lap(stage)
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe(processed, probabilities)
+
+        if self.cache is not None:
+            # Fill the scoring cache too: /predict on the same vector is then a hit
+            for i in misses:
+                self.cache.put(PredictionCache.make_key(processed[i], self.CONTRIB_NAMESPACE), contributions[i].copy())
+                self.cache.put(PredictionCache.make_key(processed[i]), float(probabilities[i]))
+
+        input_names = [
+            f[:-len(FeaturePlan.ENCODED_SUFFIX)] if f.endswith(FeaturePlan.ENCODED_SUFFIX) else f
+            for f in self.final_features
+        ]
+        explanations = []
+        for row, values, probability in zip(contributions, processed, probabilities):
+            order = np.argsort(-np.abs(row[:-1]), kind="stable")[:top_k]
+            explanations.append({
+                "probability_of_default": float(probability),
+                "base_value": float(row[-1]),
+                "contributions": [
+                    {
+                        "feature": input_names[j],
+                        "model_feature": self.final_features[j],
+                        "value": None if np.isnan(values[j]) else float(values[j]),
+                        "contribution": float(row[j]),
+                    }
+                    for j in order
+                ],
+            })
+        return explanations
@@ -0,0 +1,391 @@
+# FILE: src/predictors.py
+
+import math
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+# LightGBM constants (include/LightGBM/meta.h, tree.h)
+_ZERO_THRESHOLD = 1e-35
+_MISSING_NONE = 0
+_MISSING_ZERO = 1
+_MISSING_NAN = 2
+_MISSING_TYPES = {"None": _MISSING_NONE, "Zero": _MISSING_ZERO, "NaN": _MISSING_NAN}
+
+
+def objective_sigmoid(objective: str) -> float:
+    """Sigmoid slope of a binary objective string from `dump_model()`, e.g. "binary sigmoid:1"."""
+    if not objective.startswith("binary"):
+        raise ValueError(f"Unsupported objective: {objective!r}.")
+    for token in objective.split()[1:]:
+        if token.startswith("sigmoid:"):
+            return float(token.split(":", 1)[1])
+    return 1.0
+
+
+def _default_num_threads() -> int:
+    return int(os.getenv("OMP_NUM_THREADS", "1").split(",")[0])
+
+
+def _get_booster(model):
+    """Returns the underlying `lightgbm.Booster` of a fitted model."""
+    booster = getattr(model, "booster_", None)
+    if booster is not None:
+        return booster
+    if hasattr(model, "dump_model") and hasattr(model, "predict"):
+        return model
+    raise TypeError(f"Cannot extract a LightGBM Booster from {type(model).__name__}.")
+
+
+# ============================================================
+# Backend 1: sklearn wrapper (reference)
+# ============================================================
+class SklearnPredictor:
+    """Calls `predict_proba` on the fitted `LGBMClassifier` (reference backend)."""
+
+    name = "sklearn"
+
+    def __init__(self, model):
+        if not hasattr(model, "predict_proba"):
+            raise TypeError("The 'sklearn' backend requires a fitted LGBMClassifier.")
+        self.model = model
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.model.predict_proba(X)[:, 1]
+
+
+# ============================================================
+# Backend 2: raw LightGBM Booster
+# ============================================================
+class BoosterPredictor:
+    """
+    Calls `lightgbm.Booster.predict` directly on contiguous float64 input,
+    skipping the sklearn wrapper's validation and conversions.
+
+    `num_threads` defaults to OMP_NUM_THREADS (1 when unset), so the same knob
+    controls this backend and the sklearn one.
+    """
+
+    name = "booster"
+
+    def __init__(self, booster, num_threads: Optional[int] = None):
+        self.booster = booster
+        self.num_threads = num_threads if num_threads is not None else _default_num_threads()
+
+    def predict_proba(self, X) -> np.ndarray:
+        if isinstance(X, np.ndarray):
+            X = np.ascontiguousarray(X, dtype=np.float64)
+        return self.booster.predict(X, num_threads=self.num_threads)
+
+
+# ============================================================
+# Backend 3: pure-NumPy tree evaluator
+# ============================================================
+class NumpyTreePredictor:
+    """
+    Evaluates a binary LightGBM model from `Booster.dump_model()` without
+    calling into LightGBM. All trees are flattened into shared node arrays;
+    leaves are nodes with `is_leaf=True` that carry the leaf value.
+
+    Single rows are walked in plain Python (lowest overhead); batches are
+    advanced level by level with vectorized NumPy indexing.
+    """
+
+    name = "numpy"
+
+    ARRAY_NAMES = (
+        "roots", "feature", "threshold", "default_left", "missing_type",
+        "left", "right", "is_leaf", "value", "meta",
+    )
+
+    def __init__(self, model_dump: Dict[str, Any]):
+        if model_dump.get("num_tree_per_iteration", 1) != 1:
+            raise ValueError("Only single-output (binary) models are supported.")
+        if model_dump.get("average_output"):
+            raise ValueError("Random forest (average_output) models are not supported.")
+
+        sigmoid = objective_sigmoid(model_dump.get("objective", ""))
+
+        n_features = model_dump["max_feature_idx"] + 1
+
+        feature, threshold, default_left, missing_type = [], [], [], []
+        left, right, is_leaf, value = [], [], [], []
+
+        def add_node(node: Dict[str, Any]) -> int:
+            idx = len(feature)
+            feature.append(0)
+            threshold.append(0.0)
+            default_left.append(False)
+            missing_type.append(_MISSING_NONE)
+            left.append(idx)
+            right.append(idx)
+
+            if "leaf_value" in node:
+                is_leaf.append(True)
+                value.append(float(node["leaf_value"]))
+                return idx
+
+            if node["decision_type"] != "<=":
+                raise ValueError("Categorical splits are not supported by the 'numpy' backend.")
+
+            is_leaf.append(False)
+            value.append(0.0)
+            feature[idx] = int(node["split_feature"])
+            threshold[idx] = float(node["threshold"])
+            default_left[idx] = bool(node["default_left"])
+            missing_type[idx] = _MISSING_TYPES[node["missing_type"]]
+            left[idx] = add_node(node["left_child"])
+            right[idx] = add_node(node["right_child"])
+            return idx
+
+        roots, depths = [], []
+        for tree in model_dump["tree_info"]:
+            roots.append(add_node(tree["tree_structure"]))
+            depths.append(self._depth(tree["tree_structure"]))
+
+        self._set_arrays({
+            "roots": np.array(roots, dtype=np.int64),
+            "feature": np.array(feature, dtype=np.int64),
+            "threshold": np.array(threshold, dtype=np.float64),
+            "default_left": np.array(default_left, dtype=bool),
+            "missing_type": np.array(missing_type, dtype=np.int8),
+            "left": np.array(left, dtype=np.int64),
+            "right": np.array(right, dtype=np.int64),
+            "is_leaf": np.array(is_leaf, dtype=bool),
+            "value": np.array(value, dtype=np.float64),
+            "meta": np.array([sigmoid, n_features, max(depths, default=0)], dtype=np.float64),
+        })
+
+    def _set_arrays(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.roots = arrays["roots"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.default_left = arrays["default_left"]
+        self.missing_type = arrays["missing_type"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.is_leaf = arrays["is_leaf"]
+        self.value = arrays["value"]
+
+        sigmoid, n_features, max_depth = arrays["meta"].tolist()
+        self.sigmoid = sigmoid
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+
+        # Plain-list copies for the single-row walk
+        self._roots = self.roots.tolist()
+        self._nodes = list(zip(
+            self.is_leaf.tolist(), self.feature.tolist(), self.threshold.tolist(),
+            self.default_left.tolist(), self.missing_type.tolist(),
+            self.left.tolist(), self.right.tolist(), self.value.tolist()
+        ))
+
+    # ============================================================
+    # Flat on-disk layout (one .npy per array, memory-mappable)
+    # ============================================================
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = "r") -> "NumpyTreePredictor":
+        """
+        Loads arrays written by `save`. With `mmap_mode="r"` the arrays are
+        backed by the page cache and shared between worker processes.
+        """
+        predictor = cls.__new__(cls)
+        predictor._set_arrays({
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in cls.ARRAY_NAMES
+        })
+        return predictor
+
+    @classmethod
+    def from_booster(cls, booster) -> "NumpyTreePredictor":
+        return cls(booster.dump_model())
+
+    @staticmethod
+    def _depth(node: Dict[str, Any]) -> int:
+        depth, stack = 0, [(node, 0)]
+        while stack:
+            current, d = stack.pop()
+            if "leaf_value" in current:
+                depth = max(depth, d)
+            else:
+                stack.append((current["left_child"], d + 1))
+                stack.append((current["right_child"], d + 1))
+        return depth
+
+    def _raw_score_row(self, row) -> float:
+        nodes = self._nodes
+        total = 0.0
+        for root in self._roots:
+            leaf, feat, thr, dleft, mtype, lchild, rchild, val = nodes[root]
+            while not leaf:
+                fval = row[feat]
+                if fval != fval and mtype != _MISSING_NAN:
+                    fval = 0.0
+                if (mtype == _MISSING_ZERO and -_ZERO_THRESHOLD <= fval <= _ZERO_THRESHOLD) or \
+                        (mtype == _MISSING_NAN and fval != fval):
+                    nxt = lchild if dleft else rchild
+                else:
+                    nxt = lchild if fval <= thr else rchild
+                leaf, feat, thr, dleft, mtype, lchild, rchild, val = nodes[nxt]
+            total += val
+        return total
+
+    def _raw_score_batch(self, X: np.ndarray) -> np.ndarray:
+        n_rows = X.shape[0]
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            rows, trees = np.nonzero(~self.is_leaf[node])
+            if rows.size == 0:
+                break
+            current = node[rows, trees]
+            mtype = self.missing_type[current]
+
+            fval = X[rows, self.feature[current]]
+            is_nan = np.isnan(fval)
+            fval = np.where(is_nan & (mtype != _MISSING_NAN), 0.0, fval)
+
+            use_default = ((mtype == _MISSING_ZERO) & (np.abs(fval) <= _ZERO_THRESHOLD)) | \
+                (is_nan & (mtype == _MISSING_NAN))
+            go_left = np.where(use_default, self.default_left[current], fval <= self.threshold[current])
+            node[rows, trees] = np.where(go_left, self.left[current], self.right[current])
+
+        # Sum trees in order, as LightGBM does, so results match bit for bit
+        leaf_values = self.value[node]
+        total = np.zeros(n_rows, dtype=np.float64)
+        for t in range(leaf_values.shape[1]):
+            total += leaf_values[:, t]
+        return total
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}.")
+
+        if X.shape[0] == 1:
+            raw = np.array([self._raw_score_row(X[0].tolist())])
+        else:
+            raw = self._raw_score_batch(X)
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * raw))
+
+
+# ============================================================
+# Feature contributions (TreeSHAP)
+# ============================================================
+class ContributionExplainer:
+    """
+    Per-feature contributions from LightGBM's native TreeSHAP
+    (`Booster.predict(pred_contrib=True)`), in log-odds.
+
+    Each row holds one contribution per feature plus the expected value (bias)
+    in the last column. Together they sum to the raw score, so the probability
+    comes out of the same call.
+    """
+
+    def __init__(self, model, num_threads: Optional[int] = None):
+        """
+        Args:
+            model: Fitted `LGBMClassifier` or `lightgbm.Booster`.
+            num_threads (int, optional): OpenMP threads; defaults to OMP_NUM_THREADS (1 when unset).
+        """
+        self.booster = _get_booster(model)
+        self.num_threads = num_threads if num_threads is not None else _default_num_threads()
+        self.sigmoid = objective_sigmoid(self.booster.dump_model(num_iteration=1).get("objective", ""))
+
+    def contributions(self, X) -> np.ndarray:
+        """(n_rows, n_features + 1) contributions; the last column is the bias."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return self.booster.predict(X, pred_contrib=True, num_threads=self.num_threads)
+
+    def probabilities(self, contributions: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * contributions.sum(axis=1)))
+
+
+# ============================================================
+# Factory & parity check
+# ============================================================
+PREDICTOR_BACKENDS = {
+    "sklearn": lambda model: SklearnPredictor(model),
+    "booster": lambda model: BoosterPredictor(_get_booster(model)),
+    "numpy": lambda model: NumpyTreePredictor.from_booster(_get_booster(model)),
+}
+
+
+def create_predictor(model, backend: str = "sklearn"):
+    """
+    Builds the scoring backend for a fitted LightGBM model.
+
+    Args:
+        model: Fitted `LGBMClassifier` (or `lightgbm.Booster` for non-sklearn backends).
+        backend (str): One of `PREDICTOR_BACKENDS` ("sklearn", "booster", "numpy").
+    """
+    if backend not in PREDICTOR_BACKENDS:
+        raise ValueError(
+            f"Unknown predictor backend {backend!r}. Choose from {sorted(PREDICTOR_BACKENDS)}."
+        )
+    return PREDICTOR_BACKENDS[backend](model)
+
+
+def probe_matrix(model, n_rows: int = 256, seed: int = 0) -> np.ndarray:
+    """
+    Builds inputs that exercise every split of the model: each cell is drawn
+    from the feature's split thresholds (exact and nudged to either side),
+    NaN or zero, so all branches and missing-value rules get visited.
+    """
+    model_dump = _get_booster(model).dump_model()
+    n_features = model_dump["max_feature_idx"] + 1
+
+    thresholds = [[] for _ in range(n_features)]
+    stack = [tree["tree_structure"] for tree in model_dump["tree_info"]]
+    while stack:
+        node = stack.pop()
+        if "leaf_value" in node:
+            continue
+        if node["decision_type"] == "<=":
+            thr = float(node["threshold"])
+            thresholds[node["split_feature"]].extend(
+                [thr, math.nextafter(thr, -math.inf), math.nextafter(thr, math.inf)]
+            )
+        stack.extend([node["left_child"], node["right_child"]])
+
+    rng = np.random.default_rng(seed)
+    X = np.empty((n_rows, n_features), dtype=np.float64)
+    for j in range(n_features):
+        candidates = np.array(thresholds[j] + [np.nan, 0.0], dtype=np.float64)
+        X[:, j] = rng.choice(candidates, size=n_rows)
+    return X
+
+
+def verify_parity(reference, candidate, X: np.ndarray, atol: float = 1e-9) -> float:
+    """
+    Compares two backends on the same inputs, row by row and as a batch.
+
+    Returns:
+        float: Maximum absolute probability difference.
+
+    Raises:
+        ValueError: If any difference exceeds `atol`.
+    """
+    expected = reference.predict_proba(X)
+    batch = candidate.predict_proba(X)
+    single = np.array([candidate.predict_proba(X[i:i + 1])[0] for i in range(len(X))])
+
+    max_diff = float(max(np.max(np.abs(batch - expected)), np.max(np.abs(single - expected))))
+    if max_diff > atol:
+        raise ValueError(
+            f"Backend '{candidate.name}' diverges from '{reference.name}': "
+            f"max |diff| = {max_diff:.3e} (atol={atol:.0e})."
+        )
+    return max_diff
@@ -0,0 +1,136 @@
+# FILE: src/profiler.py
+#
+# Low-overhead sampling profiler for capturing hot-path flame data under load.
+#
+# A daemon thread wakes every `interval_ms`, snapshots the stacks of all other
+# threads (sys._current_frames) and counts them in "folded" form
+# (`frame;frame;frame count`), which flamegraph.pl, speedscope and inferno
+# read directly. Nothing is traced between samples, so the cost is bounded by
+# the sampling rate, not by how much code runs.
+
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+
+class SamplingProfiler:
+    """
+    Start/stop sampling profiler producing folded stacks.
+
+    Idle frames (threads blocked in the event loop selector or a thread pool
+    queue) are dropped unless `include_idle` is set, so the output shows where
+    CPU time goes while requests are being served.
+    """
+
+    IDLE_FUNCTIONS = frozenset({"select", "poll", "epoll", "wait", "_worker", "get", "sleep", "run_forever"})
+
+    # Below this the sampler thread would hold the GIL more than the code it profiles
+    MIN_INTERVAL_MS = 1.0
+
+    def __init__(self, interval_ms: float = 5.0, max_depth: int = 64, include_idle: bool = False):
+        self.interval_ms = self._check_interval(interval_ms)
+        self.max_depth = max_depth
+        self.include_idle = include_idle
+
+        self._stacks: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ============================================================
+    # Control
+    # ============================================================
+    @classmethod
+    def _check_interval(cls, interval_ms: float) -> float:
+        if not (math.isfinite(interval_ms) and interval_ms >= cls.MIN_INTERVAL_MS):
+            raise ValueError(f"interval_ms must be a finite number >= {cls.MIN_INTERVAL_MS}, got {interval_ms}.")
+        return float(interval_ms)
+
+    def start(self, interval_ms: Optional[float] = None):
+        """
+        Clears previous samples and starts sampling (no-op when already running).
+        ValueError if `interval_ms` is below MIN_INTERVAL_MS or not finite.
+        """
+        if interval_ms is not None:
+            interval_ms = self._check_interval(interval_ms)
+        if self.running:
+            return
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+        self._stop.clear()
+        self.started_at, self.stopped_at = time.time(), None
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.stopped_at = time.time()
+
+    # ============================================================
+    # Sampling
+    # ============================================================
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        own_id = threading.get_ident()
+        interval = self.interval_ms / 1000.0
+
+        while not self._stop.wait(interval):
+            folded = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not self.include_idle and frame.f_code.co_name in self.IDLE_FUNCTIONS:
+                    continue
+
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(self._frame_label(frame))
+                    frame = frame.f_back
+                folded.append(";".join(reversed(stack)))
+
+            with self._lock:
+                self._stacks.update(folded)
+                self.samples += 1
+
+    # ============================================================
+    # Output
+    # ============================================================
+    def folded(self) -> str:
+        """Collected stacks in folded format, one `stack count` line each, hottest first."""
+        with self._lock:
+            items = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def status(self) -> Dict[str, Any]:
+        end = self.stopped_at or time.time()
+        with self._lock:
+            distinct = len(self._stacks)
+        return {
+            "running": self.running,
+            "interval_ms": self.interval_ms,
+            "samples": self.samples,
+            "distinct_stacks": distinct,
+            "duration_s": (end - self.started_at) if self.started_at else 0.0,
+        }
@@ -0,0 +1,378 @@
+# FILE: src/registry.py
+#
+# In-service model registry: several PredictionHandler versions side by side,
+# background loading with warm-up, atomic traffic switches and A/B splits.
+#
+# Routing state is one immutable table replaced in a single assignment, so a
+# request sees either the old or the new routing, never a mix, and requests
+# already running keep the version they started with. A version only becomes
+# routable after it loaded and passed warm-up, so a rollout never exposes
+# cold-start latency or a model that fails to score.
+
+import asyncio
+import random
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.metrics import Histogram, MetricsRegistry
+
+# Probability-of-default buckets for the per-version score distribution
+SCORE_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def rebalance(weights: Dict[str, float], version: str, percent: float) -> Dict[str, float]:
+    """Gives `version` its share of `weights` and scales the others down proportionally."""
+    if not 0 <= percent <= 100:
+        raise ValueError("percent must be between 0 and 100.")
+    others = {v: w for v, w in weights.items() if v != version}
+    remaining = sum(others.values())
+    scale = (100.0 - percent) / remaining if remaining else 0.0
+    result = {v: w * scale for v, w in others.items()}
+    if percent > 0:
+        result[version] = float(percent)
+    if not remaining:
+        result = {version: 100.0}
+    return {v: w for v, w in result.items() if w > 0}
+
+
+class ModelVersion:
+    """
+    One servable model.
+
+    Attributes:
+        version (str): Version label used for routing and in responses.
+        handler (PredictionHandler): Loaded and warmed handler.
+        batcher (MicroBatcher, optional): Per-version micro-batcher.
+        source (dict): Where the artifacts came from (for /models).
+        loaded_at (float): Unix time the version became routable.
+        warmup_ms (float): Time spent in warm-up predictions.
+    """
+
+    def __init__(self, version: str, handler, batcher=None, source: Optional[Dict[str, Any]] = None,
+                 warmup_ms: float = 0.0):
+        self.version = version
+        self.handler = handler
+        self.batcher = batcher
+        self.source = source or {}
+        self.loaded_at = time.time()
+        self.warmup_ms = warmup_ms
+        self.requests_total = 0
+        self.records_total = 0
+        self.errors_total = 0
+
+
+class ModelRegistry:
+    """
+    Holds model versions and routes each request to one of them.
+
+    Routing, in order:
+    1. An explicit version (e.g. the `X-Model-Version` header) if it is loaded.
+    2. The traffic split (percentages per version). With a routing key such as
+       SK_ID_CURR, the same applicant always lands on the same version.
+    """
+
+    def __init__(self, warmup_records: Optional[List[Dict[str, Any]]] = None,
+                 batcher_factory: Optional[Callable[[Any], Any]] = None,
+                 monitor_factory: Optional[Callable[[Any], Any]] = None,
+                 metrics_registry: Optional[MetricsRegistry] = None):
+        """
+        Args:
+            warmup_records (list[dict], optional): Raw inputs scored before a
+                version is routable (default: one all-missing record, i.e. all imputed).
+            batcher_factory (callable, optional): handler -> MicroBatcher, for
+                per-version micro-batching.
+            monitor_factory (callable, optional): handler -> DriftMonitor or None,
+                attached as `handler.drift_monitor` after warm-up (src.drift).
+            metrics_registry (MetricsRegistry, optional): Where to expose the
+                per-version latency and score histograms (e.g. /metrics).
+        """
+        self.warmup_records = warmup_records or [{}]
+        self.batcher_factory = batcher_factory
+        self.monitor_factory = monitor_factory
+
+        self._versions: Dict[str, ModelVersion] = {}
+        # ((cumulative upper bound in [0, 100), ModelVersion), ...) + weights as configured
+        self._routes: Tuple[Tuple[float, ModelVersion], ...] = ()
+        self._weights: Dict[str, float] = {}
+        self._loading: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._tasks = set()
+
+        self.latency_seconds = Histogram(
+            "model_prediction_duration_seconds", "Scoring latency per model version.", ("version",)
+        )
+        self.scores = Histogram(
+            "model_probability_of_default", "Distribution of predicted probabilities per model version.",
+            ("version",), buckets=SCORE_BUCKETS
+        )
+        if metrics_registry is not None:
+            metrics_registry.register(self.latency_seconds)
+            metrics_registry.register(self.scores)
+
+    # ============================================================
+    # Lookup
+    # ============================================================
+    @property
+    def versions(self) -> Dict[str, ModelVersion]:
+        return dict(self._versions)
+
+    @property
+    def primary(self) -> Optional[ModelVersion]:
+        """Version with the largest traffic share (the one health and schemas follow)."""
+        if not self._weights:
+            return None
+        return self._versions[max(self._weights, key=self._weights.get)]
+
+    @property
+    def traffic(self) -> Dict[str, float]:
+        """Current split as configured (versions with a share > 0)."""
+        return dict(self._weights)
+
+    def get(self, version: str) -> Optional[ModelVersion]:
+        return self._versions.get(version)
+
+    def loading_status(self, version: str) -> Optional[Dict[str, Any]]:
+        """Status of the last background load of `version` (None if never loaded via `start_load`)."""
+        return self._loading.get(version)
+
+    def resolve(self, requested: Optional[str] = None, routing_key: Any = None) -> ModelVersion:
+        """
+        Picks the version for one request.
+
+        Args:
+            requested (str, optional): Explicit version; KeyError if not loaded.
+            routing_key (optional): Sticky key (e.g. SK_ID_CURR); random split if None.
+        """
+        if requested:
+            entry = self._versions.get(requested)
+            if entry is None:
+                raise KeyError(requested)
+            return entry
+
+        routes = self._routes
+        if not routes:
+            raise LookupError("No model version is receiving traffic.")
+        if len(routes) == 1:
+            return routes[0][1]
+
+        if routing_key is None:
+            point = random.random() * 100.0
+        else:
+            point = zlib.crc32(str(routing_key).encode()) % 10000 / 100.0
+        for upper, entry in routes:
+            if point < upper:
+                return entry
+        return routes[-1][1]
+
+    # ============================================================
+    # Loading and warm-up
+    # ============================================================
+    def _warm_up(self, handler) -> float:
+        """Scores the warm-up records through every path; refuses models that yield non-probabilities."""
+        cache, observer = handler.cache, handler.stage_observer
+        handler.cache, handler.stage_observer = None, None
+        try:
+            start = time.perf_counter()
+            single = [handler.predict_proba(dict(r)) for r in self.warmup_records]
+            batch = handler.predict_proba_batch([dict(r) for r in self.warmup_records])
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+        finally:
+            handler.cache, handler.stage_observer = cache, observer
+
+        scores = np.concatenate([np.asarray(single, dtype=np.float64), np.asarray(batch, dtype=np.float64)])
+        if not np.all((scores >= 0.0) & (scores <= 1.0)):
+            raise ValueError("Warm-up produced scores outside [0, 1].")
+        return elapsed_ms
+
+    def add(self, version: str, handler, traffic_percent: Optional[float] = None,
+            source: Optional[Dict[str, Any]] = None) -> ModelVersion:
+        """
+        Warms up and registers a loaded handler (synchronous; used at startup).
+        The batcher, if any, still has to be started with `start()`.
+
+        Args:
+            traffic_percent (float, optional): Share of traffic; the first
+                version defaults to 100, later ones to 0 (header-only).
+        """
+        if version in self._versions:
+            raise ValueError(f"Model version {version!r} is already loaded.")
+
+        warmup_ms = self._warm_up(handler)
+        # Attached after warm-up so the synthetic warm-up records are not monitored
+        if self.monitor_factory:
+            handler.drift_monitor = self.monitor_factory(handler)
+        batcher = self.batcher_factory(handler) if self.batcher_factory else None
+        entry = ModelVersion(version, handler, batcher=batcher, source=source, warmup_ms=warmup_ms)
+
+        with self._lock:
+            self._versions = {**self._versions, version: entry}
+            if traffic_percent is None:
+                traffic_percent = 100.0 if not self._weights else 0.0
+            if traffic_percent > 0:
+                self._rebalance(version, traffic_percent)
+        print(f"[REGISTRY] Model version {version!r} ready (warm-up {warmup_ms:.1f} ms).")
+        return entry
+
+    async def load(self, version: str, loader: Callable[[], Any], traffic_percent: Optional[float] = None,
+                   source: Optional[Dict[str, Any]] = None) -> ModelVersion:
+        """
+        Loads and warms a version in a worker thread, then makes it routable.
+        Serving continues on the current versions the whole time.
+        """
+        loop = asyncio.get_running_loop()
+        handler = await loop.run_in_executor(None, loader)
+        entry = await loop.run_in_executor(
+            None, lambda: self.add(version, handler, traffic_percent=0.0, source=source)
+        )
+        if entry.batcher:
+            await entry.batcher.start()
+        if getattr(handler, "drift_monitor", None):
+            await handler.drift_monitor.start()
+        if traffic_percent:
+            self.shift_traffic(version, traffic_percent)
+        return entry
+
+    def start_load(self, version: str, loader: Callable[[], Any], traffic_percent: Optional[float] = None,
+                   source: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Schedules `load` in the background (must be called from the event loop); returns its status."""
+        if version in self._versions or self._loading.get(version, {}).get("status") == "loading":
+            raise ValueError(f"Model version {version!r} is already loaded or loading.")
+
+        status = {"status": "loading", "started_at": time.time(), "source": source or {}}
+        self._loading[version] = status
+
+        async def run():
+            try:
+                await self.load(version, loader, traffic_percent=traffic_percent, source=source)
+                status.update(status="ready", finished_at=time.time())
+            except Exception as e:
+                status.update(status="failed", error=str(e), finished_at=time.time())
+                print(f"❌ Loading model version {version!r} failed: {e}")
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return status
+
+    async def start(self):
+        for entry in self._versions.values():
+            if entry.batcher:
+                await entry.batcher.start()
+            if getattr(entry.handler, "drift_monitor", None):
+                await entry.handler.drift_monitor.start()
+
+    async def stop(self):
+        for entry in self._versions.values():
+            if entry.batcher:
+                await entry.batcher.stop()
+            if getattr(entry.handler, "drift_monitor", None):
+                await entry.handler.drift_monitor.stop()
+
+    async def remove(self, version: str):
+        """Unloads a version that receives no split traffic; in-flight requests finish on it."""
+        with self._lock:
+            if self._weights.get(version):
+                raise ValueError(f"Model version {version!r} still receives traffic; shift it away first.")
+            entry = self._versions.get(version)
+            if entry is None:
+                raise KeyError(version)
+            self._versions = {k: v for k, v in self._versions.items() if k != version}
+        if entry.batcher:
+            await entry.batcher.stop()
+        if getattr(entry.handler, "drift_monitor", None):
+            await entry.handler.drift_monitor.stop()
+
+    # ============================================================
+    # Traffic
+    # ============================================================
+    def _publish(self, weights: Dict[str, float]):
+        upper, routes = 0.0, []
+        for version, weight in weights.items():
+            if weight > 0:
+                upper += weight
+                routes.append((upper, self._versions[version]))
+        self._weights = dict(weights)
+        self._routes = tuple(routes)  # single assignment: the atomic swap
+
+    def set_traffic(self, weights: Dict[str, float]):
+        """
+        Replaces the traffic split, e.g. {"v1": 90, "v2": 10}. Percentages must sum to 100.
+        """
+        unknown = [v for v in weights if v not in self._versions]
+        if unknown:
+            raise KeyError(", ".join(unknown))
+        if any(w < 0 for w in weights.values()) or abs(sum(weights.values()) - 100.0) > 1e-6:
+            raise ValueError("Traffic percentages must be >= 0 and sum to 100.")
+        with self._lock:
+            self._publish({v: float(w) for v, w in weights.items() if w > 0})
+
+    def activate(self, version: str):
+        """Sends all split traffic to `version` in one swap."""
+        self.set_traffic({version: 100.0})
+
+    def shift_traffic(self, version: str, percent: float):
+        with self._lock:
+            self._rebalance(version, percent)
+
+    def _rebalance(self, version: str, percent: float):
+        self._publish(rebalance(self._weights, version, percent))
+
+    # ============================================================
+    # Per-version stats
+    # ============================================================
+    def record(self, entry: ModelVersion, seconds: float, probabilities: Sequence[float] = (),
+               error: bool = False):
+        labels = (entry.version,)
+        # Called from the event loop and from threadpool endpoints alike
+        with self._lock:
+            entry.requests_total += 1
+            if error:
+                entry.errors_total += 1
+            else:
+                entry.records_total += len(probabilities)
+        if error:
+            return
+        self.latency_seconds.observe(seconds, labels)
+        for p in probabilities:
+            self.scores.observe(float(p), labels)
+
+    def _histogram_summary(self, histogram: Histogram, labels: Tuple) -> Dict[str, Any]:
+        counts, total, count = histogram.snapshot(labels)
+        if not count:
+            return {"count": 0}
+        summary = {"count": count, "mean": total / count}
+        cumulative = np.cumsum(counts)
+        bounds = histogram.buckets + (float("inf"),)
+        for q in (0.5, 0.9, 0.99):
+            index = int(np.searchsorted(cumulative, q * count))
+            summary[f"p{int(q * 100)}_le"] = bounds[min(index, len(bounds) - 1)]
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        versions = {}
+        for version, entry in self._versions.items():
+            with self._lock:
+                counts = (entry.requests_total, entry.records_total, entry.errors_total)
+            versions[version] = {
+                "traffic_percent": self._weights.get(version, 0.0),
+                "loaded_at": entry.loaded_at,
+                "warmup_ms": entry.warmup_ms,
+                "source": entry.source,
+                "model_fingerprint": getattr(entry.handler, "model_fingerprint", None),
+                "requests_total": counts[0],
+                "records_total": counts[1],
+                "errors_total": counts[2],
+                "latency_seconds": self._histogram_summary(self.latency_seconds, (version,)),
+                "probability_of_default": self._histogram_summary(self.scores, (version,)),
+            }
+        primary = self.primary
+        return {
+            "primary": primary.version if primary else None,
+            "traffic": dict(self._weights),
+            "versions": versions,
+            "loading": {v: s for v, s in self._loading.items() if v not in self._versions},
+        }
@@ -0,0 +1,208 @@
+# FILE: src/registry_state.py
+#
+# Desired state of the model registry, shared by every worker process.
+#
+# With gunicorn each worker has its own ModelRegistry, and an admin call only
+# reaches one of them. The admin endpoints therefore do not change a registry
+# directly: they write the desired versions and traffic split to one JSON file,
+# and every worker polls that file and converges on it (loads what is missing,
+# applies the split once all its versions are loaded, unloads what was dropped).
+#
+#   {
+#     "revision": 3,
+#     "updated_at": 1760000000.0,
+#     "versions": {"v1": {"bundle_dir": "/app/models/bundle", "backend": "booster"},
+#                  "v2": {"model_dir": "/app/models/v2", "backend": "booster"}},
+#     "traffic": {"v1": 90.0, "v2": 10.0}
+#   }
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from src.registry import ModelRegistry
+
+STATE_FILE_NAME = "registry_state.json"
+
+
+def same_split(a: Dict[str, float], b: Dict[str, float]) -> bool:
+    return a.keys() == b.keys() and all(abs(a[v] - w) < 1e-6 for v, w in b.items())
+
+
+def registry_snapshot(registry: ModelRegistry) -> Dict[str, Any]:
+    """Desired state describing what `registry` serves now (seeds a missing state file)."""
+    versions = {}
+    for version, entry in registry.versions.items():
+        backend = getattr(getattr(entry.handler, "predictor", None), "name", None)
+        versions[version] = {**entry.source, "backend": backend}
+    return {"revision": 0, "versions": versions, "traffic": registry.traffic}
+
+
+# ============================================================
+# State file
+# ============================================================
+class DesiredState:
+    """
+    The state file. Writers hold an exclusive lock on `<path>.lock` for the whole
+    read-modify-write and replace the file with an atomic rename, so readers see
+    either the old or the new state and concurrent admin calls never lose an update.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """Parsed state, or None if no state has been written yet."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def signature(self) -> Optional[tuple]:
+        """Cheap change detector (the rename gives every write a new inode)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @contextmanager
+    def update(self, seed: Callable[[], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the current state for in-place changes and writes it back with the
+        next revision. An exception inside the block leaves the file untouched.
+
+        Args:
+            seed (callable): Builds the state to start from when no file exists yet.
+        """
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = self.read() or seed()
+                yield state
+                state["revision"] = int(state.get("revision", 0)) + 1
+                state["updated_at"] = time.time()
+
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f, indent=2, sort_keys=True)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# ============================================================
+# Per-worker convergence
+# ============================================================
+class RegistrySync:
+    """
+    Keeps one worker's registry converged on the desired state: a background task
+    re-reads the file when it changes and reconciles the registry every
+    `interval_seconds` (so a split waiting on a load is applied once the load ends).
+    """
+
+    def __init__(self, registry: ModelRegistry, state: DesiredState,
+                 loader_factory: Callable[[Dict[str, Any]], Callable[[], Any]],
+                 interval_seconds: float = 1.0):
+        """
+        Args:
+            loader_factory (callable): Version entry of the state file -> zero-argument
+                loader returning a PredictionHandler (passed to `ModelRegistry.start_load`).
+        """
+        self.registry = registry
+        self.state = state
+        self.loader_factory = loader_factory
+        self.interval_seconds = interval_seconds
+
+        self._desired: Optional[Dict[str, Any]] = None
+        self._signature: Optional[tuple] = None
+        # version -> revision its last load was started for (a failed load is retried on the next revision)
+        self._attempted: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        # The poller and the admin endpoints both converge; one at a time
+        self._converging = asyncio.Lock()
+
+    async def start(self):
+        if self._task is None:
+            await self.refresh()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[REGISTRY] Desired-state sync failed: {e}")
+
+    async def refresh(self):
+        """Reads the state file if it changed, then converges on it (call from the event loop)."""
+        signature = self.state.signature()
+        if signature != self._signature:
+            try:
+                self._desired = self.state.read()
+                self._signature = signature
+            except ValueError as e:
+                # Keep the last good state; a half-written file cannot happen with os.replace
+                print(f"⚠️ Ignoring unreadable registry state {self.state.path}: {e}")
+        if self._desired is not None:
+            async with self._converging:
+                await self.converge(self._desired)
+
+    async def converge(self, desired: Dict[str, Any]):
+        registry = self.registry
+        revision = int(desired.get("revision", 0))
+        versions = desired.get("versions", {})
+        traffic = {v: float(w) for v, w in desired.get("traffic", {}).items() if w > 0}
+
+        # 1. Load declared versions this worker does not have
+        for version, entry in versions.items():
+            if registry.get(version) is not None:
+                continue
+            status = registry.loading_status(version) or {}
+            if status.get("status") == "loading" or self._attempted.get(version) == revision:
+                continue
+            self._attempted[version] = revision
+            print(f"[REGISTRY] Converging on revision {revision}: loading {version!r}.")
+            source = {k: v for k, v in entry.items() if k != "backend"}
+            registry.start_load(version, self.loader_factory(entry), traffic_percent=0.0, source=source)
+
+        # 2. Apply the split once every version in it is routable here
+        if traffic and not same_split(registry.traffic, traffic) and all(registry.get(v) is not None for v in traffic):
+            registry.set_traffic(traffic)
+            print(f"[REGISTRY] Converging on revision {revision}: traffic {traffic}.")
+
+        # 3. Unload dropped versions once they no longer receive traffic
+        for version in registry.versions:
+            if version not in versions and not registry.traffic.get(version):
+                await registry.remove(version)
+                print(f"[REGISTRY] Converging on revision {revision}: unloaded {version!r}.")
+
+    def status(self) -> Dict[str, Any]:
+        desired = self._desired
+        if desired is None:
+            return {"path": self.state.path, "revision": None, "converged": True}
+        traffic = {v: float(w) for v, w in desired.get("traffic", {}).items() if w > 0}
+        converged = (set(self.registry.versions) == set(desired.get("versions", {}))
+                     and same_split(self.registry.traffic, traffic))
+        return {"path": self.state.path, "revision": desired.get("revision"),
+                "updated_at": desired.get("updated_at"), "converged": converged}
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from datetime import date
+from pydantic import BaseModel, ConfigDict, Field, create_model
+from typing import Dict, Optional, List, Type
 
 class LoanApplicationRawInput(BaseModel):
     # --- MANDATORY FEATURES ---
@@ -129,6 +130,7 @@ class LoanApplicationRawInput(BaseModel):
     AMT_REQ_CREDIT_BUREAU_MON: Optional[float] = None
     AMT_REQ_CREDIT_BUREAU_QRT: Optional[float] = None
     AMT_REQ_CREDIT_BUREAU_YEAR: Optional[float] = None
+    APPLICATION_DATE: Optional[date] = Field(None, description='Application date; the server fills missing macro features (SELIC, IPCA, lags, MONTH_OF_YEAR, YEAR) for its month.')
     IPCA: Optional[float] = None
     SELIC: Optional[float] = None
     SELIC_LAG1: Optional[float] = None
@@ -141,6 +143,86 @@ class LoanApplicationRawInput(BaseModel):
     YEAR: Optional[int] = None
     CREDIT_INCOME_RATIO: Optional[float] = None
 
+def build_compact_input_model(input_fields: List[str],
+                              base: Type[BaseModel] = LoanApplicationRawInput) -> Type[BaseModel]:
+    """
+    Builds a request model with only the fields that can affect the score.
+
+    Field types, defaults and descriptions are copied from `base`, so a payload
+    validates exactly as it would against the full schema for those fields.
+    Everything else is ignored without being parsed into a model field.
+
+    Args:
+        input_fields (list[str]): Raw fields the loaded model reads
+            (`FeaturePlan.input_fields`).
+        base (BaseModel): Full request schema to take the field definitions from.
+
+    Returns:
+        Type[BaseModel]: The compact model (includes `SK_ID_CURR`).
+    """
+    fields = {}
+    for name in ["SK_ID_CURR"] + list(input_fields):
+        info = base.model_fields.get(name)
+        # Fields the full schema does not declare are dropped by it too
+        if info is not None and name not in fields:
+            fields[name] = (info.annotation, info)
+
+    return create_model(
+        "CompactLoanApplicationInput",
+        __config__=ConfigDict(extra="ignore"),
+        **fields
+    )
+
 class PredictionResponse(BaseModel):
     SK_ID_CURR: int
     probability_of_default: float
+    model_version: Optional[str] = None
+
+class BatchPredictionItem(BaseModel):
+    index: int
+    SK_ID_CURR: Optional[int] = None
+    probability_of_default: Optional[float] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[BatchPredictionItem]
+    n_success: int
+    n_failed: int
+    model_version: Optional[str] = None
+
+class FeatureContribution(BaseModel):
+    feature: str = Field(..., description='Raw input name (ORGANIZATION_TYPE for ORGANIZATION_TYPE_TARGET_ENC).')
+    model_feature: str
+    value: Optional[float] = Field(None, description='Model-space value after preprocessing (None = missing).')
+    contribution: float = Field(..., description='TreeSHAP contribution in log-odds; positive raises the risk.')
+
+class ExplanationResponse(BaseModel):
+    SK_ID_CURR: int
+    probability_of_default: float
+    base_value: float = Field(..., description='Expected log-odds; base_value + sum(contributions) = score log-odds.')
+    contributions: List[FeatureContribution]
+    model_version: Optional[str] = None
+
+class BatchExplanationItem(BaseModel):
+    index: int
+    SK_ID_CURR: Optional[int] = None
+    probability_of_default: Optional[float] = None
+    base_value: Optional[float] = None
+    contributions: Optional[List[FeatureContribution]] = None
+    error: Optional[str] = None
+
+class BatchExplanationResponse(BaseModel):
+    explanations: List[BatchExplanationItem]
+    n_success: int
+    n_failed: int
+    model_version: Optional[str] = None
+
+class ModelLoadRequest(BaseModel):
+    version: str = Field(..., description='Label for the new model version.')
+    bundle_dir: Optional[str] = Field(None, description='Serving bundle, relative to MODEL_REGISTRY_ROOT.')
+    model_dir: Optional[str] = Field(None, description='Legacy artifact directory, relative to MODEL_REGISTRY_ROOT.')
+    backend: Optional[str] = Field(None, description='Predictor backend (default: PREDICTOR_BACKEND).')
+    traffic_percent: float = Field(0.0, ge=0, le=100, description='Traffic share once warmed up (0 = header only).')
+
+class TrafficSplitRequest(BaseModel):
+    weights: Dict[str, float] = Field(..., description='Version -> traffic percentage; must sum to 100.')
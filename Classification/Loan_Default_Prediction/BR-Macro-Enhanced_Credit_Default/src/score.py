@@ -0,0 +1,190 @@
+# FILE: src/score.py
+#
+# Offline batch scoring of large CSV / Parquet files.
+#
+# The input is streamed in fixed-size chunks (only the columns the model reads
+# plus SK_ID_CURR), each chunk goes through the same PredictionHandler pipeline
+# as the API, and results are appended to a Parquet file as they complete, so
+# memory stays bounded by chunk size x chunks in flight, not by file size.
+#
+#   python -m src.score                                   # config.Paths.TEST_RAW_FILE
+#   python -m src.score data/raw/application_test.csv --out scores.parquet
+#   python -m src.score big.parquet --chunk-size 200000 --workers 4
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+
+from src.config import Paths
+from src.loading import handler_spec, load_handler, select_columns
+from src.predict import PredictionHandler
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ID_COLUMN = "SK_ID_CURR"
+OUTPUT_COLUMN = "probability_of_default"
+
+
+# ============================================================
+# Pool workers
+# ============================================================
+_worker_handler: Optional[PredictionHandler] = None
+
+
+def _init_worker(spec: Dict[str, Any]):
+    global _worker_handler
+    # The parent already verified bundle checksums
+    _worker_handler = load_handler(spec, verify=False)
+
+
+def _score_chunk(chunk) -> np.ndarray:
+    return _worker_handler.predict_proba_frame(chunk)
+
+
+# ============================================================
+# Chunked readers
+# ============================================================
+def iter_chunks(path: str, chunk_size: int, needed: Optional[set] = None) -> Iterator:
+    """
+    Yields DataFrame chunks of at most `chunk_size` rows from a CSV or Parquet file.
+
+    Args:
+        path (str): Input file (.csv, .csv.gz, .parquet, .pq).
+        chunk_size (int): Rows per chunk.
+        needed (set, optional): Cleaned column names to read; others are skipped at the reader.
+    """
+    import pandas as pd
+
+    if path.endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        columns = select_columns(parquet_file.schema_arrow.names, needed)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        columns = select_columns(list(pd.read_csv(path, nrows=0).columns), needed)
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+
+
+# ============================================================
+# Scoring
+# ============================================================
+def score_file(input_path: str, output_path: str, spec: Dict[str, Any], chunk_size: int = 50000,
+               workers: int = 0, max_in_flight: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Streams `input_path` through the model and writes `SK_ID_CURR, probability_of_default`
+    to `output_path` (Parquet), in input order.
+
+    Args:
+        input_path (str): CSV or Parquet file with raw application columns.
+        output_path (str): Parquet file to create.
+        spec (dict): Handler description from `handler_spec`.
+        chunk_size (int): Rows per chunk.
+        workers (int): Worker processes; 0 scores in this process.
+        max_in_flight (int, optional): Chunks submitted but not yet written
+            (default 2 x workers); bounds memory with a process pool.
+
+    Returns:
+        dict: Rows scored, chunks, elapsed seconds and rows/sec.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    handler = load_handler(spec)
+    needed = None
+    if handler.feature_plan is not None:
+        needed = set(handler.feature_plan.input_fields) | {ID_COLUMN}
+
+    schema = pa.schema([(ID_COLUMN, pa.int64()), (OUTPUT_COLUMN, pa.float64())])
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn"),
+            initializer=_init_worker, initargs=(spec,)
+        )
+        max_in_flight = max_in_flight or 2 * workers
+
+    rows, chunks = 0, 0
+    start = time.perf_counter()
+
+    def write(writer, ids, probabilities):
+        nonlocal rows, chunks
+        writer.write_table(pa.table({ID_COLUMN: ids, OUTPUT_COLUMN: probabilities}, schema=schema))
+        rows += len(ids)
+        chunks += 1
+        elapsed = time.perf_counter() - start
+        print(f"[SCORE] chunk {chunks}: {rows:,} rows, {rows / elapsed:,.0f} rows/s")
+
+    try:
+        with pq.ParquetWriter(output_path, schema) as writer:
+            pending = deque()
+            for chunk in iter_chunks(input_path, chunk_size, needed):
+                if ID_COLUMN not in chunk.columns:
+                    raise ValueError(f"Input file has no {ID_COLUMN} column.")
+                ids = chunk[ID_COLUMN].to_numpy(dtype=np.int64)
+
+                if executor is None:
+                    write(writer, ids, handler.predict_proba_frame(chunk))
+                    continue
+
+                pending.append((ids, executor.submit(_score_chunk, chunk)))
+                # Keep results in input order and memory bounded
+                while len(pending) >= max_in_flight:
+                    done_ids, future = pending.popleft()
+                    write(writer, done_ids, future.result())
+
+            while pending:
+                done_ids, future = pending.popleft()
+                write(writer, done_ids, future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    paths = Paths(PROJECT_BASE_PATH)
+
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file in streaming chunks.")
+    parser.add_argument("input", nargs="?", default=paths.TEST_RAW_FILE,
+                        help="Input file (default: config.Paths.TEST_RAW_FILE).")
+    parser.add_argument("--out", default=paths.TEST_SCORES_FILE, help="Output Parquet file.")
+    parser.add_argument("--model-dir", default=None, help="Artifact directory (default: config.Paths.MODEL_DIR).")
+    parser.add_argument("--bundle-dir", default=None, help="Serving bundle (default: <model-dir>/bundle if present).")
+    parser.add_argument("--backend", default="booster", choices=["sklearn", "booster", "numpy"])
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 = score in-process).")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Chunks queued per pool (default 2 x workers).")
+    args = parser.parse_args()
+
+    spec = handler_spec(args.model_dir, args.bundle_dir, args.backend)
+    summary = score_file(args.input, args.out, spec, chunk_size=args.chunk_size,
+                         workers=args.workers, max_in_flight=args.max_in_flight)
+
+    print(
+        f"✅ Scored {summary['rows']:,} rows in {summary['chunks']} chunks, "
+        f"{summary['seconds']:.1f}s ({summary['rows_per_sec']:,.0f} rows/s) -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
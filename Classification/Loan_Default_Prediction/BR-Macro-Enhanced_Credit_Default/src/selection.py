@@ -0,0 +1,370 @@
+# FILE: src/selection.py
+#
+# Feature-subset exploration on pre-binned LightGBM data (Notebook 06 selection step).
+#
+# Every feature of the encoded training file is binned once into its own
+# single-column lgb.Dataset, saved in LightGBM's binary format. A candidate
+# subset is then assembled from those shards with Dataset.add_features_from
+# (milliseconds, no re-binning, bins identical to binning the subset directly),
+# and folds are row views of it (Dataset.subset). Candidates (knee and top-k
+# cut-offs of split- and gain-importance rankings) are cross-validated in
+# parallel and reported as an AUC-versus-feature-count curve.
+#
+#   python -m src.selection                                   # train_final_encoded.parquet
+#   python -m src.selection --workers 4 --top-k 5 10 20 40
+#   python -m src.selection --write-features models/FINAL_MODEL_FEATURES.json --tolerance 0.002
+
+import argparse
+import json
+import os
+import shutil
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.config import Paths
+from src.tuning import DATASET_PARAMS
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGET_COLUMN = "TARGET"
+ID_COLUMN = "SK_ID_CURR"
+
+SHARDS_FILE = "shards.json"
+LABEL_FILE = "label.npy"
+
+DEFAULT_TOP_K = (5, 10, 15, 20, 25, 30, 40, 50, 75, 100)
+
+# Notebook 06 fallback when no knee is detected
+DEFAULT_TOP_FEATURES = 25
+
+
+# ============================================================
+# Knee of the importance curve
+# ============================================================
+def knee_point(y: np.ndarray, sensitivity: float = 1.0) -> Optional[int]:
+    """
+    Knee of a convex, decreasing curve (sorted importances) with the Kneedle
+    algorithm, as `kneed.KneeLocator(x, y, curve="convex", direction="decreasing").knee`
+    with x = range(len(y)) in kneed 0.8.5, the version Notebook 06 ran
+    (tests/test_selection.py pins its outputs). None when no knee is found.
+    """
+    from scipy.signal import argrelextrema
+
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) < 3 or y.max() == y.min():
+        return None
+    x_norm = np.arange(len(y)) / (len(y) - 1)
+    y_norm = 1 - (y - y.min()) / (y.max() - y.min())
+    difference = y_norm - x_norm
+
+    maxima = argrelextrema(difference, np.greater_equal)[0]
+    minima = argrelextrema(difference, np.less_equal)[0]
+    if not len(maxima):
+        return None
+    thresholds = difference[maxima] - sensitivity * np.abs(np.diff(x_norm).mean())
+
+    # A local maximum sets the threshold, a local minimum resets it to 0 (kneed <= 0.8.5)
+    threshold, threshold_index, maxima_seen = 0.0, 0, 0
+    for i in range(maxima[0], len(y) - 1):
+        if i in maxima:
+            threshold, threshold_index = thresholds[maxima_seen], i
+            maxima_seen += 1
+        if i in minima:
+            threshold = 0.0
+        if difference[i + 1] < threshold:
+            return int(threshold_index)
+    return None
+
+
+def knee_top_n(importances: np.ndarray) -> int:
+    """
+    Number of top features Notebook 06 keeps for a sorted importance curve: the knee,
+    or 25 when none is found. A knee at rank 0 also falls back to 25 rather than
+    selecting no feature at all.
+    """
+    return knee_point(importances) or DEFAULT_TOP_FEATURES
+
+
+# ============================================================
+# Binned feature shards
+# ============================================================
+class BinnedShards:
+    """
+    One binned single-feature lgb.Dataset binary per feature, plus the label.
+
+    Args:
+        directory (str): Shard directory written by `build`.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, SHARDS_FILE), "r") as f:
+            meta = json.load(f)
+        self.features: List[str] = meta["features"]
+        self.n_rows: int = meta["n_rows"]
+        self.source: Dict[str, Any] = meta["source"]
+        self._label = None
+
+    @classmethod
+    def build(cls, data_path: str, directory: str, exclude: tuple = (ID_COLUMN,)) -> "BinnedShards":
+        """
+        Bins every feature column of a Parquet file, one column in memory at a time.
+        Reuses `directory` when it already holds shards of the same file.
+        """
+        import lightgbm as lgb
+        import pyarrow.parquet as pq
+
+        stat = os.stat(data_path)
+        source = {"path": os.path.abspath(data_path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+        if os.path.exists(os.path.join(directory, SHARDS_FILE)):
+            shards = cls(directory)
+            if shards.source == source:
+                print(f"[SELECTION] Reusing {len(shards.features)} binned features in {directory}")
+                return shards
+
+        parquet = pq.ParquetFile(data_path)
+        features = [c for c in parquet.schema_arrow.names if c != TARGET_COLUMN and c not in exclude]
+
+        tmp_dir = f"{directory}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        start = time.perf_counter()
+        label = parquet.read(columns=[TARGET_COLUMN]).column(0).to_numpy().astype(np.float64)
+        np.save(os.path.join(tmp_dir, LABEL_FILE), label)
+        for i, feature in enumerate(features):
+            column = parquet.read(columns=[feature]).column(0).to_numpy(zero_copy_only=False)
+            dataset = lgb.Dataset(column.astype(np.float64).reshape(-1, 1), params=DATASET_PARAMS,
+                                  feature_name=[feature])
+            dataset.construct().save_binary(os.path.join(tmp_dir, cls._shard_name(i)))
+
+        with open(os.path.join(tmp_dir, SHARDS_FILE), "w") as f:
+            json.dump({"features": features, "n_rows": len(label), "source": source}, f, indent=2)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_dir, directory)
+        print(f"[SELECTION] Binned {len(features)} features x {len(label):,} rows in {time.perf_counter() - start:.1f}s")
+        return cls(directory)
+
+    @staticmethod
+    def _shard_name(index: int) -> str:
+        return f"feature_{index:04d}.bin"
+
+    @property
+    def label(self) -> np.ndarray:
+        if self._label is None:
+            self._label = np.load(os.path.join(self.directory, LABEL_FILE))
+        return self._label
+
+    def dataset(self, features: List[str]):
+        """Constructed lgb.Dataset with `features` (in that order), assembled from the shards."""
+        import lightgbm as lgb
+
+        index = {name: i for i, name in enumerate(self.features)}
+        combined = None
+        with warnings.catch_warnings():
+            # add_features_from warns that the shards carry no raw data; none is needed
+            warnings.simplefilter("ignore")
+            for feature in features:
+                shard = lgb.Dataset(os.path.join(self.directory, self._shard_name(index[feature])),
+                                    params=DATASET_PARAMS).construct()
+                combined = shard if combined is None else combined.add_features_from(shard)
+        combined.set_label(self.label)
+        return combined
+
+
+# ============================================================
+# Training on shards
+# ============================================================
+def booster_params(params: Dict[str, Any], threads: int) -> tuple:
+    """LGBMClassifier arguments (best_params.json) -> (lgb params, boosting rounds)."""
+    params = dict(params)
+    rounds = int(params.pop("n_estimators", 100))
+    return {**params, "objective": "binary", "metric": "auc", "seed": 42, "verbose": -1,
+            "num_threads": threads}, rounds
+
+
+def importance_rankings(shards: BinnedShards, params: Dict[str, Any], threads: int) -> Dict[str, Dict[str, Any]]:
+    """Fits on all rows and features; returns {"split"|"gain": {"features", "importance"}} sorted descending."""
+    import lightgbm as lgb
+
+    train_params, rounds = booster_params(params, threads)
+    booster = lgb.train(train_params, shards.dataset(shards.features), num_boost_round=rounds)
+
+    rankings = {}
+    for kind in ("split", "gain"):
+        importance = booster.feature_importance(importance_type=kind)
+        order = np.argsort(-importance, kind="stable")
+        rankings[kind] = {
+            "features": [shards.features[i] for i in order],
+            "importance": importance[order].astype(float).tolist(),
+        }
+    return rankings
+
+
+def candidate_subsets(rankings: Dict[str, Dict[str, Any]], top_k: tuple = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+    """Knee and top-k cut-offs of each ranking, plus all features; identical subsets are evaluated once."""
+    candidates, seen = [], {}
+    for kind, ranking in rankings.items():
+        n = len(ranking["features"])
+        cuts = [("knee", knee_top_n(np.array(ranking["importance"])))]
+        cuts += [("top", k) for k in top_k if k < n] + [("all", n)]
+        for rule, k in cuts:
+            features = ranking["features"][:k]
+            key = frozenset(features)
+            if key in seen:
+                seen[key]["labels"].append(f"{kind}:{rule}")
+                continue
+            candidate = {"labels": [f"{kind}:{rule}"], "importance": kind, "rule": rule,
+                         "n_features": len(features), "features": features}
+            seen[key] = candidate
+            candidates.append(candidate)
+    return candidates
+
+
+_worker_shards: Optional[BinnedShards] = None
+
+
+def _init_worker(directory: str):
+    global _worker_shards
+    _worker_shards = BinnedShards(directory)
+
+
+def evaluate_subset(features: List[str], params: Dict[str, Any], folds: List[tuple],
+                    threads: int) -> Dict[str, Any]:
+    """Validation AUC of each fold for a model on `features` (inside a worker or after `_init_worker`)."""
+    import lightgbm as lgb
+
+    start = time.perf_counter()
+    train_params, rounds = booster_params(params, threads)
+    dataset = _worker_shards.dataset(features)
+
+    scores = []
+    for train_idx, valid_idx in folds:
+        booster = lgb.Booster(train_params, train_set=dataset.subset(train_idx))
+        booster.add_valid(dataset.subset(valid_idx).construct(), "valid")
+        for _ in range(rounds):
+            booster.update()
+        scores.append(booster.eval_valid()[0][2])
+    return {"auc_mean": float(np.mean(scores)), "auc_std": float(np.std(scores)),
+            "seconds": time.perf_counter() - start}
+
+
+def _evaluate_task(args) -> Dict[str, Any]:
+    return evaluate_subset(*args)
+
+
+# ============================================================
+# Exploration
+# ============================================================
+def explore(data_path: str, shard_dir: str, params: Dict[str, Any], workers: int = 0,
+            top_k: tuple = DEFAULT_TOP_K, n_folds: int = 5, seed: int = 42) -> Dict[str, Any]:
+    """
+    Cross-validates every candidate subset and returns the report.
+
+    Args:
+        data_path (str): Encoded training Parquet (features + TARGET).
+        shard_dir (str): Binned shard directory (built on first use).
+        params (dict): LGBMClassifier arguments, as in best_params.json.
+        workers (int): Candidate processes (0 = in-process).
+        top_k (tuple): Cut-offs to try besides the knee and all features.
+        n_folds (int): StratifiedKFold splits.
+
+    Returns:
+        dict: {"rankings", "candidates" (sorted by feature count, with AUCs)}.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    shards = BinnedShards.build(data_path, shard_dir)
+    threads = max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+    rankings = importance_rankings(shards, params, os.cpu_count() or 1)
+    candidates = candidate_subsets(rankings, top_k)
+
+    label = shards.label
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    folds = [(train_idx, valid_idx) for train_idx, valid_idx in splitter.split(np.zeros(len(label)), label)]
+    tasks = [(c["features"], params, folds, threads) for c in candidates]
+    print(f"[SELECTION] {len(candidates)} candidate subsets x {n_folds} folds ({max(workers, 1)} x {threads} threads).")
+
+    def log(candidate):
+        print(f"[SELECTION] {candidate['n_features']:>4} features ({', '.join(candidate['labels'])}): "
+              f"AUC {candidate['auc_mean']:.5f} ± {candidate['auc_std']:.5f} ({candidate['seconds']:.1f}s)")
+
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                 initializer=_init_worker, initargs=(shard_dir,)) as executor:
+            futures = {executor.submit(_evaluate_task, task): c for task, c in zip(tasks, candidates)}
+            for future in as_completed(futures):
+                futures[future].update(future.result())
+                log(futures[future])
+    else:
+        _init_worker(shard_dir)
+        for task, candidate in zip(tasks, candidates):
+            candidate.update(_evaluate_task(task))
+            log(candidate)
+
+    candidates.sort(key=lambda c: (c["n_features"], -c["auc_mean"]))
+    return {"rankings": rankings, "candidates": candidates}
+
+
+def recommend(report: Dict[str, Any], tolerance: float = 0.001) -> Dict[str, Any]:
+    """Smallest candidate whose AUC is within `tolerance` of the best one."""
+    best = max(c["auc_mean"] for c in report["candidates"])
+    return min((c for c in report["candidates"] if c["auc_mean"] >= best - tolerance),
+               key=lambda c: (c["n_features"], -c["auc_mean"]))
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    paths = Paths(PROJECT_BASE_PATH)
+
+    parser = argparse.ArgumentParser(description="AUC vs feature count on pre-binned LightGBM data.")
+    parser.add_argument("data", nargs="?", default=os.path.join(paths.DATA_PROCESSED_DIR, "train_final_encoded.parquet"))
+    parser.add_argument("--params", default=os.path.join(paths.MODEL_DIR, "best_params.json"))
+    parser.add_argument("--shard-dir", default=os.path.join(paths.DATA_PROCESSED_DIR, "binned_features"))
+    parser.add_argument("--report", default=os.path.join(paths.REPORT_DIR, "feature_selection.json"))
+    parser.add_argument("--workers", type=int, default=0, help="Candidate processes (0 = in-process).")
+    parser.add_argument("--top-k", type=int, nargs="*", default=list(DEFAULT_TOP_K))
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.001, help="AUC loss accepted for a smaller subset.")
+    parser.add_argument("--write-features", default=None, help="Write the recommended subset here (features JSON).")
+    args = parser.parse_args()
+
+    params = {}
+    if os.path.exists(args.params):
+        with open(args.params, "r") as f:
+            params = json.load(f)
+    else:
+        print(f"⚠️ {args.params} not found; using LightGBM defaults (100 rounds).")
+
+    report = explore(args.data, args.shard_dir, params, workers=args.workers,
+                     top_k=tuple(args.top_k), n_folds=args.folds)
+    choice = recommend(report, args.tolerance)
+    report["recommended"] = {"n_features": choice["n_features"], "labels": choice["labels"],
+                             "auc_mean": choice["auc_mean"], "tolerance": args.tolerance}
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n n_features   AUC        labels")
+    for c in report["candidates"]:
+        print(f" {c['n_features']:>10}   {c['auc_mean']:.5f}    {', '.join(c['labels'])}")
+    print(f"✅ Recommended: {choice['n_features']} features ({', '.join(choice['labels'])}), "
+          f"AUC {choice['auc_mean']:.5f}. Report -> {args.report}")
+
+    if args.write_features:
+        with open(args.write_features, "w") as f:
+            json.dump(choice["features"], f, indent=4)
+        print(f"✅ Feature list -> {args.write_features}")
+
+
+if __name__ == "__main__":
+    main()
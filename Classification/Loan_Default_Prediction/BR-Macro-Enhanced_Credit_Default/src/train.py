@@ -0,0 +1,527 @@
+# FILE: src/train.py
+#
+# End-to-end training pipeline: raw Kaggle CSVs + BCB macro store -> serving bundle.
+# Runs notebooks 01 -> 06 as six cached stages, driven by config.Paths:
+#
+#   etl        application_{train,test}.csv + macro features -> *_enriched.parquet   (Notebook 01)
+#   encode     feature engineering + OOF target encoding + mean imputation          (Notebook 03)
+#   tune       hyperparameter search (src.tuning) -> best_params.json                (Notebook 05)
+#   select     fit on all features, knee of the importance curve -> features.json   (Notebook 06)
+#   final_fit  fit on the selected features -> serving bundle + drift reference     (Notebook 06)
+#
+# The imputation map computed in `encode` fills the training matrix and ships in
+# the bundle, and `final_fit` re-scores the raw training rows through the bundle,
+# so the model is never served different inputs than it was fit on.
+#
+# Every stage writes to data/pipeline/<stage>/<key>/, where the key hashes the
+# stage's code, its settings and the content of its inputs (upstream outputs
+# included). A rerun skips every stage whose key already has a finished output,
+# so changing e.g. the final fit only re-executes that stage.
+#
+#   python -m src.train                               # full pipeline, publishes models/bundle
+#   python -m src.train --n-iter 60 --workers 4       # wider search; etl/encode are reused
+#   python -m src.train --params models/best_params.json   # skip tuning
+#   python -m src.train --force final_fit
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.bundle import export_bundle, file_sha256
+from src.config import Paths
+from src.drift import DriftReference, bucket_indices, quantile_edges
+from src.selection import knee_point, knee_top_n
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = ("etl", "encode", "tune", "select", "final_fit")
+STAGE_FILE = "_stage.json"
+
+TARGET_COLUMN = "TARGET"
+ID_COLUMN = "SK_ID_CURR"
+TIME_INDEX = "TIME_INDEX"
+
+# Notebook 01 simulates an application month per client within this range
+SIMULATED_MONTHS = ("2013-01", "2018-05")
+
+# Fixed LGBMClassifier arguments of notebooks 05 / 06
+MODEL_ARGS = {"objective": "binary", "boosting_type": "gbdt", "random_state": 42, "n_jobs": -1}
+
+
+# ============================================================
+# Stage cache
+# ============================================================
+def _hash_json(obj: Any) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def source_hash(*objects) -> str:
+    """Hash of the source code of functions / modules, so editing a stage invalidates only that stage."""
+    return _hash_json([inspect.getsource(obj) for obj in objects])
+
+
+class StageCache:
+    """
+    Content-addressed stage outputs under `root/<stage>/<key[:16]>/`.
+
+    A stage directory is built under a temporary name and renamed into place
+    together with its `_stage.json` record, so an interrupted run never leaves
+    a half-written stage that a later run would mistake for a finished one.
+    """
+
+    def __init__(self, root: str, force: tuple = ()):
+        self.root = root
+        self.force = set(force)
+
+    def run(self, stage: str, inputs: Dict[str, Any], build: Callable[[str], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Returns the stage record, building the output only when its key is new (or forced).
+
+        Args:
+            stage (str): Stage name.
+            inputs (dict): Everything the output depends on (JSON-serializable).
+            build (callable): `build(out_dir) -> dict` writing the stage files into `out_dir`.
+
+        Returns:
+            dict: Record with "key", "dir", "files" (relative path -> sha256) and build metadata.
+        """
+        key = _hash_json({"stage": stage, **inputs})
+        out_dir = os.path.join(self.root, stage, key[:16])
+        record_path = os.path.join(out_dir, STAGE_FILE)
+
+        if os.path.exists(record_path) and stage not in self.force:
+            with open(record_path, "r") as f:
+                record = json.load(f)
+            print(f"[TRAIN] {stage}: cached ({key[:12]})")
+            return {**record, "dir": out_dir}
+
+        tmp_dir = f"{out_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        print(f"[TRAIN] {stage}: running ({key[:12]})")
+        start = time.perf_counter()
+        meta = build(tmp_dir) or {}
+
+        files = {}
+        for folder, _, names in os.walk(tmp_dir):
+            for name in names:
+                path = os.path.join(folder, name)
+                files[os.path.relpath(path, tmp_dir).replace(os.sep, "/")] = file_sha256(path)
+
+        record = {
+            "stage": stage,
+            "key": key,
+            "inputs": inputs,
+            "files": dict(sorted(files.items())),
+            "seconds": time.perf_counter() - start,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **meta,
+        }
+        with open(os.path.join(tmp_dir, STAGE_FILE), "w") as f:
+            json.dump(record, f, indent=2, default=str)
+
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        print(f"[TRAIN] {stage}: done in {record['seconds']:.1f}s")
+        return {**record, "dir": out_dir}
+
+
+def _outputs(record: Dict[str, Any], *names: str) -> Dict[str, str]:
+    """Content hashes of upstream outputs, as downstream stage inputs."""
+    return {name: record["files"][name] for name in names}
+
+
+# ============================================================
+# Stage: ETL (Notebook 01)
+# ============================================================
+def simulate_months(n_rows: int, seed: int) -> pd.PeriodIndex:
+    """Random application month per row (the Kaggle data has no dates); seeded, unlike the notebook."""
+    months = pd.period_range(*SIMULATED_MONTHS, freq="M")
+    return months[np.random.default_rng(seed).integers(len(months), size=n_rows)]
+
+
+def run_etl(out_dir: str, train_csv: str, test_csv: str, macro_features: Optional[pd.DataFrame],
+            seed: int) -> Dict[str, Any]:
+    """
+    Joins the macro features on a simulated application month and fills macro gaps
+    with the train mean per calendar month (Notebook 01). Micro columns keep their
+    gaps: missing categoricals get their own target encoding and numeric gaps are
+    imputed after feature engineering (run_encode), as the serving FeaturePlan does.
+    Writes train/test_enriched.parquet.
+    """
+    frames = {"train": pd.read_csv(train_csv), "test": pd.read_csv(test_csv)}
+    macro_cols = list(macro_features.columns) if macro_features is not None else []
+
+    for offset, (name, df) in enumerate(frames.items()):
+        df[TIME_INDEX] = simulate_months(len(df), seed + offset)
+        if macro_cols:
+            df = df.merge(macro_features, left_on=TIME_INDEX, right_index=True, how="left")
+        frames[name] = df
+
+    train, test = frames["train"], frames["test"]
+
+    # Statistics from the training set only
+    monthly_means = train.groupby(train[TIME_INDEX].dt.month)[macro_cols].mean() if macro_cols else None
+
+    for df in (train, test):
+        month = df[TIME_INDEX].dt.month
+        for col in macro_cols:
+            df[col] = df[col].fillna(month.map(monthly_means[col]))
+        df[TIME_INDEX] = df[TIME_INDEX].astype(str)
+
+    train.to_parquet(os.path.join(out_dir, "train_enriched.parquet"), index=False)
+    test.to_parquet(os.path.join(out_dir, "test_enriched.parquet"), index=False)
+    return {"rows": {"train": len(train), "test": len(test)}, "macro_columns": macro_cols}
+
+
+# ============================================================
+# Stage: feature engineering + target encoding (Notebook 03)
+# ============================================================
+def run_encode(out_dir: str, etl_dir: str, workers: int) -> Dict[str, Any]:
+    """
+    Engineers and target-encodes train/test, then fills the remaining NaN with the
+    train column means. The means are written as imputation_map.json and shipped
+    in the bundle, so the model is fit on the same values FeaturePlan imputes.
+    """
+    from src.features import OOFTargetEncoder, categorical_columns, column_means, encode_file, impute_file
+
+    train_path = os.path.join(etl_dir, "train_enriched.parquet")
+    # TIME_INDEX is a "YYYY-MM" string but not a category: engineer_features turns it
+    # into YEAR / MONTH_OF_YEAR, which serving derives from APPLICATION_DATE
+    categorical = categorical_columns(train_path, exclude=(TARGET_COLUMN, ID_COLUMN, TIME_INDEX))
+    encoder = OOFTargetEncoder(cols=categorical).fit(train_path, workers=workers)
+
+    unfilled = {name: os.path.join(out_dir, f"_{name}_final_encoded.parquet") for name in ("train", "test")}
+    encode_file(train_path, unfilled["train"], encoder, oof=True)
+    encode_file(os.path.join(etl_dir, "test_enriched.parquet"), unfilled["test"], encoder, oof=False)
+
+    imputation_map = column_means(unfilled["train"])
+    for name, path in unfilled.items():
+        impute_file(path, os.path.join(out_dir, f"{name}_final_encoded.parquet"), imputation_map)
+        os.remove(path)
+
+    with open(os.path.join(out_dir, "encoder_lookup.json"), "w") as f:
+        json.dump(encoder.lookups(), f, indent=2, sort_keys=True)
+    with open(os.path.join(out_dir, "imputation_map.json"), "w") as f:
+        json.dump(imputation_map, f, indent=2, sort_keys=True)
+    return {"encoded_columns": encoder.cols}
+
+
+# ============================================================
+# Stage: hyperparameter search (Notebook 05)
+# ============================================================
+def run_tune(out_dir: str, train_path: str, store_path: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    from src.tuning import best_params, run_search
+
+    best = run_search(train_path, store_path, exclude=(ID_COLUMN,), **settings)
+    if best is None:
+        raise RuntimeError("Hyperparameter search finished without a completed trial.")
+
+    with open(os.path.join(out_dir, "best_params.json"), "w") as f:
+        json.dump(best_params(best), f, indent=4)
+    return {"cv_auc": best["score"], "trial_id": best["trial_id"]}
+
+
+# ============================================================
+# Stage: feature selection (Notebook 06)
+# ============================================================
+def _load_training_frame(train_path: str, columns: Optional[List[str]] = None):
+    read = None if columns is None else columns + [TARGET_COLUMN]
+    df = pd.read_parquet(train_path, columns=read)
+    y = df.pop(TARGET_COLUMN)
+    return df.drop(columns=[ID_COLUMN], errors="ignore"), y
+
+
+def run_select(out_dir: str, train_path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    import lightgbm as lgb
+
+    X, y = _load_training_frame(train_path)
+    model = lgb.LGBMClassifier(**MODEL_ARGS, **params).fit(X, y)
+
+    importance = pd.DataFrame({"feature": X.columns, "importance": model.feature_importances_})
+    importance = importance.sort_values("importance", ascending=False).reset_index(drop=True)
+    importance.to_csv(os.path.join(out_dir, "feature_importance.csv"), index=False)
+
+    importances = importance["importance"].to_numpy()
+    features = importance["feature"].head(knee_top_n(importances)).tolist()
+
+    with open(os.path.join(out_dir, "features.json"), "w") as f:
+        json.dump(features, f, indent=4)
+    return {"knee": knee_point(importances), "n_features": len(features)}
+
+
+# ============================================================
+# Stage: final fit + bundle (Notebook 06)
+# ============================================================
+def build_drift_reference(model, features: List[str], imputation_map: Dict[str, float],
+                          encoder_lookups: Dict[str, Any], macro_table, train_csv: str,
+                          seed: int) -> Optional[DriftReference]:
+    """
+    Training population as serving sees it, for src.drift: the raw training rows
+    (with their simulated application month) go through the serving FeaturePlan,
+    so missing fields are imputed and counted exactly as in production. The encoded
+    training file cannot be used, its gaps are already filled with the means.
+    """
+    from src.feature_plan import FeaturePlan
+    from src.macro_table import APPLICATION_DATE
+
+    try:
+        plan = FeaturePlan(features, imputation_map, encoder_lookups, macro_table=macro_table)
+    except Exception as e:
+        print(f"⚠️ No drift reference: features not supported by FeaturePlan ({e}).")
+        return None
+
+    needed = set(plan.input_fields)
+    raw = pd.read_csv(train_csv, usecols=lambda c: c in needed)
+    raw[APPLICATION_DATE] = simulate_months(len(raw), seed).astype(str)  # same months as run_etl
+    processed = plan.transform_frame(raw)
+    booster = model.booster_ if hasattr(model, "booster_") else model
+    return DriftReference.build(processed, features, booster.predict(processed), missing_values=imputation_map)
+
+
+def check_bundle_parity(model, X: pd.DataFrame, bundle_dir: str, train_path: str, train_csv: str,
+                        seed: int, tolerance: float = 1e-6) -> float:
+    """
+    Scores the raw training rows through the exported bundle and compares them with
+    the in-memory model on the matrix it was fit on. Target-encoded columns are
+    out-of-fold in training, so both sides use the served (full-data) encodings;
+    every other feature and every probability must match.
+
+    Returns:
+        float: Max |probability difference|.
+
+    Raises:
+        ValueError: The bundle builds different features or scores than the fitted model.
+    """
+    from src.macro_table import APPLICATION_DATE
+    from src.predict import PredictionHandler
+
+    features = list(X.columns)
+    handler = PredictionHandler.from_bundle(bundle_dir, verify=False)
+    plan = handler.feature_plan
+    needed = None if plan is None else set(plan.input_fields) | {ID_COLUMN}
+    raw = pd.read_csv(train_csv, usecols=lambda c: needed is None or c in needed)
+    raw[APPLICATION_DATE] = simulate_months(len(raw), seed).astype(str)  # same months as run_etl
+
+    ids = pd.read_parquet(train_path, columns=[ID_COLUMN])[ID_COLUMN]
+    if not np.array_equal(raw[ID_COLUMN].to_numpy(), ids.to_numpy()):
+        raise ValueError(f"Training rows of {train_path} are not in the order of {train_csv}.")
+
+    served = handler.transform_frame(raw)
+    served = pd.DataFrame(np.asarray(served, dtype=np.float64), columns=features, index=X.index)
+    expected = X.copy()
+    encoded = [f for f in features if f.endswith("_TARGET_ENC")]
+    expected[encoded] = served[encoded]
+
+    mismatched = [f for f in features if not np.allclose(served[f], expected[f], equal_nan=True)]
+    if mismatched:
+        raise ValueError(f"Bundle features differ from the training matrix: {mismatched}")
+
+    max_diff = float(np.max(np.abs(
+        handler.predictor.predict_proba(served.to_numpy()) - model.predict_proba(expected)[:, 1]
+    )))
+    if max_diff > tolerance:
+        raise ValueError(f"Bundle scores differ from the fitted model (max |diff| = {max_diff:.1e}).")
+    print(f"✅ Bundle matches the fitted model on {len(raw):,} raw training rows (max |diff| = {max_diff:.1e}).")
+    return max_diff
+
+
+def run_final_fit(out_dir: str, train_path: str, params: Dict[str, Any], features: List[str],
+                  encoder_lookups: Dict[str, Any], imputation_map: Dict[str, float],
+                  macro_features: Optional[pd.DataFrame], version: str, train_csv: str,
+                  seed: int) -> Dict[str, Any]:
+    import lightgbm as lgb
+
+    from src.macro import build_macro_table
+    from src.macro_table import CALENDAR_FEATURES, MacroTable
+
+    X, y = _load_training_frame(train_path, features)
+    X = X[features]
+    model = lgb.LGBMClassifier(**MODEL_ARGS, **params).fit(X, y)
+    # The training file is already filled with these (run_encode); serving fills the same gaps
+    imputation_map = {f: imputation_map[f] for f in features if f in imputation_map}
+
+    # Ship the month -> macro lookup only when the model reads macro features; YEAR and
+    # MONTH_OF_YEAR (from the application month) need a table too, if only a calendar one
+    macro_table = None
+    if macro_features is not None and set(features) & set(macro_features.columns):
+        macro_table = build_macro_table(macro_features)
+    elif set(features) & set(CALENDAR_FEATURES):
+        macro_table = MacroTable(SIMULATED_MONTHS[0], [], [])
+
+    drift_reference = build_drift_reference(
+        model, features, imputation_map, encoder_lookups, macro_table, train_csv, seed
+    )
+
+    bundle_dir = os.path.join(out_dir, "bundle")
+    export_bundle(model, None, imputation_map, features, bundle_dir,
+                  version=version, macro_table=macro_table, encoder_lookups=encoder_lookups,
+                  drift_reference=drift_reference)
+    max_diff = check_bundle_parity(model, X, bundle_dir, train_path, train_csv, seed)
+    return {"version": version, "n_features": len(features), "parity_max_diff": max_diff}
+
+
+# ============================================================
+# Pipeline
+# ============================================================
+def _read_json(path: str) -> Any:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def run_pipeline(paths: Paths, cache_dir: str, seed: int = 42, workers: int = 0,
+                 tuning: Optional[Dict[str, Any]] = None, params_path: Optional[str] = None,
+                 version: Optional[str] = None, force: tuple = ()) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs (or reuses) every stage and returns their records.
+
+    Args:
+        paths (Paths): Raw data, macro store and model locations.
+        cache_dir (str): Stage output root.
+        seed (int): Seed of the simulated application months.
+        workers (int): Processes for the encoding statistics and the tuning trials.
+        tuning (dict, optional): `src.tuning.run_search` settings (n_iter, max_rounds, ...).
+        params_path (str, optional): Use this best_params.json instead of tuning.
+        version (str, optional): Bundle version label (default: final stage key).
+        force (tuple): Stage names to rebuild even when cached.
+    """
+    from src import features as features_module
+    from src import feature_plan as feature_plan_module
+    from src import tuning as tuning_module
+    from src.macro import MacroStore
+
+    cache = StageCache(cache_dir, force=force)
+    records = {}
+
+    # Macro features enter by content: the store's feature table (absent = micro only)
+    macro_path = paths.MACRO_FEATURES_FILE
+    macro_features = MacroStore(paths.MACRO_STORE_DIR).load_features() if os.path.exists(macro_path) else None
+    if macro_features is None:
+        print(f"⚠️ No macro features at {macro_path}; training on micro features only (run python -m src.macro).")
+
+    records["etl"] = cache.run("etl", {
+        "code": source_hash(run_etl, simulate_months),
+        "train_csv": file_sha256(paths.TRAIN_RAW_FILE),
+        "test_csv": file_sha256(paths.TEST_RAW_FILE),
+        "macro": file_sha256(macro_path) if macro_features is not None else None,
+        "seed": seed,
+        "simulated_months": SIMULATED_MONTHS,
+    }, lambda out: run_etl(out, paths.TRAIN_RAW_FILE, paths.TEST_RAW_FILE, macro_features, seed))
+
+    etl_dir = records["etl"]["dir"]
+    records["encode"] = cache.run("encode", {
+        "code": source_hash(run_encode, features_module, feature_plan_module),
+        "etl": _outputs(records["etl"], "train_enriched.parquet", "test_enriched.parquet"),
+    }, lambda out: run_encode(out, etl_dir, workers))
+
+    encode_dir = records["encode"]["dir"]
+    train_path = os.path.join(encode_dir, "train_final_encoded.parquet")
+    train_hash = records["encode"]["files"]["train_final_encoded.parquet"]
+
+    if params_path:
+        params_file = params_path
+        print(f"[TRAIN] tune: skipped, using {params_path}")
+    else:
+        settings = {"n_iter": 30, "workers": workers, **(tuning or {})}
+        # One store per training set, so a wider search on the same data resumes the earlier trials
+        store_path = os.path.join(cache_dir, "tune", f"trials-{train_hash[:12]}.sqlite")
+        records["tune"] = cache.run("tune", {
+            "code": source_hash(run_tune, tuning_module),
+            "train": train_hash,
+            "settings": {k: v for k, v in settings.items() if k not in ("workers", "threads_per_trial")},
+        }, lambda out: run_tune(out, train_path, store_path, settings))
+        params_file = os.path.join(records["tune"]["dir"], "best_params.json")
+
+    params = _read_json(params_file)
+    records["select"] = cache.run("select", {
+        "code": source_hash(run_select, knee_point, knee_top_n, _load_training_frame),
+        "train": train_hash,
+        "params": params,
+        "model_args": MODEL_ARGS,
+    }, lambda out: run_select(out, train_path, params))
+
+    features = _read_json(os.path.join(records["select"]["dir"], "features.json"))
+    lookups = _read_json(os.path.join(encode_dir, "encoder_lookup.json"))
+    imputation_map = _read_json(os.path.join(encode_dir, "imputation_map.json"))
+    final_inputs = {
+        "code": source_hash(run_final_fit, _load_training_frame, export_bundle, build_drift_reference,
+                            check_bundle_parity, simulate_months, DriftReference, quantile_edges,
+                            bucket_indices),
+        "train": train_hash,
+        "train_csv": records["etl"]["inputs"]["train_csv"],
+        "seed": seed,
+        "encoder_lookup": records["encode"]["files"]["encoder_lookup.json"],
+        "imputation_map": records["encode"]["files"]["imputation_map.json"],
+        "params": params,
+        "features": features,
+        "model_args": MODEL_ARGS,
+        "macro": records["etl"]["inputs"]["macro"],
+        "version": version,
+    }
+    label = version or _hash_json(final_inputs)[:12]
+    records["final_fit"] = cache.run("final_fit", final_inputs, lambda out: run_final_fit(
+        out, train_path, params, features, lookups, imputation_map, macro_features, label,
+        paths.TRAIN_RAW_FILE, seed
+    ))
+    return records
+
+
+def publish_bundle(bundle_dir: str, target: str):
+    """Copies a built bundle to `target`, swapping directories so readers never see a partial copy."""
+    tmp_target, old_target = f"{target}.tmp", f"{target}.old"
+    shutil.rmtree(tmp_target, ignore_errors=True)
+    shutil.copytree(bundle_dir, tmp_target)
+    if os.path.exists(target):
+        shutil.rmtree(old_target, ignore_errors=True)
+        os.replace(target, old_target)
+    os.replace(tmp_target, target)
+    shutil.rmtree(old_target, ignore_errors=True)
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    paths = Paths(PROJECT_BASE_PATH)
+
+    parser = argparse.ArgumentParser(description="Cached training pipeline: raw data -> serving bundle.")
+    parser.add_argument("--cache-dir", default=paths.PIPELINE_DIR, help="Stage output root.")
+    parser.add_argument("--bundle-out", default=paths.MODEL_BUNDLE_DIR, help="Where the final bundle is published.")
+    parser.add_argument("--no-publish", action="store_true", help="Build stages only; leave the served bundle alone.")
+    parser.add_argument("--version", default=None, help="Bundle version label (default: content hash).")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the simulated application months.")
+    parser.add_argument("--workers", type=int, default=0, help="Processes for encoding and tuning.")
+    parser.add_argument("--params", default=None, help="Existing best_params.json; skips the tune stage.")
+    parser.add_argument("--n-iter", type=int, default=30, help="Tuning trials.")
+    parser.add_argument("--max-rounds", type=int, default=2000)
+    parser.add_argument("--force", nargs="*", default=[], choices=STAGES, help="Stages to rebuild.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    records = run_pipeline(
+        paths, args.cache_dir, seed=args.seed, workers=args.workers,
+        tuning={"n_iter": args.n_iter, "max_rounds": args.max_rounds},
+        params_path=args.params, version=args.version, force=tuple(args.force),
+    )
+
+    final = records["final_fit"]
+    bundle_dir = os.path.join(final["dir"], "bundle")
+    if not args.no_publish:
+        publish_bundle(bundle_dir, args.bundle_out)
+        bundle_dir = args.bundle_out
+    print(f"✅ Bundle {final['version']} ({final['n_features']} features) at {bundle_dir} "
+          f"in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
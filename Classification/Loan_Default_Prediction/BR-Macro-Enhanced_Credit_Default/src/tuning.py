@@ -0,0 +1,408 @@
+# FILE: src/tuning.py
+#
+# Parallel LightGBM hyperparameter search with early stopping, ASHA pruning
+# and a resumable SQLite trial store. Replaces the RandomizedSearchCV block of
+# 05_Random_Search_LightGBM.ipynb and writes the same models/best_params.json
+# (LGBMClassifier keyword arguments, read by Notebook 06).
+#
+#   python -m src.tuning                                  # train_final_encoded.parquet
+#   python -m src.tuning --n-iter 60 --workers 4 --eta 3
+#   python -m src.tuning --n-iter 120                     # resumes, runs the 60 new trials
+#
+# - Folds (StratifiedKFold 5, shuffle, seed 42 as in the notebook) are binned
+#   into lgb.Dataset binaries once; every trial in every worker reuses them.
+# - All folds of a trial boost in lockstep; the mean validation AUC drives
+#   early stopping (like lgb.cv) and the pruning decisions.
+# - At rungs min_rounds * eta^k a trial continues only if its AUC so far is in
+#   the top 1/eta of the trials that reached that rung (asynchronous successive
+#   halving); rung results live in the store, so workers see each other's.
+# - Each trial runs with num_threads = cores // workers.
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.config import Paths
+
+PROJECT_BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGET_COLUMN = "TARGET"
+
+# Notebook 05 grid, widened. Keys are LGBMClassifier arguments (lgb.train accepts them as aliases).
+PARAM_SPACE = {
+    "num_leaves": [15, 31, 50, 70, 127],
+    "learning_rate": [0.01, 0.02, 0.05, 0.1],
+    "max_depth": [-1, 8, 12],
+    "min_child_samples": [20, 50, 100, 200],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+    "subsample": [0.7, 0.85, 1.0],
+    "subsample_freq": [1],
+    "reg_lambda": [0.0, 1.0, 5.0],
+}
+
+# Fixed training parameters (LGBMClassifier(objective="binary", random_state=42) in the notebooks)
+BASE_PARAMS = {"objective": "binary", "metric": "auc", "seed": 42, "verbose": -1}
+
+# Binning is done once per fold; min_child_samples may vary per trial only without pre-filtering
+DATASET_PARAMS = {"max_bin": 255, "feature_pre_filter": False, "verbose": -1}
+
+
+def sample_params(space: Dict[str, Any], trial_id: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Parameters of trial `trial_id`. Each trial has its own RNG, so trial N draws
+    the same values however many trials the search is run (or resumed) with.
+    Values are lists (uniform choice) or objects with `rvs` (scipy distributions).
+    """
+    rng = np.random.RandomState([seed, trial_id])
+    params = {}
+    for name in sorted(space):
+        values = space[name]
+        value = values.rvs(random_state=rng) if hasattr(values, "rvs") else values[rng.randint(len(values))]
+        params[name] = value.item() if isinstance(value, np.generic) else value
+    return params
+
+
+def rung_rounds(min_rounds: int, eta: int, max_rounds: int) -> List[int]:
+    """Boosting rounds at which pruning is checked: min_rounds * eta^k below max_rounds."""
+    rungs, rounds = [], min_rounds
+    while eta > 1 and rounds < max_rounds:
+        rungs.append(rounds)
+        rounds *= eta
+    return rungs
+
+
+# ============================================================
+# Trial store (SQLite, shared by all worker processes)
+# ============================================================
+class TrialStore:
+    """
+    Trials and rung results of one search. Safe to open from several processes.
+
+    Args:
+        path (str): SQLite file.
+        search_key (str, optional): Hash of data + search settings. Reopening a store
+            written with different settings raises, instead of mixing incomparable scores.
+    """
+
+    def __init__(self, path: str, search_key: Optional[str] = None):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS trials (
+                trial_id INTEGER PRIMARY KEY, params TEXT, state TEXT, score REAL,
+                best_iteration INTEGER, rounds INTEGER, seconds REAL, updated_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS rungs (
+                trial_id INTEGER, rung INTEGER, score REAL, PRIMARY KEY (trial_id, rung)
+            );
+            """
+        )
+        if search_key is not None:
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('search_key', ?)", (search_key,))
+            stored = self._conn.execute("SELECT value FROM meta WHERE key = 'search_key'").fetchone()[0]
+            if stored != search_key:
+                raise ValueError(
+                    f"Trial store {path} belongs to a different search (data or settings changed); "
+                    "use another --store or delete it."
+                )
+
+    def close(self):
+        self._conn.close()
+
+    def finished_ids(self) -> set:
+        rows = self._conn.execute("SELECT trial_id FROM trials WHERE state IN ('COMPLETE', 'PRUNED')")
+        return {row[0] for row in rows}
+
+    def start(self, trial_id: int, params: Dict[str, Any]):
+        """Marks a trial running; results of an interrupted earlier attempt are discarded."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("DELETE FROM rungs WHERE trial_id = ?", (trial_id,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO trials VALUES (?, ?, 'RUNNING', NULL, NULL, 0, NULL, ?)",
+            (trial_id, json.dumps(params, sort_keys=True), _now()),
+        )
+        self._conn.execute("COMMIT")
+
+    def finish(self, trial_id: int, state: str, score: Optional[float], best_iteration: Optional[int],
+               rounds: int, seconds: float):
+        self._conn.execute(
+            "UPDATE trials SET state = ?, score = ?, best_iteration = ?, rounds = ?, seconds = ?, updated_at = ? "
+            "WHERE trial_id = ?",
+            (state, score, best_iteration, rounds, seconds, _now(), trial_id),
+        )
+
+    def report_rung(self, trial_id: int, rung: int, score: float, eta: int) -> bool:
+        """
+        Records a trial's score at a rung and returns whether it may continue:
+        it must rank within the top n // eta of the n trials at this rung so far
+        (the best one always continues, so early trials are not starved).
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("INSERT OR REPLACE INTO rungs VALUES (?, ?, ?)", (trial_id, rung, score))
+        scores = [row[0] for row in self._conn.execute("SELECT score FROM rungs WHERE rung = ?", (rung,))]
+        self._conn.execute("COMMIT")
+        keep = max(len(scores) // eta, 1)
+        return score >= sorted(scores, reverse=True)[keep - 1]
+
+    def trials(self) -> List[Dict[str, Any]]:
+        cursor = self._conn.execute("SELECT * FROM trials ORDER BY trial_id")
+        columns = [c[0] for c in cursor.description]
+        return [
+            {**dict(zip(columns, row)), "params": json.loads(row[columns.index("params")])}
+            for row in cursor
+        ]
+
+    def best(self) -> Optional[Dict[str, Any]]:
+        complete = [t for t in self.trials() if t["state"] == "COMPLETE"]
+        return max(complete, key=lambda t: t["score"]) if complete else None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ============================================================
+# Fold datasets (binned once, reused by every trial)
+# ============================================================
+def build_fold_datasets(data_path: str, cache_dir: str, n_folds: int = 5, seed: int = 42,
+                        exclude: tuple = ()) -> List[Dict[str, str]]:
+    """
+    Writes train / validation lgb.Dataset binaries for each StratifiedKFold fold
+    (skipped when they already exist) and returns their paths.
+    """
+    import lightgbm as lgb
+    import pandas as pd
+    from sklearn.model_selection import StratifiedKFold
+
+    folds = [
+        {"train": os.path.join(cache_dir, f"fold{k}_train.bin"), "valid": os.path.join(cache_dir, f"fold{k}_valid.bin")}
+        for k in range(n_folds)
+    ]
+    if all(os.path.exists(f["train"]) and os.path.exists(f["valid"]) for f in folds):
+        print(f"[TUNING] Reusing fold datasets in {cache_dir}")
+        return folds
+
+    df = pd.read_parquet(data_path)
+    y = df.pop(TARGET_COLUMN).to_numpy()
+    X = df.drop(columns=[c for c in exclude if c in df.columns])
+
+    os.makedirs(cache_dir, exist_ok=True)
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for fold, (train_idx, valid_idx) in zip(folds, splitter.split(X, y)):
+        train = lgb.Dataset(X.iloc[train_idx], y[train_idx], params=DATASET_PARAMS).construct()
+        valid = lgb.Dataset(X.iloc[valid_idx], y[valid_idx], reference=train, params=DATASET_PARAMS).construct()
+        # Written under a temporary name so an interrupted build is not mistaken for a cache
+        for dataset, path in ((train, fold["train"]), (valid, fold["valid"])):
+            dataset.save_binary(path + ".tmp")
+            os.replace(path + ".tmp", path)
+    print(f"[TUNING] Built {n_folds} fold datasets ({X.shape[0]:,} rows x {X.shape[1]} features) in {cache_dir}")
+    return folds
+
+
+_worker_folds: Optional[List[tuple]] = None
+_worker_store: Optional[TrialStore] = None
+
+
+def _init_worker(fold_paths: List[Dict[str, str]], store_path: str):
+    import lightgbm as lgb
+
+    global _worker_folds, _worker_store
+    _worker_folds = [
+        (lgb.Dataset(f["train"], params=DATASET_PARAMS).construct(),
+         lgb.Dataset(f["valid"], params=DATASET_PARAMS).construct())
+        for f in fold_paths
+    ]
+    _worker_store = TrialStore(store_path)
+
+
+# ============================================================
+# One trial
+# ============================================================
+def run_trial(trial_id: int, params: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Boosts all folds in lockstep up to `n_estimators`, with early stopping on the
+    mean validation AUC and ASHA checks at the rungs. Runs inside a worker
+    (or in-process after `_init_worker`).
+    """
+    import lightgbm as lgb
+
+    store = _worker_store
+    store.start(trial_id, params)
+    start = time.perf_counter()
+
+    train_params = {**params, **BASE_PARAMS, "num_threads": settings["threads"]}
+    rungs = set(settings["rungs"])
+    state, best_score, best_iteration, iteration = "COMPLETE", -np.inf, 0, 0
+
+    try:
+        boosters = []
+        for train, valid in _worker_folds:
+            booster = lgb.Booster(train_params, train_set=train)
+            booster.add_valid(valid, "valid")
+            boosters.append(booster)
+
+        for iteration in range(1, settings["max_rounds"] + 1):
+            for booster in boosters:
+                booster.update()
+            score = float(np.mean([booster.eval_valid()[0][2] for booster in boosters]))
+
+            if score > best_score:
+                best_score, best_iteration = score, iteration
+            elif iteration - best_iteration >= settings["early_stopping_rounds"]:
+                break
+
+            if iteration in rungs and not store.report_rung(trial_id, iteration, best_score, settings["eta"]):
+                state = "PRUNED"
+                break
+    except Exception as e:
+        # One bad configuration must not end the search
+        seconds = time.perf_counter() - start
+        store.finish(trial_id, "FAILED", None, None, iteration, seconds)
+        return {"trial_id": trial_id, "state": "FAILED", "score": None, "best_iteration": None,
+                "rounds": iteration, "seconds": seconds, "error": str(e)}
+
+    seconds = time.perf_counter() - start
+    store.finish(trial_id, state, best_score, best_iteration, iteration, seconds)
+    return {"trial_id": trial_id, "state": state, "score": best_score,
+            "best_iteration": best_iteration, "rounds": iteration, "seconds": seconds}
+
+
+def _run_trial_task(args) -> Dict[str, Any]:
+    return run_trial(*args)
+
+
+# ============================================================
+# Search
+# ============================================================
+def search_key(data_path: str, space: Dict[str, Any], settings: Dict[str, Any], exclude: tuple) -> str:
+    """Identifies data + everything that makes scores comparable (not n_iter or workers)."""
+    stat = os.stat(data_path)
+    key = {
+        "data": [os.path.abspath(data_path), stat.st_size, int(stat.st_mtime)],
+        "space": {k: (v if isinstance(v, list) else repr(v)) for k, v in space.items()},
+        "exclude": sorted(exclude),
+        **{k: settings[k] for k in ("n_folds", "seed", "max_rounds", "early_stopping_rounds", "rungs", "eta")},
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def run_search(data_path: str, store_path: str, n_iter: int = 30, workers: int = 0,
+               space: Optional[Dict[str, Any]] = None, n_folds: int = 5, seed: int = 42,
+               max_rounds: int = 2000, early_stopping_rounds: int = 100, min_rounds: int = 100,
+               eta: int = 3, threads_per_trial: Optional[int] = None, exclude: tuple = ()) -> Optional[Dict[str, Any]]:
+    """
+    Runs (or resumes) a search and returns the best completed trial.
+
+    Args:
+        data_path (str): Encoded training Parquet (features + TARGET).
+        store_path (str): SQLite trial store; trials finished there are not rerun.
+        n_iter (int): Total trials (trial ids 0..n_iter-1).
+        workers (int): Trial processes (0 = in-process, one trial at a time).
+        space (dict, optional): Parameter space (default PARAM_SPACE).
+        max_rounds (int): Boosting-round budget per trial (n_estimators upper bound).
+        early_stopping_rounds (int): Rounds without mean-AUC improvement before stopping.
+        min_rounds (int): First ASHA rung; eta (int): reduction factor (1 disables pruning).
+        threads_per_trial (int, optional): LightGBM num_threads (default cores // workers).
+        exclude (tuple): Columns not used as features.
+
+    Returns:
+        dict or None: Best trial (params, score, best_iteration, ...).
+    """
+    space = space or PARAM_SPACE
+    threads = threads_per_trial or max(1, (os.cpu_count() or 1) // max(workers, 1))
+    settings = {
+        "n_folds": n_folds, "seed": seed, "max_rounds": max_rounds, "early_stopping_rounds": early_stopping_rounds,
+        "rungs": rung_rounds(min_rounds, eta, max_rounds), "eta": eta, "threads": threads,
+    }
+
+    key = search_key(data_path, space, settings, exclude)
+    store = TrialStore(store_path, search_key=key)
+    fold_paths = build_fold_datasets(data_path, f"{store_path}.folds-{key[:12]}", n_folds, seed, exclude)
+
+    done = store.finished_ids()
+    pending = [i for i in range(n_iter) if i not in done]
+    print(f"[TUNING] {len(done)} trials already in {store_path}, {len(pending)} to run "
+          f"({max(workers, 1)} x {threads} threads, rungs {settings['rungs']}).")
+
+    tasks = [(i, sample_params(space, i, seed), settings) for i in pending]
+    start = time.perf_counter()
+
+    def log(result):
+        if result["state"] == "FAILED":
+            print(f"❌ trial {result['trial_id']} failed: {result['error']}")
+            return
+        print(f"[TUNING] trial {result['trial_id']}: {result['state']} AUC {result['score']:.5f} "
+              f"(best iteration {result['best_iteration']}, {result['rounds']} rounds, {result['seconds']:.1f}s)")
+
+    if workers > 0 and tasks:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                 initializer=_init_worker, initargs=(fold_paths, store_path)) as executor:
+            for future in as_completed([executor.submit(_run_trial_task, task) for task in tasks]):
+                log(future.result())
+    elif tasks:
+        _init_worker(fold_paths, store_path)
+        for task in tasks:
+            log(_run_trial_task(task))
+
+    print(f"[TUNING] {len(tasks)} trials in {time.perf_counter() - start:.1f}s.")
+    best = store.best()
+    store.close()
+    return best
+
+
+def best_params(trial: Dict[str, Any]) -> Dict[str, Any]:
+    """best_params.json content: the trial's LGBMClassifier arguments with n_estimators = best iteration."""
+    return {**trial["params"], "n_estimators": int(trial["best_iteration"])}
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main():
+    paths = Paths(PROJECT_BASE_PATH)
+
+    parser = argparse.ArgumentParser(description="Parallel LightGBM search with ASHA pruning and a resumable store.")
+    parser.add_argument("data", nargs="?", default=os.path.join(paths.DATA_PROCESSED_DIR, "train_final_encoded.parquet"))
+    parser.add_argument("--store", default=os.path.join(paths.MODEL_DIR, "tuning", "trials.sqlite"))
+    parser.add_argument("--out", default=os.path.join(paths.MODEL_DIR, "best_params.json"))
+    parser.add_argument("--n-iter", type=int, default=30, help="Total trials (finished ones are not rerun).")
+    parser.add_argument("--workers", type=int, default=0, help="Trial processes (0 = in-process).")
+    parser.add_argument("--threads-per-trial", type=int, default=None, help="Default: cores // workers.")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-rounds", type=int, default=2000)
+    parser.add_argument("--early-stopping", type=int, default=100)
+    parser.add_argument("--min-rounds", type=int, default=100, help="First pruning rung.")
+    parser.add_argument("--eta", type=int, default=3, help="Reduction factor (1 = no pruning).")
+    parser.add_argument("--exclude", nargs="*", default=[], help="Columns not used as features.")
+    args = parser.parse_args()
+
+    best = run_search(
+        args.data, args.store, n_iter=args.n_iter, workers=args.workers, n_folds=args.folds, seed=args.seed,
+        max_rounds=args.max_rounds, early_stopping_rounds=args.early_stopping, min_rounds=args.min_rounds,
+        eta=args.eta, threads_per_trial=args.threads_per_trial, exclude=tuple(args.exclude),
+    )
+    if best is None:
+        print("❌ No completed trial; best_params.json not written.")
+        return
+
+    with open(args.out, "w") as f:
+        json.dump(best_params(best), f, indent=4)
+    print(f"✅ Best ROC-AUC {best['score']:.5f} (trial {best['trial_id']}). Saved best params to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
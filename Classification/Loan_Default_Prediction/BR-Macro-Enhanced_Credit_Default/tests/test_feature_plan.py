@@ -0,0 +1,117 @@
+# FILE: tests/test_feature_plan.py
+#
+# Parity of the compiled FeaturePlan (the default serving path) with the
+# DataFrame reference `PredictionHandler.preprocess` / `preprocess_batch`, on
+# the synthetic artifacts from benchmarks.synthetic, including the edge cases
+# the plan handles slot by slot.
+#
+#   python -m pytest tests/test_feature_plan.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import DAYS_EMPLOYED_ANOMALY, build_artifacts, make_payloads
+from src.predict import PredictionHandler
+from src.schemas import LoanApplicationRawInput
+
+RTOL = 1e-12
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+@pytest.fixture(scope="module")
+def handler(tmp_path_factory):
+    paths = build_artifacts(str(tmp_path_factory.mktemp("models")), n_rows=2000, n_estimators=30)
+    handler = PredictionHandler(**paths, backend="sklearn")
+    assert handler.feature_plan is not None
+    return handler
+
+
+def validated(payload):
+    """What /predict hands over: the schema's dump, with every optional field present (None if not sent)."""
+    return LoanApplicationRawInput.model_validate(payload).model_dump()
+
+
+def edge_cases():
+    """One record per edge case, each built on a complete, validated payload."""
+    payload = make_payloads(1, seed=7, missing_rate=0.0)[0]
+    base = validated(payload)
+    cases = {
+        "complete": {},
+        "anomaly": {"DAYS_EMPLOYED": DAYS_EMPLOYED_ANOMALY},
+        "negative_days": {"DAYS_EMPLOYED": -1234},
+        "unseen_category": {"ORGANIZATION_TYPE": "Unseen Org 1"},
+        "missing_category_none": {"ORGANIZATION_TYPE": None},
+        "missing_category_nan": {"ORGANIZATION_TYPE": np.nan},
+        "zero_income": {"AMT_INCOME_TOTAL": 0.0},
+        "zero_credit": {"AMT_CREDIT": 0.0},
+        "zero_over_zero": {"AMT_ANNUITY": 0.0, "AMT_CREDIT": 0.0, "AMT_INCOME_TOTAL": 0.0},
+        "negative_over_zero": {"AMT_ANNUITY": -5.0, "AMT_INCOME_TOTAL": 0.0},
+        "missing_annuity": {"AMT_ANNUITY": None},
+        "missing_income": {"AMT_INCOME_TOTAL": None},
+    }
+    records = {name: {**base, **changes} for name, changes in cases.items()}
+    records["required_only"] = validated({
+        name: payload[name] for name, field in LoanApplicationRawInput.model_fields.items() if field.is_required()
+    })
+    return records
+
+
+EDGE_CASES = edge_cases()
+
+
+def assert_same(actual: np.ndarray, expected: pd.DataFrame):
+    np.testing.assert_allclose(actual, expected.to_numpy(dtype=np.float64), rtol=RTOL, atol=0.0)
+
+
+# ============================================================
+# Single record
+# ============================================================
+@pytest.mark.parametrize("case", sorted(EDGE_CASES))
+def test_transform_matches_preprocess(handler, case):
+    record = EDGE_CASES[case]
+    assert_same(handler.feature_plan.transform(record).reshape(1, -1), handler.preprocess(record))
+
+
+def test_transform_matches_preprocess_on_random_payloads(handler):
+    payloads = make_payloads(200, seed=3, missing_rate=0.3, anomaly_rate=0.2, unseen_category_rate=0.2)
+    for record in map(validated, payloads):
+        assert_same(handler.feature_plan.transform(record).reshape(1, -1), handler.preprocess(record))
+
+
+# ============================================================
+# Batch and DataFrame
+# ============================================================
+def test_batch_and_frame_match_preprocess_batch(handler):
+    records = list(EDGE_CASES.values()) + [validated(p) for p in make_payloads(
+        300, seed=5, missing_rate=0.3, anomaly_rate=0.1, unseen_category_rate=0.1
+    )]
+    expected = handler.preprocess_batch(records)
+
+    assert_same(handler.feature_plan.transform_batch(records), expected)
+    assert_same(handler.feature_plan.transform_frame(pd.DataFrame.from_records(records)), expected)
+
+
+def test_batch_without_a_field_matches_preprocess_batch(handler):
+    # Offline scoring (src.score) reads files that may lack a column entirely
+    records = [{k: v for k, v in validated(p).items() if k != "AMT_ANNUITY"} for p in make_payloads(20, seed=6)]
+    expected = handler.preprocess_batch(records)
+
+    assert_same(handler.feature_plan.transform_batch(records), expected)
+    assert_same(handler.feature_plan.transform_frame(pd.DataFrame.from_records(records)), expected)
+
+
+def test_edge_cases_reach_their_special_values(handler):
+    # Guards the parity tests above against edge cases that silently stop exercising anything
+    features = handler.final_features
+    transform = handler.feature_plan.transform
+
+    anomaly = transform(EDGE_CASES["anomaly"])[features.index("DAYS_EMPLOYED")]
+    assert anomaly == handler.imputation_map["DAYS_EMPLOYED"]
+    assert transform(EDGE_CASES["negative_days"])[features.index("DAYS_EMPLOYED")] == 1234
+    assert np.isposinf(transform(EDGE_CASES["zero_income"])[features.index("ANNUITY_INCOME_RATIO")])
+    assert np.isneginf(transform(EDGE_CASES["negative_over_zero"])[features.index("ANNUITY_INCOME_RATIO")])
+    zero_over_zero = transform(EDGE_CASES["zero_over_zero"])[features.index("PAYMENT_RATE")]
+    assert zero_over_zero == handler.imputation_map["PAYMENT_RATE"]
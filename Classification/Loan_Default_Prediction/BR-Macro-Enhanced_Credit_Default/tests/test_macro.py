@@ -0,0 +1,178 @@
+# FILE: tests/test_macro.py
+#
+# Incremental BCB ingestion (src.macro) against a local stub of the SGS API:
+# canned series are served over HTTP by a threaded server, so the real
+# urllib layer, the 10-year windows and the thread pool are all exercised.
+#
+#   python -m pytest tests/test_macro.py
+
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from src.macro import MacroStore, SGSClient
+
+SERIES = {"SELIC": 432, "IPCA": 433}
+
+
+# ============================================================
+# Stub SGS server
+# ============================================================
+def canned_series(code: int) -> pd.DataFrame:
+    """Daily SELIC-like and monthly IPCA-like observations, 2000-2030."""
+    if code == 432:
+        dates = pd.date_range("2000-01-01", "2030-12-31", freq="D")
+        values = [round(10 + 0.01 * (i % 500), 2) for i in range(len(dates))]
+    else:
+        dates = pd.date_range("2000-01-01", "2030-12-01", freq="MS")
+        values = [round(0.1 * (i % 9) - 0.2, 2) for i in range(len(dates))]
+    return pd.DataFrame({"date": dates, "value": values})
+
+
+class StubSGS:
+    """Serves `canned_series` like api.bcb.gov.br and records every request."""
+
+    def __init__(self, delay_seconds: float = 0.0):
+        self.delay_seconds = delay_seconds
+        self.data = {code: canned_series(code) for code in SERIES.values()}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/dados/serie/bcdata.sgs.{{code}}/dados"
+
+    def handle(self, request: BaseHTTPRequestHandler):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            parsed = urllib.parse.urlparse(request.path)
+            code = int(parsed.path.split("bcdata.sgs.")[1].split("/")[0])
+            query = urllib.parse.parse_qs(parsed.query)
+            start = pd.to_datetime(query["dataInicial"][0], format="%d/%m/%Y")
+            end = pd.to_datetime(query["dataFinal"][0], format="%d/%m/%Y")
+            with self._lock:
+                self.requests.append((code, start, end))
+            time.sleep(self.delay_seconds)
+
+            frame = self.data[code]
+            rows = frame[(frame["date"] >= start) & (frame["date"] <= end)]
+            if rows.empty:
+                request.send_response(404)
+                request.end_headers()
+                return
+            body = json.dumps([
+                {"data": d.strftime("%d/%m/%Y"), "valor": f"{v:.2f}"} for d, v in zip(rows["date"], rows["value"])
+            ]).encode("utf-8")
+            request.send_response(200)
+            request.send_header("Content-Type", "application/json")
+            request.send_header("Content-Length", str(len(body)))
+            request.end_headers()
+            request.wfile.write(body)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def __enter__(self) -> "StubSGS":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def sgs():
+    with StubSGS() as stub:
+        yield stub
+
+
+def make_store(directory, stub: StubSGS, start_date: str = "01/01/2014") -> MacroStore:
+    client = SGSClient(base_url=stub.base_url, max_workers=8, retries=0)
+    return MacroStore(str(directory), client=client, series=SERIES, start_date=start_date)
+
+
+# ============================================================
+# Tests
+# ============================================================
+def test_update_fetches_only_after_stored_tail(sgs, tmp_path):
+    store = make_store(tmp_path, sgs)
+    store.update(end_date="15/06/2020")
+    tails = {name: store.last_date(name) for name in SERIES}
+    assert tails == {"SELIC": pd.Timestamp("2020-06-15"), "IPCA": pd.Timestamp("2020-06-01")}
+
+    sgs.requests.clear()
+    summary = store.update(end_date="31/03/2021")
+
+    starts = {code: start for code, start, _ in sgs.requests}
+    assert len(sgs.requests) == len(SERIES)
+    assert starts == {code: tails[name] + pd.Timedelta(days=1) for name, code in SERIES.items()}
+    assert summary["since"] == "2020-06"
+    assert summary["new_rows"] == {"SELIC": 289, "IPCA": 9}
+
+
+def test_update_up_to_date_store(sgs, tmp_path):
+    store = make_store(tmp_path, sgs)
+    store.update(end_date="31/12/2019")
+    before = store.load_features()
+    sgs.requests.clear()
+
+    # SELIC is complete; only the rest of IPCA's month is asked for, and the API has nothing (404)
+    summary = store.update(end_date="31/12/2019")
+    assert sgs.requests == [(433, pd.Timestamp("2019-12-02"), pd.Timestamp("2019-12-31"))]
+    assert summary["new_rows"] == {"SELIC": 0, "IPCA": 0}
+    assert summary["months_recomputed"] == 0
+    pd.testing.assert_frame_equal(store.load_features(), before)
+
+
+def test_windows_are_fetched_concurrently(tmp_path):
+    with StubSGS(delay_seconds=0.2) as stub:
+        store = make_store(tmp_path, stub, start_date="01/01/2000")
+        start = time.perf_counter()
+        store.update(end_date="31/12/2025")
+        elapsed = time.perf_counter() - start
+
+    # 26 years -> 3 windows per series, each at most 10 years and back to back
+    windows = sorted((code, s, e) for code, s, e in stub.requests)
+    assert len(windows) == 3 * len(SERIES)
+    for code in SERIES.values():
+        spans = [(s, e) for c, s, e in windows if c == code]
+        assert all(e < s + pd.DateOffset(years=10) for s, e in spans)
+        assert all(nxt[0] == prev[1] + pd.Timedelta(days=1) for prev, nxt in zip(spans, spans[1:]))
+
+    assert stub.max_in_flight > 1
+    assert elapsed < 0.2 * len(windows)
+
+
+def test_incremental_features_equal_full_rebuild(sgs, tmp_path):
+    incremental = make_store(tmp_path / "incremental", sgs)
+    for end_date in ("15/06/2020", "20/06/2020", "31/03/2021", "10/01/2022"):
+        incremental.update(end_date=end_date)
+
+    full = make_store(tmp_path / "full", sgs)
+    full.update(end_date="10/01/2022", full=True)
+
+    pd.testing.assert_frame_equal(incremental.load_features(), full.load_features())
+    for name in SERIES:
+        pd.testing.assert_frame_equal(incremental.load_series(name), full.load_series(name))
@@ -0,0 +1,93 @@
+# FILE: tests/test_predictors.py
+#
+# Parity of the scoring backends (src.predictors) on the synthetic model from
+# benchmarks.synthetic: the booster and pure-NumPy backends must reproduce the
+# sklearn wrapper on every split threshold and on rows with missing values.
+#
+#   python -m pytest tests
+
+import joblib
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import build_artifacts
+from src.predictors import (
+    NumpyTreePredictor,
+    SklearnPredictor,
+    create_predictor,
+    probe_matrix,
+    verify_parity,
+)
+
+ATOL = 1e-9
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+@pytest.fixture(scope="module")
+def model(tmp_path_factory):
+    paths = build_artifacts(str(tmp_path_factory.mktemp("models")), n_rows=2000, n_estimators=60)
+    return joblib.load(paths["model_path"])
+
+
+@pytest.fixture(scope="module")
+def inputs(model):
+    """probe_matrix rows plus all-NaN rows and probe rows with a random half of the cells blanked."""
+    X = probe_matrix(model)
+    rng = np.random.default_rng(1)
+    holes = X[:64].copy()
+    holes[rng.random(holes.shape) < 0.5] = np.nan
+    all_missing = np.full((4, X.shape[1]), np.nan)
+    return np.vstack([X, holes, all_missing])
+
+
+# ============================================================
+# Parity
+# ============================================================
+def test_inputs_cover_missing_values(inputs):
+    assert np.isnan(inputs).any(axis=1).sum() >= 68
+    assert np.isnan(inputs).all(axis=1).sum() == 4
+
+
+@pytest.mark.parametrize("backend", ["booster", "numpy"])
+def test_backend_matches_sklearn(model, inputs, backend):
+    candidate = create_predictor(model, backend)
+    assert candidate.name == backend
+    assert verify_parity(SklearnPredictor(model), candidate, inputs, atol=ATOL) <= ATOL
+
+
+def test_numpy_matches_booster(model, inputs):
+    booster = create_predictor(model, "booster")
+    assert verify_parity(booster, create_predictor(model, "numpy"), inputs, atol=ATOL) <= ATOL
+
+
+def test_saved_numpy_trees_match_sklearn(model, inputs, tmp_path):
+    NumpyTreePredictor.from_booster(model.booster_).save(str(tmp_path))
+    loaded = NumpyTreePredictor.load(str(tmp_path), mmap_mode="r")
+    assert verify_parity(SklearnPredictor(model), loaded, inputs, atol=ATOL) <= ATOL
+
+
+def test_probabilities_are_valid(model, inputs):
+    proba = create_predictor(model, "numpy").predict_proba(inputs)
+    assert proba.shape == (len(inputs),)
+    assert np.all((proba > 0) & (proba < 1))
+
+
+# ============================================================
+# Errors
+# ============================================================
+def test_verify_parity_rejects_divergent_backend(model, inputs):
+    class Shifted:
+        name = "shifted"
+
+        def predict_proba(self, X):
+            return SklearnPredictor(model).predict_proba(X) + 1e-6
+
+    with pytest.raises(ValueError, match="shifted"):
+        verify_parity(SklearnPredictor(model), Shifted(), inputs, atol=ATOL)
+
+
+def test_unknown_backend(model):
+    with pytest.raises(ValueError, match="Unknown predictor backend"):
+        create_predictor(model, "onnx")
@@ -0,0 +1,140 @@
+# FILE: tests/test_registry_state.py
+#
+# Multi-worker convergence of the model registry (src.registry_state): several
+# ModelRegistry instances, standing in for gunicorn workers, poll one desired-state
+# file and must end up serving the same versions with the same traffic split.
+#
+#   python -m pytest tests/test_registry_state.py
+
+import asyncio
+import threading
+
+import pytest
+
+from src.registry import ModelRegistry
+from src.registry_state import DesiredState, RegistrySync, registry_snapshot
+
+
+# ============================================================
+# Stub handlers and workers
+# ============================================================
+class StubHandler:
+    """Just enough of PredictionHandler for registry warm-up."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.cache = None
+        self.stage_observer = None
+        self.drift_monitor = None
+
+    def predict_proba(self, record):
+        return 0.5
+
+    def predict_proba_batch(self, records):
+        return [0.5] * len(records)
+
+
+def stub_loader(entry):
+    def loader():
+        if entry.get("fail"):
+            raise RuntimeError("broken artifacts")
+        return StubHandler(entry["model_dir"])
+    return loader
+
+
+def make_workers(path, n=2):
+    workers = []
+    for _ in range(n):
+        registry = ModelRegistry()
+        registry.add("v1", StubHandler("v1"), source={"model_dir": "v1"})
+        workers.append(RegistrySync(registry, DesiredState(str(path)), stub_loader, interval_seconds=0.01))
+    return workers
+
+
+async def settle(workers, rounds=200):
+    """Refreshes every worker until all report converged (or `rounds` is exhausted)."""
+    for _ in range(rounds):
+        for sync in workers:
+            await sync.refresh()
+        if all(sync.status()["converged"] for sync in workers):
+            return
+        await asyncio.sleep(0.01)
+
+
+# ============================================================
+# Tests
+# ============================================================
+def test_workers_converge_on_load_traffic_and_unload(tmp_path):
+    async def scenario():
+        workers = make_workers(tmp_path / "state.json", n=3)
+        state = workers[0].state
+        seed = lambda: registry_snapshot(workers[0].registry)
+
+        with state.update(seed) as desired:
+            desired["versions"]["v2"] = {"model_dir": "v2", "backend": "sklearn"}
+            desired["traffic"] = {"v1": 90.0, "v2": 10.0}
+        await settle(workers)
+        for sync in workers:
+            assert set(sync.registry.versions) == {"v1", "v2"}
+            assert sync.registry.traffic == {"v1": 90.0, "v2": 10.0}
+
+        with state.update(seed) as desired:
+            desired["traffic"] = {"v2": 100.0}
+            del desired["versions"]["v1"]
+        await settle(workers)
+        for sync in workers:
+            assert set(sync.registry.versions) == {"v2"}
+            assert sync.registry.traffic == {"v2": 100.0}
+            assert sync.status()["revision"] == 2 and sync.status()["converged"]
+
+    asyncio.run(scenario())
+
+
+def test_split_waits_for_its_versions(tmp_path):
+    async def scenario():
+        (sync,) = make_workers(tmp_path / "state.json", n=1)
+        with sync.state.update(lambda: registry_snapshot(sync.registry)) as desired:
+            desired["versions"]["v2"] = {"model_dir": "v2", "fail": True}
+            desired["traffic"] = {"v1": 50.0, "v2": 50.0}
+        await settle([sync], rounds=20)
+
+        # The load failed: the old split keeps serving and the load is not retried on this revision
+        assert sync.registry.traffic == {"v1": 100.0}
+        assert sync.registry.loading_status("v2")["status"] == "failed"
+        assert not sync.status()["converged"]
+        assert sync._attempted == {"v2": 1}
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    state = DesiredState(str(tmp_path / "state.json"))
+    seed = lambda: {"revision": 0, "versions": {}, "traffic": {}}
+
+    def declare(i):
+        with state.update(seed) as desired:
+            desired["versions"][f"v{i}"] = {"model_dir": f"v{i}"}
+
+    threads = [threading.Thread(target=declare, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    final = state.read()
+    assert final["revision"] == 16
+    assert set(final["versions"]) == {f"v{i}" for i in range(16)}
+
+
+def test_failed_update_leaves_file_untouched(tmp_path):
+    state = DesiredState(str(tmp_path / "state.json"))
+    seed = lambda: {"revision": 0, "versions": {}, "traffic": {}}
+    with state.update(seed) as desired:
+        desired["traffic"] = {"v1": 100.0}
+
+    with pytest.raises(KeyError):
+        with state.update(seed) as desired:
+            desired["traffic"] = {}
+            raise KeyError("v9")
+    assert state.read()["traffic"] == {"v1": 100.0}
+    assert state.read()["revision"] == 1
@@ -0,0 +1,69 @@
+# FILE: tests/test_selection.py
+#
+# knee_point (src.selection) against kneed 0.8.5, the version Notebook 06 ran:
+# KneeLocator(range(len(y)), y, curve="convex", direction="decreasing").knee.
+# The expected knees below were produced by kneed 0.8.5; when that exact version
+# is installed, random curves are also compared with it directly.
+#
+#   python -m pytest tests/test_selection.py
+
+import warnings
+
+import numpy as np
+import pytest
+
+from src.selection import DEFAULT_TOP_FEATURES, knee_point, knee_top_n
+
+# (sorted importances, kneed 0.8.5 knee)
+KNOWN_KNEES = [
+    # Typical split-importance curves
+    ([1003, 712, 501, 357, 233, 176, 117, 90, 81, 54, 34, 28], 4),
+    ([1029, 773, 596, 441, 329, 260, 198, 159, 134, 88, 85], 4),
+    ([1007, 770, 575, 436, 344, 261, 202, 149, 129, 104, 60, 48], 4),
+    ([1016, 748, 527, 399, 284, 213, 145, 116, 95, 77, 63, 56, 37, 22], 4),
+    ([1000, 688, 500, 349, 231, 164, 111, 76, 74, 54, 34, 34, 27, 25, 22, 20, 10], 5),
+    # Curves with a local minimum before the knee: kneed 0.8.5 resets the threshold
+    # to 0 there and keeps testing (0.8.6 pauses detection until the next maximum)
+    ([77, 77, 62, 61, 51, 45, 42, 42, 36, 29, 11], 2),
+    ([99, 84, 83, 69, 63, 47, 28, 21], 1),
+    ([88, 88, 76, 67, 66, 26, 24, 7], 0),
+    ([66, 58, 57, 47, 45, 42, 22, 6], 0),
+    ([83, 72, 69, 57, 57, 44, 36, 28], 3),
+    ([97, 97, 84, 80, 69, 62, 58, 39, 23, 9, 1], 0),
+    # Straight line: no knee
+    ([100, 80, 60, 40, 20, 0], None),
+]
+
+
+@pytest.mark.parametrize("curve, expected", KNOWN_KNEES)
+def test_knee_point_matches_kneed(curve, expected):
+    assert knee_point(np.array(curve, dtype=np.float64)) == expected
+
+
+def test_knee_point_degenerate_curves():
+    assert knee_point([5.0, 3.0]) is None
+    assert knee_point([4.0, 4.0, 4.0, 4.0]) is None
+
+
+def test_knee_top_n_fallback():
+    assert knee_top_n(np.array([1000, 688, 500, 349, 231, 164, 111, 76, 74, 54], dtype=np.float64)) == 4
+    assert knee_top_n(np.array([100, 80, 60, 40, 20, 0], dtype=np.float64)) == DEFAULT_TOP_FEATURES
+    # A knee at rank 0 would select no feature at all
+    assert knee_top_n(np.array([88, 88, 76, 67, 66, 26, 24, 7], dtype=np.float64)) == DEFAULT_TOP_FEATURES
+
+
+def test_knee_point_matches_installed_kneed_085():
+    kneed = pytest.importorskip("kneed")
+    if getattr(kneed, "__version__", None) != "0.8.5":
+        pytest.skip("needs kneed 0.8.5, the version Notebook 06 ran")
+
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        n = int(rng.integers(3, 120))
+        y = np.sort(rng.integers(0, 500, n))[::-1].astype(np.float64)
+        if y.max() == y.min():
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected = kneed.KneeLocator(np.arange(n), y, curve="convex", direction="decreasing").knee
+        assert knee_point(y) == (None if expected is None else int(expected)), y.tolist()